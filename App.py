@@ -1,69 +1,242 @@
 import sys
-from PyQt5.QtWidgets import (QApplication, QWidget, QTableWidget, QTableWidgetItem, QVBoxLayout, QLineEdit, 
+from PyQt5.QtWidgets import (QApplication, QWidget, QTableWidget, QTableView, QTableWidgetItem, QVBoxLayout, QLineEdit, 
                              QMessageBox, QPushButton, QCheckBox, QHBoxLayout, QLabel, QDoubleSpinBox, 
-                             QTabWidget, QDialog, QDialogButtonBox, QListWidget)
-from PyQt5.QtGui import QIcon, QPixmap
-from PyQt5.QtCore import Qt
-from sqlalchemy import create_engine, Table, Column, Integer, String, Float, MetaData
-import requests
-import tmdbsimple as tmdb
+                             QTabWidget, QDialog, QDialogButtonBox, QListView, QSpinBox,
+                             QComboBox, QProgressBar, QShortcut, QFileDialog)
+from PyQt5.QtGui import QIcon, QPixmap, QKeySequence
+from PyQt5.QtCore import Qt, QTimer, QObject, pyqtSignal
+import os
+import time
+import argparse
+import contextlib
+import threading
 import webbrowser
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import CountVectorizer
-
-# TMDb API 키 설정
-tmdb.API_KEY = ''
-
-def fetch_movie_poster_from_tmdb(movie_id):
-    movie = tmdb.Movies(movie_id)
-    response = movie.info()
-    poster_path = response.get('poster_path')
-    if poster_path:
-        poster_url = f'https://image.tmdb.org/t/p/original{poster_path}'
-        return poster_url
-    else:
-        return None
+from movie_model import MovieTableModel, MovieFilterProxyModel
+from movie_filter import GENRES
+from title_search import TitleSearch
+from recommend import DEFAULT_K
+from timing import PhaseTimer
+from background import TaskRunner
+from metrics import metrics, profile_session
+
+# 창을 먼저 띄우기 위해 무거운 모듈(pandas, SQLAlchemy, scipy, requests)은 처음 쓸 때 불러옴
+# (db, core는 영화 목록을 읽는 작업 스레드에서, poster_fetcher는 첫 상세 정보 조회 때)
+
+# 빠르게 입력할 때 검색을 한 번으로 모으는 대기 시간 (밀리초)
+SEARCH_DEBOUNCE_MS = 150
+
+# 디버그 창(Ctrl+Shift+D) 자동 새로 고침 간격 (밀리초)
+METRICS_REFRESH_MS = 1000
+
+# TMDb API 키 설정 (환경 변수 TMDB_API_KEY로도 지정 가능)
+TMDB_API_KEY = os.environ.get('TMDB_API_KEY', '')
+
+# 포스터/메타데이터 조회기 (HTTP 세션과 캐시를 앱 전체에서 공유, 작업 스레드에서 처음 만들 수 있음)
+_poster_fetcher = None
+_poster_fetcher_lock = threading.Lock()
+
+def get_poster_fetcher():
+    global _poster_fetcher
+    with _poster_fetcher_lock:
+        if _poster_fetcher is None:
+            from db import DB_PATH
+            from poster_fetcher import PosterFetcher, CACHE_DIR
+            cache_dir = os.path.join(os.path.dirname(os.path.abspath(DB_PATH)), CACHE_DIR)
+            _poster_fetcher = PosterFetcher(TMDB_API_KEY, cache_dir)
+    return _poster_fetcher
+
+class PosterSignal(QObject):
+    # 작업 스레드에서 끝난 포스터 Future를 GUI 스레드로 전달
+    loaded = pyqtSignal(object)
+
+class CatalogLoader(QObject):
+    # 작업 스레드에서 추천 핵심 객체(영화 목록, 필터/검색 색인, 특징 인덱스)를 만들고
+    # 단계 이름과 결과를 GUI 스레드로 전달
+    progress = pyqtSignal(str)
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, timer, parent=None):
+        super().__init__(parent)
+        self.timer = timer
+        self.timer.on_phase = self.progress.emit
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        try:
+            with self.timer.phase('모듈 불러오기'):
+                from db import DB_PATH
+                from core import RecommenderCore
+            self.loaded.emit(RecommenderCore(DB_PATH, timer=self.timer))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+class MetricsDialog(QDialog):
+    # 구간별 호출 횟수/지연 시간(ms)과 카운터를 보여 주는 디버그 창 (열려 있는 동안 주기적으로 새로 고침)
+    COLUMNS = ['Name', 'Count', 'Mean', 'p50', 'p99', 'Max']
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Debug Metrics")
+        self.resize(700, 500)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setColumnWidth(0, 260)
+
+        refresh_button = QPushButton("새로 고침")
+        refresh_button.clicked.connect(self.refresh)
+        save_button = QPushButton("JSON 저장")
+        save_button.clicked.connect(self.save)
+        reset_button = QPushButton("초기화")
+        reset_button.clicked.connect(lambda: (metrics.reset(), self.refresh()))
+        hbox = QHBoxLayout()
+        hbox.addWidget(refresh_button)
+        hbox.addWidget(save_button)
+        hbox.addWidget(reset_button)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.table)
+        layout.addLayout(hbox)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(METRICS_REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start()
+        self.refresh()
+
+    def refresh(self):
+        snapshot = metrics.snapshot()
+        rows = [(name, h['count'], h.get('mean_ms'), h.get('p50_ms'), h.get('p99_ms'), h.get('max_ms'))
+                for name, h in snapshot['histograms'].items()]
+        rows += [(name, count, None, None, None, None) for name, count in sorted(snapshot['counters'].items())]
+        self.table.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            for j, value in enumerate(row):
+                text = '' if value is None else f'{value:.2f}' if isinstance(value, float) else str(value)
+                self.table.setItem(i, j, QTableWidgetItem(text))
+
+    def save(self):
+        path, _ = QFileDialog.getSaveFileName(self, "JSON 저장", "metrics.json", "JSON (*.json)")
+        if path:
+            metrics.dump(path)
 
 class MovieDetailDialog(QDialog):
-    def __init__(self, title, genres, tags, poster_url, tmdb_link, parent=None):
+    # 모달이 아닌 영화 상세 정보 창 (하나를 재사용: 다른 영화를 누르면 내용만 바꿈)
+    def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Movie Info")
         self.setFixedSize(500, 600)  # 고정된 크기로 설정
+        self.tmdb_link = None
+        self.poster_future = None
         
         layout = QVBoxLayout()
         
         # 영화 제목
-        title_label = QLabel(f"<b>Title:</b> {title}")
-        layout.addWidget(title_label)
+        self.title_label = QLabel()
+        layout.addWidget(self.title_label)
         
         # 영화 장르
-        genres_label = QLabel(f"<b>Genres:</b> {genres}")
-        layout.addWidget(genres_label)
+        self.genres_label = QLabel()
+        layout.addWidget(self.genres_label)
         
         # 영화 태그
-        tags_label = QLabel(f"<b>Tags:</b> {tags}")
-        layout.addWidget(tags_label)
+        self.tags_label = QLabel()
+        self.tags_label.setWordWrap(True)
+        layout.addWidget(self.tags_label)
         
-        # 영화 포스터
-        if poster_url:
-            response = requests.get(poster_url)
-            pixmap = QPixmap()
-            pixmap.loadFromData(response.content)
-            scaled_pixmap = pixmap.scaledToWidth(300)  # 가로 너비를 300으로 조절
-            poster_label = QLabel()
-            poster_label.setPixmap(scaled_pixmap)
-            layout.addWidget(poster_label)
+        # 영화 포스터 (창은 바로 열고, 백그라운드 조회가 끝나면 채움)
+        self.poster_label = QLabel()
+        layout.addWidget(self.poster_label, 1)
+        self.poster_signal = PosterSignal()
+        self.poster_signal.loaded.connect(self.set_poster)
         
         # TMDb 링크 추가
-        tmdb_button = QPushButton("상세정보 보기")
-        tmdb_button.clicked.connect(lambda: webbrowser.open(tmdb_link))
-        layout.addWidget(tmdb_button)
+        self.tmdb_button = QPushButton("상세정보 보기")
+        self.tmdb_button.clicked.connect(lambda: webbrowser.open(self.tmdb_link))
+        layout.addWidget(self.tmdb_button)
         self.setLayout(layout)
 
+    def show_loading(self, title):
+        self.show_message(title, "불러오는 중...")
+
+    def show_message(self, title, message):
+        # 정보를 불러오는 중이거나 표시할 정보가 없을 때
+        self._cancel_poster()
+        self.title_label.setText(f"<b>Title:</b> {title}")
+        self.genres_label.setText("<b>Genres:</b>")
+        self.tags_label.setText("<b>Tags:</b>")
+        self.poster_label.setText(message)
+        self.tmdb_button.setEnabled(False)
+
+    def show_movie(self, title, genres, tags, poster_future, tmdb_link):
+        self._cancel_poster()
+        self.title_label.setText(f"<b>Title:</b> {title}")
+        self.genres_label.setText(f"<b>Genres:</b> {genres}")
+        self.tags_label.setText(f"<b>Tags:</b> {tags}")
+        self.tmdb_link = tmdb_link
+        self.tmdb_button.setEnabled(True)
+        self.poster_future = poster_future
+        if poster_future is not None:
+            self.poster_label.setText("포스터 불러오는 중...")
+            poster_future.add_done_callback(self.poster_signal.loaded.emit)
+        else:
+            self.poster_label.setText("포스터 없음")
+
+    def _cancel_poster(self):
+        # 이전 영화의 포스터 조회가 아직 시작 전이면 취소
+        if self.poster_future is not None:
+            self.poster_future.cancel()
+            self.poster_future = None
+
+    def set_poster(self, poster_future):
+        if poster_future is not self.poster_future:
+            return  # 다른 영화로 바뀐 뒤 도착한 이전 포스터
+        poster = None if poster_future.cancelled() or poster_future.exception() else poster_future.result()
+        if not poster:
+            self.poster_label.setText("포스터 없음")
+            return
+        pixmap = QPixmap()
+        pixmap.loadFromData(poster)
+        scaled_pixmap = pixmap.scaledToWidth(300)  # 가로 너비를 300으로 조절
+        self.poster_label.setPixmap(scaled_pixmap)
+
 class MyApp(QWidget):
-    def __init__(self):
+    def __init__(self, started=None):
         super().__init__()
-        self.initUI()
+        # 시작 단계별 시간 (창 표시 -> 작업 스레드의 영화 목록 불러오기 -> 목록 화면 구성)
+        # started: 시작 시간 측정 기준 (perf_counter 값, 주지 않으면 창을 만들기 시작한 시각)
+        self.started = time.perf_counter() if started is None else started
+        self.startup_timer = PhaseTimer()
+        self.core = None
+
+        # 추천 계산/상세 정보 조회를 돌리는 작업 스레드 (새 요청이 오면 같은 종류의 이전 요청은 취소)
+        self.tasks = TaskRunner(parent=self)
+        self.detail_dialog = None
+        with self.startup_timer.phase('창 표시'):
+            self.initUI()
+        self.first_paint = time.perf_counter() - self.started
+
+        # 창을 띄운 뒤 영화 목록을 작업 스레드에서 불러옴 (그동안 진행 상황 표시)
+        self.catalog_loader = CatalogLoader(self.startup_timer, self)
+        self.catalog_loader.progress.connect(self.show_load_progress)
+        self.catalog_loader.loaded.connect(self.set_core)
+        self.catalog_loader.failed.connect(self.show_load_error)
+        self.catalog_loader.start()
+
+        # 디버그 창 (구간별 지연 시간, 카운터)
+        self.metrics_dialog = None
+        QShortcut(QKeySequence('Ctrl+Shift+D'), self, activated=self.show_metrics)
+
+    def show_metrics(self):
+        if self.metrics_dialog is None:
+            self.metrics_dialog = MetricsDialog(self)
+        self.metrics_dialog.show()
+        self.metrics_dialog.raise_()
 
     def initUI(self):
         self.setWindowTitle('Movie RC System')
@@ -85,70 +258,73 @@ class MyApp(QWidget):
         self.tab_widget.addTab(self.movie_tab, "영화 리스트")
         self.tab_widget.addTab(self.recommendation_tab, "영화 추천")
 
+        # 영화 목록을 불러오는 동안 두 탭을 비활성화하고 진행 상황 표시
+        self.movie_tab.setEnabled(False)
+        self.recommendation_tab.setEnabled(False)
+        self.load_label = QLabel("영화 목록 불러오는 중...")
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 0)  # 단계별 진행률을 알 수 없으므로 진행 중 표시만
+
         # 수직 레이아웃 생성 및 탭 위젯 추가
         vbox = QVBoxLayout()
         vbox.addWidget(self.tab_widget)
+        vbox.addWidget(self.load_label)
+        vbox.addWidget(self.load_progress)
         self.setLayout(vbox)
         self.show()
-        
+
+    def show_load_progress(self, phase):
+        self.load_label.setText(f"영화 목록 불러오는 중... ({phase})")
+
+    def show_load_error(self, message):
+        self.load_progress.hide()
+        self.load_label.setText(f"영화 목록을 불러오지 못했습니다: {message}")
+        QMessageBox.critical(self, "Movie RC System", f"영화 목록을 불러오지 못했습니다.\n{message}")
+
+    def set_core(self, core):
+        # 작업 스레드에서 만든 추천 핵심 객체(영화 목록, 제목 매핑, 필터, 특징 인덱스)를 화면에 연결
+        with self.startup_timer.phase('목록 화면 구성'), metrics.timer('app.build_view'):
+            self.core = core
+            self.catalog = core.catalog
+
+            # 셀은 화면에 그릴 때만 모델에서 만들어짐
+            self.movie_model = MovieTableModel(core.catalog, self)
+            self.movie_proxy_model = MovieFilterProxyModel(self.movie_model, self)
+            self.movie_table_widget.setModel(self.movie_proxy_model)
+            self.movie_table_widget.setColumnWidth(0, 400) # 1열 너비 지정
+            self.movie_table_widget.setColumnWidth(1, 400) # 2열 너비 지정
+            self.movie_table_widget.setColumnWidth(2, 200) # 3열 너비 지정
+
+            # 필터링용 열 배열 (제목 색인, 장르 비트마스크, 평점)
+            self.movie_filter = core.movie_filter
+            self.movie_tab.setEnabled(True)
+            self.recommendation_tab.setEnabled(True)
+
+        # 시작 단계별 시간 기록 (첫 화면까지 시간과 목록 표시까지 전체 시간, 디버그 창과 --profile 보고서에서 확인)
+        ready = time.perf_counter() - self.started
+        self.load_progress.hide()
+        self.load_label.setText(f"영화 {len(core)}편 (첫 화면 {self.first_paint:.2f}초, 목록 준비 {ready:.2f}초)")
+        for name, seconds in self.startup_timer.phases:
+            metrics.observe(f'startup.{name}', seconds)
+        metrics.observe('startup.first_paint', self.first_paint)
+        metrics.observe('startup.ready', ready)
+
     def initMovieTab(self):
 
-        # 데이터베이스 연결 설정
-        db_uri = 'sqlite:///data.db'
-        engine = create_engine(db_uri)
-        metadata = MetaData()
-
-        # movies 테이블에 연결
-        movies = Table('movies', metadata,
-                       Column('movieId', Integer, primary_key=True),
-                       Column('title', String),
-                       Column('genres', String),
-                       Column('rating_avg', Float)  # rating_avg 열 추가
-                      )
-        
-        # 데이터베이스와 연결하고 movies 테이블에서 데이터 가져오기
-        with engine.connect() as conn:
-            query = conn.execute(movies.select())
-            movies_list = query.fetchall()
-
-        # 영화 리스트를 표시할 QTableWidget 생성
-        self.movie_table_widget = QTableWidget()
-        self.movie_table_widget.setColumnCount(3)  # 열의 개수 설정
-        self.movie_table_widget.setHorizontalHeaderLabels(['Title', 'Genres', 'Avg Rating'])  # 열 제목 설정
-        self.movie_table_widget.setColumnWidth(0, 400) # 1열 너비 지정
-        self.movie_table_widget.setColumnWidth(1, 400) # 2열 너비 지정
-        self.movie_table_widget.setColumnWidth(2, 200) # 3열 너비 지정
-
-        # 영화 리스트를 표에 추가
-        for row, movie in enumerate(movies_list):
-            title = movie[1]
-            genres = movie[2]
-            rating_avg = str(round(movie[3], 2)) if movie[3] is not None else ''  # 소수점 둘째 자리에서 반올림, 평점 평균이 없으면 빈 문자열
-
-            self.movie_table_widget.insertRow(row)
-
-            # 제목 셀 설정 (읽기 전용으로 설정)
-            title_item = QTableWidgetItem(title)
-            title_item.setFlags(title_item.flags() & ~Qt.ItemIsEditable)  # 편집 불가능하도록 설정
-            self.movie_table_widget.setItem(row, 0, title_item)
-
-            # 장르 셀 설정 (읽기 전용으로 설정)
-            genres_item = QTableWidgetItem(genres)
-            genres_item.setFlags(genres_item.flags() & ~Qt.ItemIsEditable)  # 편집 불가능하도록 설정
-            self.movie_table_widget.setItem(row, 1, genres_item)
-
-            # 평균 평점 셀 설정 (읽기 전용으로 설정)
-            rating_avg_item = QTableWidgetItem(rating_avg)
-            rating_avg_item.setFlags(rating_avg_item.flags() & ~Qt.ItemIsEditable)  # 편집 불가능하도록 설정
-            self.movie_table_widget.setItem(row, 2, rating_avg_item)
+        # 영화 리스트를 표시할 QTableView 생성 (모델은 영화 목록을 다 불러온 뒤 set_core에서 연결)
+        self.movie_table_widget = QTableView()
 
         # 영화 테이블의 아이템 클릭 시 상세 정보 표시
-        self.movie_table_widget.itemClicked.connect(self.show_movie_detail)
+        self.movie_table_widget.clicked.connect(self.show_movie_detail)
         
         # 검색 상자 추가
         self.search_box = QLineEdit()
         self.search_box.setPlaceholderText("제목을 입력하세요.")
-        self.search_box.textChanged.connect(self.filter_table)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.filter_table)
+        self.search_box.textChanged.connect(self.search_timer.start)
 
         # "전체" 체크박스 추가
         self.all_checkbox = QCheckBox("전체")
@@ -160,11 +336,7 @@ class MyApp(QWidget):
         # 장르 선택 체크박스 추가
         self.genre_checkboxes = []
         self.genre_layout = QHBoxLayout()
-        for genre in [
-            'Action', 'Adventure', 'Animation', "Children", 'Comedy', 'Crime',
-            'Documentary', 'Drama', 'Fantasy', 'Film-Noir', 'Horror', 'Musical',
-            'Mystery', 'Romance', 'Sci-Fi', 'Thriller', 'War', 'Western'
-        ]:
+        for genre in GENRES:
             checkbox = QCheckBox(genre)
             checkbox.stateChanged.connect(self.filter_table)
             checkbox.stateChanged.connect(self.check_genre_checkbox)
@@ -227,94 +399,61 @@ class MyApp(QWidget):
             self.all_checkbox.setChecked(False)
         self.filter_table()
 
+    @metrics.timed('app.filter_table')
     def filter_table(self):
-        search_text = self.search_box.text().lower()
-        selected_genres_all = self.all_checkbox.isChecked()
-        selected_genres = [checkbox.text().lower() for checkbox in self.genre_checkboxes if checkbox.isChecked()]
-        ratingsearch_enabled = self.rating_checkbox.isChecked()
-        min_rating = float(self.min_rating_box.text()) if self.min_rating_box.text() else 0.0
-        max_rating = float(self.max_rating_box.text()) if self.max_rating_box.text() else float('inf')
-        for row in range(self.movie_table_widget.rowCount()):
-            title = self.movie_table_widget.item(row, 0).text().lower()
-            genres = self.movie_table_widget.item(row, 1).text().lower()
-            rating_avg = float(self.movie_table_widget.item(row, 2).text()) if self.movie_table_widget.item(row, 2) else 0.0
-            if (
-                search_text in title and 
-                (self.all_checkbox.isChecked() or all(genre in genres.split('|') for genre in selected_genres)) and
-                (not self.rating_checkbox.isChecked() or min_rating <= rating_avg <= max_rating)
-            ):
-                self.movie_table_widget.setRowHidden(row, False)
-            else:
-                self.movie_table_widget.setRowHidden(row, True) 
-
-    # 영화정보 불러오기
-    def get_movie_info_from_database(self, movie_title):
-        db_uri = 'sqlite:///data.db'
-        engine = create_engine(db_uri)
-        metadata = MetaData()
-        movies = Table('movies', metadata, autoload_with=engine)
-        with engine.connect() as conn:
-            query = movies.select().where(movies.c.title == movie_title)
-            movie = conn.execute(query).fetchone()
-        if movie:
-            return movie[1], movie[2], movie[0]  # title, genres, movieId
-        return None, None, None
-
-    # 태그 정보 불러오는 메소드
-    def get_movie_tags_from_database(self, movie_id):
-        db_uri = 'sqlite:///data.db'
-        engine = create_engine(db_uri)
-        metadata = MetaData()
-        tags = Table('tags', metadata,
-                     Column('userId', Integer),
-                     Column('movieId', Integer),
-                     Column('tag', String),
-                     Column('timestamp', Integer)
-                    )
-        with engine.connect() as conn:
-            query = tags.select().where(tags.c.movieId == movie_id)
-            tags_list = conn.execute(query).fetchall()
-        return [tag[2] for tag in tags_list]
-    
-    def show_movie_detail(self, item):
-        row = item.row()
-        movie_title = self.movie_table_widget.item(row, 0).text()
-        db_uri = 'sqlite:///data.db'
-        engine = create_engine(db_uri)
-        metadata = MetaData()
-        movies = Table('movies', metadata, autoload_with=engine)
-        links = Table('links', metadata, autoload_with=engine)
-        with engine.connect() as conn:
-            query = movies.select().where(movies.c.title == movie_title)
-            movie = conn.execute(query).fetchone()
-            if movie:
-                movie_id = movie[0]
-                tmdb_id_query = links.select().where(links.c.movieId == movie_id)
-                tmdb_id_result = conn.execute(tmdb_id_query).fetchone()
-                if tmdb_id_result:
-                    tmdb_id = tmdb_id_result[2]
-                    movie_genres = movie[2]
-                    movie_tags = self.get_movie_tags_from_database(movie_id)
-                    tags_text = ', '.join(movie_tags) if movie_tags else 'No tags available'
-                    
-                    # TMDb API를 사용하여 영화 포스터를 가져옵니다.
-                    poster_url = fetch_movie_poster_from_tmdb(tmdb_id)
-                    
-                    # 상세정보를 제공해주는 링크 추가
-                    tmdb_link = f"https://www.themoviedb.org/movie/{tmdb_id}"
-
-                    # 영화 상세 정보 다이얼로그 표시
-                    dialog = MovieDetailDialog(movie_title, movie_genres, tags_text, poster_url, tmdb_link, parent=self)
-                    dialog.exec_()
-                else:
-                    QMessageBox.information(self, "Movie Info", f"No TMDB ID found for {movie_title}")
-            else:
-                QMessageBox.information(self, "Movie Info", f"No details found for {movie_title}")
+        # 각 조건을 불리언 마스크로 만들어 결합한 뒤 프록시 모델에 한 번에 반영
+        search_text = self.search_box.text()
+        selected_genres = [] if self.all_checkbox.isChecked() else \
+            [checkbox.text() for checkbox in self.genre_checkboxes if checkbox.isChecked()]
+        rating_range = None
+        if self.rating_checkbox.isChecked():
+            rating_range = (self.min_rating_box.value(), self.max_rating_box.value())
+        mask = self.movie_filter.mask(search_text, selected_genres, rating_range)
+        self.movie_proxy_model.set_mask(mask)
+
+    def show_movie_detail(self, index):
+        row = self.movie_proxy_model.mapToSource(index).row()
+        movie_title = self.movie_model.title(row)
+        # 상세 정보 창을 먼저 띄우고 조회는 작업 스레드에서 (다른 영화를 누르면 이전 조회 결과는 버림)
+        if self.detail_dialog is None:
+            self.detail_dialog = MovieDetailDialog(parent=self)
+        self.detail_dialog.show_loading(movie_title)
+        self.detail_dialog.show()
+        self.detail_dialog.raise_()
+        self.tasks.submit('detail', self.load_movie_detail, self.movie_model.movie_id(row),
+                          on_done=lambda movie: self.set_movie_detail(movie_title, movie),
+                          on_error=lambda error: self.detail_dialog.show_message(
+                              movie_title, f"상세 정보를 불러오지 못했습니다: {error}"))
+
+    def load_movie_detail(self, movie_id):
+        # 작업 스레드: 영화 정보, tmdbId, 태그를 공유 커넥션 풀에서 한 번에 조회
+        with metrics.timer('app.movie_detail_query'):
+            movie = self.core.detail(movie_id)
+        get_poster_fetcher()  # 포스터 조회기(requests) 준비도 GUI 스레드 밖에서
+        return movie
+
+    def set_movie_detail(self, movie_title, movie):
+        if not movie:
+            self.detail_dialog.show_message(movie_title, f"No details found for {movie_title}")
+            return
+        tmdb_id = movie['tmdbId']
+        if tmdb_id is None:
+            self.detail_dialog.show_message(movie_title, f"No TMDB ID found for {movie_title}")
+            return
+        movie_tags = movie['tags']
+        tags_text = ', '.join(movie_tags) if movie_tags else 'No tags available'
+
+        # TMDb API를 사용하여 영화 포스터를 백그라운드에서 가져옵니다.
+        poster_future = get_poster_fetcher().submit_poster(tmdb_id)
+
+        # 상세정보를 제공해주는 링크 추가
+        tmdb_link = f"https://www.themoviedb.org/movie/{tmdb_id}"
+        self.detail_dialog.show_movie(movie_title, movie['genres'], tags_text, poster_future, tmdb_link)
     
     # 영화 추천 탭 초기화 메서드
     def initRecommendationTab(self):
         # 영화 추천 탭 초기화 메서드
-        # 선택된 영화를 저장할 리스트
+        # 선택된 영화의 movieId 리스트 (제목은 표시할 때 catalog에서 조회)
         self.selected_movies = []
 
         # 선택된 장르를 저장할 리스트
@@ -323,11 +462,7 @@ class MyApp(QWidget):
         # 장르 선택 체크박스 추가
         self.genre_checkboxes_rec = []
         self.genre_layout_rec = QHBoxLayout()
-        for genre in [
-            'Action', 'Adventure', 'Animation', "Children", 'Comedy', 'Crime',
-            'Documentary', 'Drama', 'Fantasy', 'Film-Noir', 'Horror', 'Musical',
-            'Mystery', 'Romance', 'Sci-Fi', 'Thriller', 'War', 'Western'
-        ]:
+        for genre in GENRES:
             checkbox = QCheckBox(genre)
             checkbox.stateChanged.connect(self.update_selected_genres)
             self.genre_checkboxes_rec.append(checkbox)
@@ -344,16 +479,54 @@ class MyApp(QWidget):
         select_movie_button = QPushButton('영화 선택')
         select_movie_button.clicked.connect(self.select_movie_from_list)
 
-        # 영화 추천 버튼 추가
+        # 영화 추천 버튼과 추천 개수 입력 상자 추가
         recommend_button = QPushButton('영화 추천')
         recommend_button.clicked.connect(self.recommend_movie)
+        self.recommend_count_box = QSpinBox()
+        self.recommend_count_box.setRange(1, 50)
+        self.recommend_count_box.setValue(DEFAULT_K)
+        self.recommend_engine_box = QComboBox()
+        self.recommend_engine_box.addItem('장르 유사도', 'content')
+        self.recommend_engine_box.addItem('협업 필터링', 'item_cf')
+        self.recommend_engine_box.addItem('잠재 요인 (ALS)', 'als')
+        self.recommend_engine_box.addItem('콘텐츠 임베딩 (근사 검색)', 'embedding')
+        self.recommend_engine_box.addItem('하이브리드 (평점/인기도/다양성 반영)', 'hybrid')
+        recommend_hbox = QHBoxLayout()
+        recommend_hbox.addWidget(self.recommend_engine_box)
+        recommend_hbox.addWidget(QLabel('추천 개수'))
+        recommend_hbox.addWidget(self.recommend_count_box)
+        recommend_hbox.addWidget(recommend_button, 1)
+
+        # 사용자 맞춤 추천 (해당 사용자의 평점 이력을 선택 영화로 사용)
+        self.user_id_box = QSpinBox()
+        self.user_id_box.setRange(1, 2**31 - 1)
+        user_recommend_button = QPushButton('사용자 맞춤 추천')
+        user_recommend_button.clicked.connect(self.recommend_for_user)
+        user_hbox = QHBoxLayout()
+        user_hbox.addWidget(QLabel('사용자 ID'))
+        user_hbox.addWidget(self.user_id_box)
+        user_hbox.addWidget(user_recommend_button, 1)
+
+        # 추천 진행 상황/결과 요약 (계산 중에도 창을 계속 쓸 수 있음)
+        self.recommend_status = QLabel()
+
+        # 추천 결과를 순위대로 표시할 QTableWidget 추가
+        self.recommendation_table = QTableWidget()
+        self.recommendation_table.setColumnCount(3)
+        self.recommendation_table.setHorizontalHeaderLabels(['Rank', 'Title', 'Score'])
+        self.recommendation_table.setColumnWidth(0, 60)
+        self.recommendation_table.setColumnWidth(1, 600)
+        self.recommendation_table.setColumnWidth(2, 100)
 
         # 수직 레이아웃 생성
         vbox = QVBoxLayout()
         vbox.addLayout(self.genre_layout_rec)
         vbox.addWidget(select_movie_button)
         vbox.addWidget(self.selected_movies_table)
-        vbox.addWidget(recommend_button)
+        vbox.addLayout(recommend_hbox)
+        vbox.addLayout(user_hbox)
+        vbox.addWidget(self.recommend_status)
+        vbox.addWidget(self.recommendation_table)
         
         self.recommendation_tab.setLayout(vbox)
     
@@ -373,107 +546,139 @@ class MyApp(QWidget):
         search_box.setPlaceholderText('검색어를 입력하세요...')
         layout.addWidget(search_box)
 
-        list_widget = QListWidget()
-        for row in range(self.movie_table_widget.rowCount()):
-            title = self.movie_table_widget.item(row, 0).text()
-            list_widget.addItem(title)
+        # 전체 영화 모델의 제목 열을 그대로 보여 주는 목록 (검색 결과만 프록시로 노출)
+        list_model = MovieFilterProxyModel(self.movie_model, dialog)
+        list_view = QListView()
+        list_view.setModel(list_model)
+        list_view.setModelColumn(0)
+        list_view.setUniformItemSizes(True)
         
-        layout.addWidget(list_widget)
+        layout.addWidget(list_view)
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, Qt.Horizontal, dialog)
-        buttons.accepted.connect(lambda: self.add_selected_movie(list_widget, dialog))
+        buttons.accepted.connect(lambda: self.add_selected_movie(list_view, dialog))
         buttons.rejected.connect(dialog.reject)
         
         layout.addWidget(buttons)
         dialog.setLayout(layout)
 
-        # 검색어 변경 시 호출될 함수 정의
+        # 검색어 변경 시 호출될 함수 정의 (3-gram 색인 검색, 검색어가 길어지면 이전 결과 안에서만 확인)
+        title_search = TitleSearch(self.movie_filter.title_index)
         def filter_movies():
-            search_text = search_box.text().lower()
-            for row in range(list_widget.count()):
-                item = list_widget.item(row)
-                item.setHidden(search_text not in item.text().lower())
+            search_text = search_box.text()
+            if search_text.strip():
+                list_model.set_mask(title_search.mask(search_text))
+            else:
+                list_model.set_mask(self.movie_filter.title_mask(''))
         
-        # 검색어 변경 시 filter_movies 함수 호출
-        search_box.textChanged.connect(filter_movies)
+        # 검색어 변경 후 입력이 멈추면 filter_movies 함수 호출
+        search_timer = QTimer(dialog)
+        search_timer.setSingleShot(True)
+        search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        search_timer.timeout.connect(filter_movies)
+        search_box.textChanged.connect(search_timer.start)
 
         dialog.exec_()
     
-    def add_selected_movie(self, list_widget, dialog):
-        selected_movie = list_widget.currentItem().text()
-        if selected_movie and selected_movie not in self.selected_movies:
-            self.selected_movies.append(selected_movie)
-            self.update_selected_movies_display()
+    def add_selected_movie(self, list_view, dialog):
+        # 목록에서 고른 행 -> movieId (제목 문자열을 다시 찾지 않음)
+        index = list_view.currentIndex()
+        if index.isValid():
+            movie_id = self.movie_model.movie_id(list_view.model().mapToSource(index).row())
+            if movie_id not in self.selected_movies:
+                self.selected_movies.append(movie_id)
+                self.update_selected_movies_display()
         dialog.accept()
 
     # 선택된 영화 표시 업데이트 메서드
     def update_selected_movies_display(self):
         self.selected_movies_table.setRowCount(0)
-        for i, movie in enumerate(self.selected_movies):
+        for i, movie_id in enumerate(self.selected_movies):
             self.selected_movies_table.insertRow(i)
-            self.selected_movies_table.setItem(i, 0, QTableWidgetItem(movie))
+            self.selected_movies_table.setItem(i, 0, QTableWidgetItem(self.catalog.title(movie_id, str(movie_id))))
             remove_button = QPushButton('Remove')
-            remove_button.clicked.connect(lambda _, m=movie: self.remove_selected_movie(m))
+            remove_button.clicked.connect(lambda _, m=movie_id: self.remove_selected_movie(m))
             self.selected_movies_table.setCellWidget(i, 1, remove_button)
 
     # 선택된 영화 제거 메서드
-    def remove_selected_movie(self, movie):
-        if movie in self.selected_movies:
-            self.selected_movies.remove(movie)
+    def remove_selected_movie(self, movie_id):
+        if movie_id in self.selected_movies:
+            self.selected_movies.remove(movie_id)
             self.update_selected_movies_display()
     
-    # 영화 추천 메서드
+    # 영화 추천 메서드 (계산은 작업 스레드에서, 새로 누르면 이전 요청의 결과는 버림)
     def recommend_movie(self):
         if self.selected_movies:
-            # 선택된 영화의 장르를 벡터화
-            selected_movies_genres = []
-            for movie in self.selected_movies:
-                for row in range(self.movie_table_widget.rowCount()):
-                    title = self.movie_table_widget.item(row, 0).text().lower()
-                    genres = self.movie_table_widget.item(row, 1).text().lower()
-                    if movie.lower() == title:
-                        selected_movies_genres.append(genres)
-                        break
-            
-            # 선택된 장르 필터링
-            if self.selected_genres:
-                selected_genres_set = set(genre.lower() for genre in self.selected_genres)
-                filtered_movies_genres = []
-                filtered_movie_titles = []
-                for row in range(self.movie_table_widget.rowCount()):
-                    title = self.movie_table_widget.item(row, 0).text()
-                    genres = self.movie_table_widget.item(row, 1).text().lower()
-                    if selected_genres_set.intersection(set(genres.split('|'))):
-                        filtered_movies_genres.append(genres)
-                        filtered_movie_titles.append(title)
-            else:
-                filtered_movies_genres = []
-                filtered_movie_titles = []
-
-            # CountVectorizer를 사용하여 장르 벡터화
-            vectorizer = CountVectorizer(tokenizer=lambda x: x.split('|'), token_pattern=None)
-            genre_matrix = vectorizer.fit_transform(filtered_movies_genres)
-            
-            # 선택된 영화의 장르 벡터 생성
-            selected_movies_matrix = vectorizer.transform(selected_movies_genres)
-            
-            # 코사인 유사도 계산
-            cosine_sim = cosine_similarity(selected_movies_matrix, genre_matrix)
-            
-            # 선택된 영화와 가장 유사한 영화 찾기
-            avg_cosine_sim = cosine_sim.mean(axis=0)
-            most_similar_idx = avg_cosine_sim.argmax()
-            
-            most_similar_movie = filtered_movie_titles[most_similar_idx] if filtered_movie_titles else "없음"
-            
-            QMessageBox.information(self, "영화 추천", f"추천된 영화: {most_similar_movie}")
+            selected_ids = list(self.selected_movies)
+
+            # 장르 필터와 선택한 영화 제외를 적용한 상위 k개 추천
+            k = self.recommend_count_box.value()
+            engine = self.recommend_engine_box.currentData()
+            self.recommend_status.setText("추천 계산 중...")
+            self.tasks.submit('recommend', self._recommend, selected_ids, k, list(self.selected_genres), engine,
+                              on_done=self.show_recommendations, on_error=self.show_recommend_error)
         else:
             QMessageBox.information(self, "영화 추천", "선택된 영화가 없습니다.")
+
+    def _recommend(self, selected_ids, k, genres, engine):
+        with metrics.timer('app.recommend'):
+            return self.core.recommend(selected_ids, k=k, genres=genres, engine=engine)
     
+    # 사용자 맞춤 추천 메서드
+    def recommend_for_user(self):
+        user_id = self.user_id_box.value()
+        k = self.recommend_count_box.value()
+        engine = self.recommend_engine_box.currentData()
+        self.recommend_status.setText(f"사용자 {user_id} 맞춤 추천 계산 중...")
+        self.tasks.submit('recommend', self._recommend_for_user, user_id, k, list(self.selected_genres), engine,
+                          on_done=lambda results: self.show_user_recommendations(user_id, results),
+                          on_error=self.show_recommend_error)
+
+    def _recommend_for_user(self, user_id, k, genres, engine):
+        # 평점 이력이 없는 사용자면 None (사용자 인덱스를 처음 불러오는 것도 작업 스레드에서)
+        if user_id not in self.core.user_index:
+            return None
+        with metrics.timer('app.recommend_for_user'):
+            return self.core.recommend_for_user(user_id, k=k, genres=genres, engine=engine)
+
+    def show_user_recommendations(self, user_id, results):
+        if results is None:
+            self.recommend_status.setText(f"평점 이력이 없는 사용자입니다: {user_id}")
+            return
+        self.show_recommendations(results)
+
+    def show_recommendations(self, results):
+        self.update_recommendation_display(results)
+        self.recommend_status.setText(f"추천된 영화: {len(results)}편" if results else "추천된 영화: 없음")
+
+    def show_recommend_error(self, error):
+        self.recommend_status.setText(f"추천하지 못했습니다: {error}")
+
+    # 추천 결과 표시 업데이트 메서드
+    @metrics.timed('app.recommendation_table')
+    def update_recommendation_display(self, results):
+        self.recommendation_table.setRowCount(0)
+        for i, (movie_id, score) in enumerate(results):
+            self.recommendation_table.insertRow(i)
+            self.recommendation_table.setItem(i, 0, QTableWidgetItem(str(i + 1)))
+            self.recommendation_table.setItem(i, 1, QTableWidgetItem(self.catalog.title(movie_id, str(movie_id))))
+            self.recommendation_table.setItem(i, 2, QTableWidgetItem(f"{score:.3f}"))
+
     # 영화 추천 페이지로 이동하는 메서드
     def go_to_recommendation(self):
         self.tab_widget.setCurrentIndex(1)  # 영화 추천 탭의 인덱스는 1이므로 해당 탭으로 이동
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    ex = MyApp()
-    sys.exit(app.exec_())
+    # 시작 시간 측정 기준 (QApplication 생성부터)
+    started = time.perf_counter()
+    # --profile DIR (또는 환경 변수 MOVIE_RC_PROFILE=DIR): 종료할 때까지 cProfile/tracemalloc으로 측정해 보고서 저장
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--profile', default=os.environ.get('MOVIE_RC_PROFILE'), metavar='DIR')
+    args, qt_args = parser.parse_known_args()
+    with profile_session(args.profile) if args.profile else contextlib.nullcontext():
+        app = QApplication(sys.argv[:1] + qt_args)
+        ex = MyApp(started)
+        exit_code = app.exec_()
+    ex.tasks.shutdown()
+    if _poster_fetcher is not None:
+        _poster_fetcher.shutdown()
+    sys.exit(exit_code)
@@ -0,0 +1,241 @@
+import os
+import json
+import tempfile
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from scipy import sparse
+from db import DB_PATH, get_engine
+from item_cf import load_rating_matrix
+from recommend import top_k_batch, DEFAULT_K
+from feature_index import seed_selector
+
+# 모델 디렉터리 이름
+MODEL_DIR = 'als_model'
+
+# 잠재 요인 수, 정규화 계수, 반복 횟수, 작업 단위(사용자/영화 수)
+DEFAULT_FACTORS = 32
+DEFAULT_REGULARIZATION = 0.1
+DEFAULT_ITERATIONS = 10
+SOLVE_CHUNK_SIZE = 2048
+
+
+def model_dir_for(db_path=DB_PATH):
+    # 모델 파일은 data.db 옆 디렉터리에 저장
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), MODEL_DIR)
+
+
+def _solve_chunk(indptr, indices, data, fixed, regularization):
+    # 한 묶음의 행(사용자 또는 영화)에 대해 정규방정식 (F^T F + λ n I) x = F^T r 을 한 번에 풂
+    n_rows = len(indptr) - 1
+    n_factors = fixed.shape[1]
+    lhs = np.empty((n_rows, n_factors, n_factors), dtype=np.float64)
+    rhs = np.empty((n_rows, n_factors), dtype=np.float64)
+    eye = np.eye(n_factors)
+    for i in range(n_rows):
+        cols = indices[indptr[i]:indptr[i + 1]]
+        factors = fixed[cols]
+        lhs[i] = factors.T @ factors + regularization * max(len(cols), 1) * eye
+        rhs[i] = factors.T @ data[indptr[i]:indptr[i + 1]]
+    return np.linalg.solve(lhs, rhs[:, :, None])[:, :, 0].astype(np.float32)
+
+
+# 작업 프로세스가 반 반복마다 한 번만 여는 고정 요인 (.npy 경로, 메모리 매핑 배열)
+_mapped_fixed = (None, None)
+
+
+def _solve_mapped(indptr, indices, data, fixed_path, regularization):
+    # 작업 프로세스용 _solve_chunk: 고정 요인은 피클 대신 경로로 받아 메모리 매핑 (같은 경로면 다시 열지 않음)
+    global _mapped_fixed
+    if _mapped_fixed[0] != fixed_path:
+        _mapped_fixed = (fixed_path, np.load(fixed_path, mmap_mode='r'))
+    return _solve_chunk(indptr, indices, data, _mapped_fixed[1], regularization)
+
+
+def _chunks(matrix, chunk_size):
+    # CSR 행렬을 행 묶음으로 잘라 작업 단위로 만듦
+    for start in range(0, matrix.shape[0], chunk_size):
+        end = min(start + chunk_size, matrix.shape[0])
+        lo, hi = matrix.indptr[start], matrix.indptr[end]
+        yield matrix.indptr[start:end + 1] - lo, matrix.indices[lo:hi], matrix.data[lo:hi]
+
+
+def _solve_all(matrix, fixed, regularization, pool, shared_dir=None, name='fixed'):
+    # pool이 있으면 고정 요인을 shared_dir/<name>.npy에 한 번 써 두고 작업마다 경로만 넘김 (작업마다 요인 행렬을 피클하지 않음)
+    chunks = list(_chunks(matrix, SOLVE_CHUNK_SIZE))
+    if pool is None:
+        parts = [_solve_chunk(*chunk, fixed, regularization) for chunk in chunks]
+    else:
+        fixed_path = os.path.join(shared_dir, f'{name}.npy')
+        np.save(fixed_path, fixed)
+        futures = [pool.submit(_solve_mapped, *chunk, fixed_path, regularization) for chunk in chunks]
+        parts = [future.result() for future in futures]
+        # 작업 프로세스의 매핑은 파일을 지워도 유지되고, 다음 반 반복은 새 경로를 씀
+        os.remove(fixed_path)
+    if not parts:
+        return np.zeros((0, fixed.shape[1]), dtype=np.float32)
+    return np.vstack(parts)
+
+
+def train_als(matrix, n_factors=DEFAULT_FACTORS, regularization=DEFAULT_REGULARIZATION,
+              iterations=DEFAULT_ITERATIONS, workers=None, seed=0):
+    # 전체 평균을 뺀 평점에 대해 사용자/영화 요인을 번갈아 최소제곱으로 갱신
+    matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+    global_mean = float(matrix.data.mean()) if matrix.nnz else 0.0
+    centered = matrix.copy()
+    centered.data -= global_mean
+    item_major = centered.T.tocsr()
+
+    rng = np.random.default_rng(seed)
+    user_factors = np.zeros((matrix.shape[0], n_factors), dtype=np.float32)
+    item_factors = (rng.standard_normal((matrix.shape[1], n_factors)) * 0.01).astype(np.float32)
+
+    workers = os.cpu_count() if workers is None else workers
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    # 작업 프로세스와 공유하는 고정 요인 .npy 파일을 둘 임시 디렉터리
+    shared = tempfile.TemporaryDirectory(prefix='als_') if pool is not None else None
+    shared_dir = shared.name if shared is not None else None
+    try:
+        for iteration in range(iterations):
+            user_factors = _solve_all(centered, item_factors, regularization, pool, shared_dir, f'items_{iteration}')
+            item_factors = _solve_all(item_major, user_factors, regularization, pool, shared_dir, f'users_{iteration}')
+    finally:
+        if pool is not None:
+            pool.shutdown()
+            shared.cleanup()
+    return user_factors, item_factors, global_mean
+
+
+class ALSModel:
+    # 사용자/영화 잠재 요인 행렬 (저장된 모델은 메모리 매핑으로 즉시 불러옴)
+    def __init__(self, user_ids, movie_ids, user_factors, item_factors, global_mean=0.0,
+                 regularization=DEFAULT_REGULARIZATION):
+        self.user_ids = np.asarray(user_ids, dtype=np.int64)
+        self.movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+        self.global_mean = float(global_mean)
+        self.regularization = float(regularization)
+        self.row_of = {int(movie_id): row for row, movie_id in enumerate(self.movie_ids)}
+        self.user_row_of = {int(user_id): row for row, user_id in enumerate(self.user_ids)}
+
+    def __len__(self):
+        return len(self.movie_ids)
+
+    def rows_for(self, movie_ids):
+        return np.array([self.row_of[int(m)] for m in movie_ids if int(m) in self.row_of], dtype=np.int64)
+
+    def seed_profiles(self, seed_sets, weight_sets=None):
+        # 선택된 영화 묶음마다 영화 요인의 (가중) 평균을 사용자 요인처럼 사용
+        selector = seed_selector(seed_sets, self.row_of, len(self), weight_sets)
+        return np.asarray(selector @ np.asarray(self.item_factors), dtype=np.float32)
+
+    def similarity(self, movie_ids):
+        # 단일 묶음 점수 (recommend.recommend의 scorer로 사용)
+        return self.item_factors @ self.seed_profiles([movie_ids])[0]
+
+    def similarity_batch(self, seed_sets, weight_sets=None):
+        # 여러 선택 영화 묶음의 점수를 행렬 곱 한 번으로 계산 -> (묶음 수 x 영화 수)
+        return self.seed_profiles(seed_sets, weight_sets) @ np.asarray(self.item_factors).T
+
+    def _top_k(self, profiles, k, exclude):
+        scores = profiles @ np.asarray(self.item_factors).T
+        for i, movie_ids in enumerate(exclude):
+            scores[i, self.rows_for(movie_ids)] = -np.inf
+        rows = top_k_batch(scores, k)
+        return self.movie_ids[rows], np.take_along_axis(scores, rows, axis=1)
+
+    def recommend_users(self, user_ids, k=DEFAULT_K, exclude=None):
+        # 여러 사용자에 대해 한 번의 행렬 곱으로 상위 k개 (movieId 배열, 점수 배열) 반환
+        rows = np.array([self.user_row_of.get(int(u), -1) for u in user_ids])
+        profiles = np.zeros((len(rows), self.user_factors.shape[1]), dtype=np.float32)
+        profiles[rows >= 0] = self.user_factors[rows[rows >= 0]]
+        return self._top_k(profiles, k, exclude if exclude is not None else [()] * len(rows))
+
+    def recommend_seed_sets(self, seed_sets, k=DEFAULT_K, exclude_seeds=True):
+        # 여러 선택 영화 묶음을 한 번에 점수화해 묶음마다 상위 k개 반환
+        exclude = seed_sets if exclude_seeds else [()] * len(seed_sets)
+        return self._top_k(self.seed_profiles(seed_sets), k, exclude)
+
+    def fold_in_users(self, user_ids, histories):
+        # 영화 요인은 고정하고 새 평점이 들어온 사용자 요인만 다시 풂 (신규 사용자는 추가)
+        # histories: 사용자마다 (movieId 배열, 평점 배열)
+        indptr, indices, data = [0], [], []
+        for movie_ids, values in histories:
+            known = np.array([int(m) in self.row_of for m in movie_ids], dtype=bool)
+            indices.append(self.rows_for(movie_ids))
+            data.append(np.asarray(values, dtype=np.float32)[known] - self.global_mean)
+            indptr.append(indptr[-1] + int(known.sum()))
+        solved = _solve_chunk(np.array(indptr), np.concatenate(indices) if indices else np.empty(0, dtype=np.int64),
+                              np.concatenate(data) if data else np.empty(0, dtype=np.float32),
+                              np.asarray(self.item_factors), self.regularization)
+        user_factors = np.array(self.user_factors)
+        new_users = [int(u) for u in user_ids if int(u) not in self.user_row_of]
+        if new_users:
+            self.user_ids = np.concatenate([self.user_ids, np.array(new_users, dtype=np.int64)])
+            user_factors = np.vstack([user_factors, np.zeros((len(new_users), user_factors.shape[1]), np.float32)])
+            self.user_row_of = {int(user_id): row for row, user_id in enumerate(self.user_ids)}
+        user_factors[[self.user_row_of[int(u)] for u in user_ids]] = solved
+        self.user_factors = user_factors
+        return self
+
+    def save(self, directory):
+        # 파일마다 임시 파일에 쓴 뒤 교체 (메모리 매핑으로 읽는 중인 프로세스는 이전 파일을 계속 사용)
+        os.makedirs(directory, exist_ok=True)
+        arrays = {'user_ids': self.user_ids, 'movie_ids': self.movie_ids,
+                  'user_factors': np.asarray(self.user_factors), 'item_factors': np.asarray(self.item_factors)}
+        for name, array in arrays.items():
+            tmp_path = os.path.join(directory, f'{name}.npy.tmp')
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, os.path.join(directory, f'{name}.npy'))
+        meta = {'global_mean': self.global_mean, 'factors': int(self.item_factors.shape[1]),
+                'regularization': self.regularization}
+        with open(os.path.join(directory, 'meta.json.tmp'), 'w') as f:
+            json.dump(meta, f)
+        os.replace(os.path.join(directory, 'meta.json.tmp'), os.path.join(directory, 'meta.json'))
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        return cls(np.load(os.path.join(directory, 'user_ids.npy')),
+                   np.load(os.path.join(directory, 'movie_ids.npy')),
+                   np.load(os.path.join(directory, 'user_factors.npy'), mmap_mode='r'),
+                   np.load(os.path.join(directory, 'item_factors.npy'), mmap_mode='r'),
+                   meta['global_mean'], meta.get('regularization', DEFAULT_REGULARIZATION))
+
+    def to_arrays(self):
+        return {'user_ids': self.user_ids, 'movie_ids': self.movie_ids,
+                'user_factors': np.asarray(self.user_factors), 'item_factors': np.asarray(self.item_factors),
+                'global_mean': np.array(self.global_mean), 'regularization': np.array(self.regularization)}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['user_ids'], arrays['movie_ids'], arrays['user_factors'], arrays['item_factors'],
+                   float(arrays['global_mean']), float(arrays['regularization']))
+
+
+def build_als(engine, n_factors=DEFAULT_FACTORS, regularization=DEFAULT_REGULARIZATION,
+              iterations=DEFAULT_ITERATIONS, workers=None):
+    # movies 테이블 순서대로 행 번호를 맞춰 특징 인덱스와 같은 행 공간을 사용
+    movie_ids = pd.read_sql('SELECT movieId FROM movies ORDER BY movieId', engine)['movieId'].astype(np.int64)
+    movie_ids = movie_ids.drop_duplicates().to_numpy()
+    matrix, user_ids = load_rating_matrix(engine, movie_ids)
+    user_factors, item_factors, global_mean = train_als(matrix, n_factors, regularization, iterations, workers)
+    return ALSModel(user_ids, movie_ids, user_factors, item_factors, global_mean, regularization)
+
+
+def load_or_build_als(db_path=DB_PATH):
+    # data.db보다 새로운 모델이 있으면 메모리 매핑으로 불러오고, 아니면 학습 후 저장
+    directory = model_dir_for(db_path)
+    meta_path = os.path.join(directory, 'meta.json')
+    if not (os.path.exists(meta_path) and os.path.getmtime(meta_path) >= os.path.getmtime(db_path)):
+        build_als(get_engine(db_path)).save(directory)
+    return ALSModel.load(directory)
+
+
+if __name__ == '__main__':
+    model = build_als(get_engine(DB_PATH))
+    model.save(model_dir_for(DB_PATH))
+    print(f"ALS 모델 저장 완료: 사용자 {len(model.user_ids)}명, 영화 {len(model)}편")
@@ -0,0 +1,151 @@
+import os
+import time
+import shutil
+import argparse
+import numpy as np
+from db import DB_PATH
+from core import RecommenderCore
+from hybrid import load_hybrid
+from feature_index import FeatureIndex
+from movie_filter import MovieFilter
+from catalog import Catalog
+from snapshot import Snapshot
+from title_search import TitleIndex, unpack_strings
+from item_cf import ItemCF, neighbors_path_for
+from als import ALSModel, model_dir_for
+from user_index import UserIndex
+from embeddings import EmbeddingIndex, embedding_path_for
+
+# 사용법: python artifacts.py [--db data.db] [--engines item_cf als embedding]
+# 서버 작업 프로세스들이 메모리 매핑으로 공유하는 읽기 전용 산출물 디렉터리
+#   artifacts/<버전>/<구성요소>.<배열>.npy, artifacts/CURRENT (현재 버전 이름)
+# 새 버전을 다 쓴 뒤 CURRENT를 원자적으로 교체하면 실행 중인 서버가 다음 요청부터 새 버전을 사용
+
+ARTIFACTS_DIR = 'artifacts'
+CURRENT_FILE = 'CURRENT'
+
+# 보관할 이전 버전 수 (교체 직후에도 이전 버전을 쓰는 요청이 있을 수 있음)
+KEEP_VERSIONS = 2
+
+_MODELS = {'item_cf': ItemCF, 'als': ALSModel, 'embedding': EmbeddingIndex}
+
+# 추천 방식별로 data.db 옆에 이미 만들어 둔 원본 산출물 (있으면 내보낼 때 포함)
+_SOURCES = {'item_cf': neighbors_path_for, 'als': lambda db_path: os.path.join(model_dir_for(db_path), 'meta.json'),
+            'embedding': embedding_path_for}
+
+
+def artifacts_dir_for(db_path=DB_PATH):
+    # 산출물 디렉터리는 data.db 옆에 둠
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), ARTIFACTS_DIR)
+
+
+def _save_arrays(directory, component, arrays):
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f'{component}.{name}.npy'), np.asarray(array))
+
+
+def _load_arrays(directory, component):
+    # 복사 없이 메모리 매핑 (여러 프로세스가 같은 페이지 캐시를 공유)
+    prefix = f'{component}.'
+    return {name[len(prefix):-len('.npy')]: np.load(os.path.join(directory, name), mmap_mode='r')
+            for name in os.listdir(directory) if name.startswith(prefix) and name.endswith('.npy')}
+
+
+def current_version(root):
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def available_engines(db_path=DB_PATH):
+    # 원본 산출물이 있는 추천 방식 (item_cf는 hybrid의 재료라 항상 포함, 없으면 내보낼 때 새로 만듦)
+    return ['item_cf'] + [engine for engine, path_for in _SOURCES.items()
+                          if engine != 'item_cf' and os.path.exists(path_for(db_path))]
+
+
+def exported_engines(root, version=None):
+    # 산출물 버전에 들어 있는 추천 방식 (item_cf가 있으면 hybrid도 사용 가능)
+    version = current_version(root) if version is None else version
+    directory = os.path.join(root, version)
+    engines = [engine for engine in _MODELS if os.path.exists(os.path.join(directory, f'{engine}.movie_ids.npy'))]
+    return engines + ['hybrid'] if 'item_cf' in engines else engines
+
+
+def export_artifacts(db_path=DB_PATH, root=None, engines=None):
+    # 현재 data.db 기준 모델을 새 버전 디렉터리에 배열 파일로 쓰고 CURRENT를 교체
+    # engines를 주지 않으면 원본 산출물이 있는 추천 방식을 모두 내보냄 (item_cf는 항상 포함)
+    root = artifacts_dir_for(db_path) if root is None else root
+    engines = available_engines(db_path) if engines is None else list(dict.fromkeys(['item_cf', *engines]))
+    core = RecommenderCore(db_path)
+    version = time.strftime('%Y%m%d-%H%M%S')
+    while os.path.exists(os.path.join(root, version)):
+        version += '_'
+    building = os.path.join(root, f'{version}.building')
+    os.makedirs(building)
+
+    _save_arrays(building, 'snapshot', core.snapshot.to_arrays())
+    _save_arrays(building, 'content', core.feature_index.to_arrays())
+    for engine in engines:
+        _save_arrays(building, engine, core.scorer(engine).to_arrays())
+    _save_arrays(building, 'users', core.user_index.to_arrays())
+    os.rename(building, os.path.join(root, version))
+
+    tmp_path = os.path.join(root, f'{CURRENT_FILE}.tmp')
+    with open(tmp_path, 'w') as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+    _prune(root, version)
+    return version
+
+
+def _prune(root, keep):
+    # 오래된 버전 삭제 (매핑 중인 파일은 삭제해도 매핑을 해제할 때까지 내용이 유지됨)
+    versions = sorted(name for name in os.listdir(root)
+                      if os.path.isdir(os.path.join(root, name)) and not name.endswith('.building'))
+    for name in versions[:-KEEP_VERSIONS]:
+        if name != keep:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def load_core(root, version=None, db_path=DB_PATH):
+    # 산출물 버전을 메모리 매핑으로 불러와 추천 핵심 객체 구성 (색인/행렬을 다시 계산하지 않음)
+    version = current_version(root) if version is None else version
+    if version is None:
+        raise FileNotFoundError(f"산출물이 없습니다: {root} (python artifacts.py로 생성)")
+    directory = os.path.join(root, version)
+    # 영화 목록/링크/태그 집계는 열 스냅숏 (이전 형식 산출물은 movies 배열만 있음)
+    snapshot = None
+    columns = _load_arrays(directory, 'snapshot')
+    if columns:
+        snapshot = Snapshot.from_arrays(columns)
+        catalog, title_index = snapshot.catalog(), snapshot.title_index()
+    else:
+        columns = _load_arrays(directory, 'movies')
+        catalog = Catalog(columns['movie_ids'], unpack_strings(columns['titles']), unpack_strings(columns['genres']),
+                          columns['ratings'], columns['genre_masks'])
+        title_index = TitleIndex.from_arrays(_load_arrays(directory, 'title_index'))
+    movie_filter = MovieFilter(catalog.titles, catalog.genres, catalog.ratings,
+                               title_index, catalog.genre_masks)
+    scorers = {engine: model.from_arrays(_load_arrays(directory, engine)) for engine, model in _MODELS.items()
+               if os.path.exists(os.path.join(directory, f'{engine}.movie_ids.npy'))}
+    # hybrid는 ItemCF 배열로 만들 수 있을 때만 (없는 추천 방식은 core.scorer가 ValueError로 알림)
+    loaders = {'hybrid': load_hybrid} if 'item_cf' in scorers else {}
+    users = _load_arrays(directory, 'users')
+    return RecommenderCore(db_path, catalog, movie_filter, FeatureIndex.from_arrays(_load_arrays(directory, 'content')),
+                           scorers, scorer_loaders=loaders, user_index=UserIndex.from_arrays(users) if users else None,
+                           version=version, snapshot=snapshot)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='서버 작업 프로세스가 공유할 산출물 버전을 만들고 현재 버전으로 지정합니다.')
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--root', default=None)
+    parser.add_argument('--engines', nargs='*', default=None, choices=list(_MODELS),
+                        help='내보낼 추천 방식 (기본: 원본 산출물이 있는 방식 모두, item_cf는 항상 포함)')
+    args = parser.parse_args()
+
+    version = export_artifacts(args.db, args.root, args.engines)
+    root = artifacts_dir_for(args.db) if args.root is None else args.root
+    print(f"산출물 버전 {version} 생성 완료: {', '.join(exported_engines(root, version))}")
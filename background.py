@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, pyqtSignal
+from metrics import metrics
+
+# 화면 작업(추천 계산, 상세 정보 조회)을 돌리는 작업 스레드 수
+DEFAULT_WORKERS = 2
+
+
+class TaskRunner(QObject):
+    # 오래 걸리는 작업을 스레드 풀에서 실행하고 결과를 GUI 스레드의 콜백으로 전달
+    # 채널(예: 'recommend', 'detail')마다 가장 최근 요청만 유효: 새 요청이 들어오면 이전 요청을 취소
+    # (아직 시작하지 않았으면 실행하지 않고, 이미 실행 중이면 끝난 결과를 버림)
+    finished = pyqtSignal(str, int, object)  # 채널, 요청 번호, Future
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, parent=None):
+        super().__init__(parent)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='app-task')
+        self.generations = {}
+        self.pending = {}
+        self.finished.connect(self._deliver)
+
+    def submit(self, channel, func, *args, on_done=None, on_error=None):
+        # func(*args)를 작업 스레드에서 실행, 끝나면 GUI 스레드에서 on_done(결과) 또는 on_error(예외) 호출
+        self.cancel(channel)
+        generation = self.generations[channel]
+        future = self.executor.submit(func, *args)
+        self.pending[channel] = (future, on_done, on_error)
+        future.add_done_callback(lambda f: self.finished.emit(channel, generation, f))
+        return future
+
+    def cancel(self, channel):
+        self.generations[channel] = self.generations.get(channel, 0) + 1
+        pending = self.pending.pop(channel, None)
+        if pending is not None:
+            pending[0].cancel()
+            metrics.incr(f'app.task.{channel}.superseded')
+
+    def busy(self, channel):
+        return channel in self.pending
+
+    def _deliver(self, channel, generation, future):
+        if generation != self.generations.get(channel) or future.cancelled():
+            return
+        _, on_done, on_error = self.pending.pop(channel)
+        error = future.exception()
+        if error is not None:
+            metrics.incr(f'app.task.{channel}.failed')
+            if on_error is not None:
+                on_error(error)
+        elif on_done is not None:
+            on_done(future.result())
+
+    def shutdown(self):
+        for channel in list(self.pending):
+            self.cancel(channel)
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,133 @@
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from db import dispose_engines
+from core import RecommenderCore, ENGINES
+from metrics import metrics
+from recommend import DEFAULT_K
+from result_cache import ResultCache
+from createdb.build import build_database
+
+# 사용법: python benchmark.py [--scales 1 2 4] [--engines content item_cf] [--queries 500] [--batch-size 64]
+#         python benchmark.py --db data.db  (기존 DB 하나만 측정)
+# 추천 방식별 질의당 지연 시간(p50/p99)과 초당 처리량을 카탈로그 크기별로 측정
+# 크기를 키운 카탈로그는 data/의 CSV를 배수만큼 복제해 만듦 (복제본마다 movieId/userId를 겹치지 않게 이동)
+
+DEFAULT_QUERIES = 500
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_SEEDS_PER_QUERY = 3
+RANDOM_SEED = 42
+
+CSV_CHUNK_SIZE = 500_000
+
+
+def scale_data(data_dir, out_dir, factor, chunk_size=CSV_CHUNK_SIZE):
+    # data_dir의 CSV를 factor배로 복제해 out_dir에 씀
+    # 복제본 i는 movieId에 i x (최대 movieId + 1), userId에 i x (최대 userId)를 더하고 제목 뒤에 [i]를 붙임
+    # (사용자별 평점 수와 영화별 평점 분포는 원본과 같고 카탈로그/사용자/평점 수만 factor배)
+    movies = pd.read_csv(os.path.join(data_dir, 'movies.csv'))
+    movie_offset = int(movies['movieId'].max()) + 1
+    user_offset = max(int(pd.read_csv(os.path.join(data_dir, name), usecols=['userId'])['userId'].max())
+                      for name in ('ratings.csv', 'tags.csv'))
+    os.makedirs(out_dir, exist_ok=True)
+    for name in ('movies.csv', 'links.csv', 'ratings.csv', 'tags.csv'):
+        out_path = os.path.join(out_dir, name)
+        header = True
+        for chunk in pd.read_csv(os.path.join(data_dir, name), chunksize=chunk_size, dtype={'imdbId': str}):
+            copies = []
+            for i in range(factor):
+                copy = chunk.assign(movieId=chunk['movieId'] + i * movie_offset)
+                if 'userId' in copy:
+                    copy['userId'] = copy['userId'] + i * user_offset
+                if 'title' in copy and i > 0:
+                    copy['title'] = copy['title'] + f' [{i}]'
+                copies.append(copy)
+            pd.concat(copies).to_csv(out_path, mode='w' if header else 'a', header=header, index=False)
+            header = False
+    return out_dir
+
+
+def random_seed_sets(movie_ids, n_queries, seeds_per_query=DEFAULT_SEEDS_PER_QUERY, seed=RANDOM_SEED):
+    rng = np.random.default_rng(seed)
+    return [rng.choice(movie_ids, seeds_per_query, replace=False).tolist() for _ in range(n_queries)]
+
+
+def benchmark_engine(core, engine, seed_sets, k=DEFAULT_K, batch_size=DEFAULT_BATCH_SIZE):
+    # 한 건씩 추천할 때의 지연 시간 분포와, batch_size건씩 묶어 추천할 때의 초당 처리량
+    # 결과 캐시는 끄고 측정 (같은 질의가 반복되어도 매번 계산)
+    started = time.perf_counter()
+    core.scorer(engine)
+    load_seconds = time.perf_counter() - started
+    core.recommend(seed_sets[0], k, engine=engine)  # 첫 호출 준비 비용 제외
+
+    # 단계별 시간(예: hybrid.candidates, hybrid.rerank)은 한 건씩 추천하는 구간에서만 모음
+    metrics.reset()
+    latencies = np.empty(len(seed_sets))
+    for i, seeds in enumerate(seed_sets):
+        started = time.perf_counter()
+        core.recommend(seeds, k, engine=engine)
+        latencies[i] = time.perf_counter() - started
+    stages = {name: h['p50_ms'] for name, h in metrics.snapshot()['histograms'].items()
+              if name.startswith(f'{engine}.')}
+
+    started = time.perf_counter()
+    for start in range(0, len(seed_sets), batch_size):
+        core.recommend_batch(seed_sets[start:start + batch_size], k, engine=engine)
+    batch_seconds = time.perf_counter() - started
+    return {'movies': len(core), 'load_seconds': load_seconds,
+            'p50_ms': float(np.percentile(latencies, 50) * 1000), 'p99_ms': float(np.percentile(latencies, 99) * 1000),
+            'qps': len(seed_sets) / latencies.sum(), 'batch_qps': len(seed_sets) / batch_seconds, 'stages': stages}
+
+
+def benchmark_db(db_path, engines=ENGINES, n_queries=DEFAULT_QUERIES, k=DEFAULT_K, batch_size=DEFAULT_BATCH_SIZE):
+    core = RecommenderCore(db_path, cache=ResultCache(max_items=0))
+    seed_sets = random_seed_sets(core.movie_ids, n_queries)
+    return {engine: benchmark_engine(core, engine, seed_sets, k, batch_size) for engine in engines}
+
+
+def benchmark_scales(data_dir='data', scales=(1, 2, 4), engines=ENGINES, n_queries=DEFAULT_QUERIES, k=DEFAULT_K,
+                     batch_size=DEFAULT_BATCH_SIZE):
+    # 배수마다 임시 디렉터리에 CSV -> DB -> 산출물을 새로 만들어 측정 (끝나면 삭제)
+    report = {}
+    for factor in scales:
+        with tempfile.TemporaryDirectory() as work_dir:
+            db_path = os.path.join(work_dir, 'data.db')
+            build_database(scale_data(data_dir, os.path.join(work_dir, 'data'), factor), db_path)
+            report[factor] = benchmark_db(db_path, engines, n_queries, k, batch_size)
+            dispose_engines()  # 임시 DB 파일을 지우기 전에 커넥션 풀 정리
+    return report
+
+
+def print_report(label, results):
+    for engine, r in results.items():
+        print(f"{label:<8} {engine:<10} {r['movies']:>8} {r['load_seconds']:>9.2f} {r['p50_ms']:>8.2f} "
+              f"{r['p99_ms']:>8.2f} {r['qps']:>9.1f} {r['batch_qps']:>10.1f}")
+        for stage, p50_ms in r['stages'].items():
+            print(f"{'':<8}   {stage:<35} {p50_ms:>8.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='추천 방식별 지연 시간(p50/p99)과 처리량을 카탈로그 크기별로 측정합니다.')
+    parser.add_argument('--db', default=None, help='주면 이 DB 하나만 측정 (--scales 무시)')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--scales', nargs='*', type=int, default=[1, 2, 4])
+    parser.add_argument('--engines', nargs='*', default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument('--queries', type=int, default=DEFAULT_QUERIES)
+    parser.add_argument('--k', type=int, default=DEFAULT_K)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    header = (f"{'scale':<8} {'engine':<10} {'movies':>8} {'load(s)':>9} {'p50(ms)':>8} {'p99(ms)':>8} "
+              f"{'qps':>9} {'batch qps':>10}")
+    if args.db:
+        results = benchmark_db(args.db, args.engines, args.queries, args.k, args.batch_size)
+        print(header)
+        print_report(os.path.basename(args.db), results)
+    else:
+        report = benchmark_scales(args.data_dir, args.scales, args.engines, args.queries, args.k, args.batch_size)
+        print(header)
+        for factor, results in report.items():
+            print_report(f'x{factor}', results)
@@ -0,0 +1,56 @@
+import sys
+import numpy as np
+from movie_filter import genre_bitmask
+
+
+class Catalog:
+    # 영화 목록의 단일 사본: 화면 모델, 필터, 추천, 서버가 모두 이 열 배열을 그대로 참조
+    # movieId int32, 평균 평점 float32 (평가 없으면 NaN), 장르 uint32 비트마스크, 제목/장르 문자열은 intern
+    # movieId -> 행, 제목 -> 행 사전으로 O(1) 조회 (같은 제목이 여러 편이면 처음 나온 행)
+    __slots__ = ('movie_ids', 'titles', 'genres', 'ratings', 'genre_masks', 'row_of', 'row_of_title')
+
+    def __init__(self, movie_ids, titles, genres, ratings, genre_masks=None):
+        self.movie_ids = np.asarray(movie_ids, dtype=np.int32)
+        self.titles = _interned(titles)
+        self.genres = _interned(genres)
+        self.ratings = np.asarray(ratings, dtype=np.float32)
+        self.genre_masks = genre_bitmask(self.genres) if genre_masks is None else genre_masks
+        self.row_of = {movie_id: row for row, movie_id in enumerate(self.movie_ids.tolist())}
+        self.row_of_title = {}
+        for row, title in enumerate(self.titles):
+            self.row_of_title.setdefault(title, row)
+
+    @classmethod
+    def from_frame(cls, movies_df):
+        # db.load_movies_frame 결과 (movieId, title, genres, rating_avg)
+        return cls(movies_df['movieId'].to_numpy(), movies_df['title'].fillna('').tolist(),
+                   movies_df['genres'].fillna('').tolist(), movies_df['rating_avg'].to_numpy(dtype=np.float64))
+
+    def __len__(self):
+        return len(self.movie_ids)
+
+    def __contains__(self, movie_id):
+        return int(movie_id) in self.row_of
+
+    def row(self, movie_id):
+        # movieId -> 행 번호, 없는 영화면 None
+        return self.row_of.get(int(movie_id))
+
+    def rows_for(self, movie_ids):
+        # movieId 목록 -> 행 번호 배열 (없는 영화는 무시)
+        return np.array([self.row_of[int(m)] for m in movie_ids if int(m) in self.row_of], dtype=np.int64)
+
+    def title(self, movie_id, default=None):
+        row = self.row_of.get(int(movie_id))
+        return default if row is None else self.titles[row]
+
+    def movie_id_for_title(self, title):
+        row = self.row_of_title.get(title)
+        return None if row is None else int(self.movie_ids[row])
+
+
+def _interned(strings):
+    # 같은 문자열(특히 장르 조합)을 한 객체로 공유하는 object 배열
+    values = np.empty(len(strings), dtype=object)
+    values[:] = [sys.intern(str(s)) for s in strings]
+    return values
@@ -0,0 +1,184 @@
+import os
+import threading
+import numpy as np
+import db
+from db import DB_PATH
+from feature_index import load_or_build_feature_index
+from movie_filter import MovieFilter
+from snapshot import load_or_build_snapshot
+from recommend import recommend_batch, DEFAULT_K
+from result_cache import ResultCache, cache_key
+from timing import PhaseTimer
+from metrics import metrics
+
+# 추천 방식 이름 -> 점수 모델 로더 (content는 특징 인덱스를 그대로 사용)
+# 모델 모듈(scipy.sparse.linalg 등)은 해당 추천 방식을 처음 쓸 때 불러와 시작 시간을 줄임
+# hybrid는 다른 점수 모델(ItemCF)과 스냅숏을 함께 쓰므로 로더는 RecommenderCore를 받음
+ENGINES = ('content', 'item_cf', 'als', 'embedding', 'hybrid')
+
+
+def _load_item_cf(core):
+    from item_cf import load_or_build_item_cf
+    return load_or_build_item_cf(core.db_path)
+
+
+def _load_als(core):
+    from als import load_or_build_als
+    return load_or_build_als(core.db_path)
+
+
+def _load_embedding(core):
+    from embeddings import load_or_build_embedding_index
+    return load_or_build_embedding_index(core.db_path)
+
+
+def _load_hybrid(core):
+    from hybrid import load_hybrid
+    return load_hybrid(core)
+
+
+_SCORER_LOADERS = {'item_cf': _load_item_cf, 'als': _load_als, 'embedding': _load_embedding, 'hybrid': _load_hybrid}
+
+# 제목 검색 결과 기본 개수
+DEFAULT_SEARCH_LIMIT = 20
+
+
+class RecommenderCore:
+    # Qt 없이 쓰는 추천 핵심 기능 (영화 목록, 필터, 검색, 추천, 상세 정보)
+    # App.py의 화면과 service.py의 HTTP 서버가 같은 객체를 공유
+    # catalog를 주지 않으면 data.db 옆 열 스냅숏(없거나 data.db와 다르면 새로 만듦)에서 불러오고,
+    # 산출물 디렉터리에서 불러올 때는 artifacts.load_core가 넘김
+    # snapshot이 있으면 상세 정보(링크, 태그)도 DB 대신 스냅숏에서 조회
+    # timer를 주면 불러오기 단계(영화 목록, 필터/검색 색인, 특징 인덱스)별 시간을 함께 기록
+    def __init__(self, db_path=DB_PATH, catalog=None, movie_filter=None, feature_index=None, scorers=None,
+                 scorer_loaders=_SCORER_LOADERS, user_index=None, version=None, cache=None, timer=None,
+                 snapshot=None):
+        self.db_path = db_path
+        self.version = version
+        # 결과 캐시 키에 넣는 모델 버전 (산출물 버전, DB에서 직접 불러온 경우 data.db 수정 시각)
+        self.model_version = version or f'db@{os.path.getmtime(db_path) if os.path.exists(db_path) else 0}'
+        self.cache = ResultCache() if cache is None else cache
+        self.load_timer = PhaseTimer() if timer is None else timer
+
+        # 영화 목록 열 배열은 catalog 하나만 두고 아래 속성들은 같은 배열을 가리킴 (복사 없음)
+        with self.load_timer.phase('영화 목록'):
+            if catalog is None:
+                snapshot = load_or_build_snapshot(db_path) if snapshot is None else snapshot
+                catalog = snapshot.catalog()
+            self.snapshot = snapshot
+            self.catalog = catalog
+        with self.load_timer.phase('필터/검색 색인'):
+            self.movie_ids = self.catalog.movie_ids
+            self.titles = self.catalog.titles
+            self.genres = self.catalog.genres
+            self.ratings = self.catalog.ratings
+            self.row_of = self.catalog.row_of
+            if movie_filter is None:
+                title_index = None if self.snapshot is None else self.snapshot.title_index()
+                movie_filter = MovieFilter(self.titles, self.genres, self.ratings, title_index, self.catalog.genre_masks)
+            self.movie_filter = movie_filter
+        with self.load_timer.phase('특징 인덱스'):
+            self.feature_index = load_or_build_feature_index(db_path) if feature_index is None else feature_index
+
+        # 협업 필터링 / ALS 모델 (처음 사용할 때 한 번만 불러옴, 여러 스레드에서 동시에 불러도 안전)
+        # 하이브리드 로더가 잠금을 쥔 채 ItemCF를 불러오므로 재진입 가능한 잠금
+        self._scorers = {'content': self.feature_index, **(scorers or {})}
+        self._scorer_loaders = scorer_loaders
+        self._user_index = user_index
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.movie_ids)
+
+    def scorer(self, engine='content'):
+        if engine not in ENGINES:
+            raise ValueError(f"알 수 없는 추천 방식: {engine}")
+        scorer = self._scorers.get(engine)
+        if scorer is None:
+            with self._lock:
+                scorer = self._scorers.get(engine)
+                if scorer is None:
+                    if engine not in self._scorer_loaders:
+                        raise ValueError(f"불러온 산출물에 없는 추천 방식: {engine} "
+                                         f"(python artifacts.py --engines {engine}로 다시 내보내야 합니다)")
+                    scorer = self._scorer_loaders[engine](self)
+                    self._scorers[engine] = scorer
+        return scorer
+
+    def recommend(self, seed_ids, k=DEFAULT_K, genres=None, engine='content'):
+        # 선택된 영화와 비슷한 상위 k개 (movieId, 점수) 목록
+        return self.recommend_batch([seed_ids], k, [genres], engine)[0]
+
+    @metrics.timed('core.recommend_batch')
+    def recommend_batch(self, seed_sets, k=DEFAULT_K, genre_sets=None, engine='content', weight_sets=None):
+        # 같은 추천 방식의 요청 여러 개를 한 번의 행렬 연산으로 처리
+        # 캐시에 있는 요청은 그대로 돌려주고 나머지만 계산
+        ks = [k] * len(seed_sets) if np.isscalar(k) else list(k)
+        genre_sets = [None] * len(seed_sets) if genre_sets is None else genre_sets
+        weight_sets = [None] * len(seed_sets) if weight_sets is None else weight_sets
+        keys = [cache_key(seeds, genres, n, engine, self.model_version, weights)
+                for seeds, genres, n, weights in zip(seed_sets, genre_sets, ks, weight_sets)]
+        results = [self.cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        metrics.incr('core.recommend.cache_hit', len(keys) - len(missing))
+        metrics.incr('core.recommend.cache_miss', len(missing))
+        if missing:
+            scorer = self.scorer(engine)
+            args = ([seed_sets[i] for i in missing], [ks[i] for i in missing], [genre_sets[i] for i in missing])
+            if hasattr(scorer, 'recommend_batch'):
+                # 자체 순위를 정하는 추천기 (예: 하이브리드의 후보 생성 -> 재순위/MMR)는 같은 형식의 결과를 직접 반환
+                computed = scorer.recommend_batch(*args, weight_sets=[weight_sets[i] for i in missing])
+            else:
+                computed = recommend_batch(self.feature_index, *args, scorer=scorer,
+                                           weight_sets=[weight_sets[i] for i in missing])
+            for i, result in zip(missing, computed):
+                results[i] = tuple(result)
+                self.cache.put(keys[i], results[i])
+        return [list(result) for result in results]
+
+    @property
+    def user_index(self):
+        # 사용자별 평점 이력 인덱스 (처음 사용할 때 불러옴)
+        if self._user_index is None:
+            with self._lock:
+                if self._user_index is None:
+                    from user_index import load_or_build_user_index  # 맞춤 추천을 처음 쓸 때 불러옴
+                    self._user_index = load_or_build_user_index(self.db_path)
+        return self._user_index
+
+    def user_seeds(self, user_id):
+        # 사용자의 평점 이력 -> (선택 영화, 평점 가중치)
+        return self.user_index.seeds(user_id)
+
+    def recommend_for_user(self, user_id, k=DEFAULT_K, genres=None, engine='content'):
+        # 사용자가 평가한 영화를 평점 가중치를 준 선택 영화로 삼아 추천 (이미 본 영화 제외)
+        return self.recommend_for_users([user_id], k, genres, engine)[0]
+
+    def recommend_for_users(self, user_ids, k=DEFAULT_K, genres=None, engine='content'):
+        seeds = [self.user_seeds(user_id) for user_id in user_ids]
+        return self.recommend_batch([movie_ids for movie_ids, _ in seeds], k, [genres] * len(seeds), engine,
+                                    [weights for _, weights in seeds])
+
+    @metrics.timed('core.filter_mask')
+    def filter_mask(self, search_text='', genres=None, rating_range=None):
+        return self.movie_filter.mask(search_text, genres, rating_range)
+
+    @metrics.timed('core.search')
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        # 제목 검색 결과 행 번호 (입력창 상태를 쓰지 않아 여러 요청이 동시에 불러도 안전)
+        if not query.strip():
+            return np.empty(0, dtype=np.int64)
+        return self.movie_filter.title_index.search(query)[:limit]
+
+    def movie(self, row):
+        # 행 번호 -> 목록/검색 결과용 영화 요약
+        rating = self.ratings[row]
+        return {'movieId': int(self.movie_ids[row]), 'title': self.titles[row], 'genres': self.genres[row],
+                'rating': None if np.isnan(rating) else round(float(rating), 2)}
+
+    def detail(self, movie_id):
+        # 상세 정보 (영화 정보, tmdbId, 태그), 없는 영화면 None
+        if self.snapshot is None:
+            return db.get_movie_detail(movie_id, self.db_path)
+        row = self.catalog.row(movie_id)
+        return None if row is None else self.snapshot.detail(row, self.catalog)
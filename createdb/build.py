@@ -0,0 +1,191 @@
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.schema import CreateTable, CreateIndex
+from createdb.schema import metadata, movies, links, ratings, tags, SCHEMA_VERSION
+
+# 사용법 (저장소 최상위 디렉터리에서): python -m createdb.build [--data-dir data] [--db data.db]
+
+# CSV를 한 번에 읽을 행 수 (메모리 사용량 상한)
+DEFAULT_CHUNK_SIZE = 500_000
+
+# 적재 중에만 쓰는 SQLite 설정 (저널/동기화 끄기, 큰 캐시)
+LOAD_PRAGMAS = [
+    'PRAGMA journal_mode = OFF',
+    'PRAGMA synchronous = OFF',
+    'PRAGMA cache_size = -262144',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA locking_mode = EXCLUSIVE',
+]
+
+
+class RatingAggregates:
+    # movieId별 평점 합계/개수를 청크마다 누적 (ratings.csv를 한 번만 읽음)
+    def __init__(self):
+        self.sums = np.zeros(0, dtype=np.float64)
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, movie_ids, values):
+        size = max(len(self.counts), int(movie_ids.max()) + 1 if len(movie_ids) else 0)
+        if size > len(self.counts):
+            self.sums = np.pad(self.sums, (0, size - len(self.sums)))
+            self.counts = np.pad(self.counts, (0, size - len(self.counts)))
+        self.sums += np.bincount(movie_ids, weights=values, minlength=size)
+        self.counts += np.bincount(movie_ids, minlength=size)
+
+    def lookup(self, movie_ids):
+        # 평가가 없는 영화는 개수 0, 평균 None
+        counts = np.zeros(len(movie_ids), dtype=np.int64)
+        sums = np.zeros(len(movie_ids), dtype=np.float64)
+        known = movie_ids < len(self.counts)
+        counts[known] = self.counts[movie_ids[known]]
+        sums[known] = self.sums[movie_ids[known]]
+        averages = np.divide(sums, counts, out=np.full(len(movie_ids), np.nan), where=counts > 0)
+        return counts, averages
+
+
+def _insert_sql(table, engine):
+    return str(table.insert().compile(dialect=engine.dialect))
+
+
+def _rows(df):
+    # NaN/NA를 None으로 바꾼 파이썬 튜플 목록 (executemany 입력)
+    df = df.astype(object).where(df.notna(), None)
+    return list(df.itertuples(index=False, name=None))
+
+
+def to_date(timestamps):
+    # 유닉스 시간(초) -> 'YYYY-MM-DD' 문자열 (벡터화)
+    return np.datetime_as_string(timestamps.to_numpy(dtype='int64').astype('datetime64[s]'), unit='D')
+
+
+def load_links(cursor, engine, path, chunk_size):
+    link_map = {}
+    sql = _insert_sql(links, engine)
+    for chunk in pd.read_csv(path, chunksize=chunk_size, dtype={'imdbId': str, 'tmdbId': 'Int64'}):
+        # movies 테이블에는 원본 형식(앞자리 0 포함)의 imdbId를 보관
+        link_map.update(zip(chunk['movieId'].tolist(), zip(chunk['imdbId'].tolist(), chunk['tmdbId'].tolist())))
+        chunk = chunk.assign(imdbId=pd.to_numeric(chunk['imdbId'], errors='coerce').astype('Int64'))
+        cursor.executemany(sql, _rows(chunk[['movieId', 'imdbId', 'tmdbId']]))
+        cursor.connection.commit()
+    return link_map
+
+
+def load_ratings(cursor, engine, path, chunk_size):
+    aggregates = RatingAggregates()
+    sql = _insert_sql(ratings, engine)
+    dtypes = {'userId': np.int64, 'movieId': np.int64, 'rating': np.float64, 'timestamp': np.int64}
+    for chunk in pd.read_csv(path, chunksize=chunk_size, dtype=dtypes):
+        aggregates.add(chunk['movieId'].to_numpy(), chunk['rating'].to_numpy())
+        chunk['timestamp'] = to_date(chunk['timestamp'])
+        cursor.executemany(sql, _rows(chunk[['userId', 'movieId', 'rating', 'timestamp']]))
+        cursor.connection.commit()
+    return aggregates
+
+
+def load_tags(cursor, engine, path, chunk_size):
+    sql = _insert_sql(tags, engine)
+    for chunk in pd.read_csv(path, chunksize=chunk_size, dtype={'tag': str}):
+        chunk['timestamp'] = to_date(chunk['timestamp'])
+        cursor.executemany(sql, _rows(chunk[['userId', 'movieId', 'tag', 'timestamp']]))
+        cursor.connection.commit()
+
+
+def load_movies(cursor, engine, path, chunk_size, link_map, aggregates):
+    sql = _insert_sql(movies, engine)
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        movie_ids = chunk['movieId'].to_numpy(dtype=np.int64)
+        chunk_links = [link_map.get(movie_id, (None, None)) for movie_id in movie_ids.tolist()]
+        chunk['imdbId'] = [imdb_id for imdb_id, _ in chunk_links]
+        chunk['tmdbId'] = pd.array([tmdb_id for _, tmdb_id in chunk_links], dtype='Int64')
+        chunk['rating_count'], chunk['rating_avg'] = aggregates.lookup(movie_ids)
+        cursor.executemany(sql, _rows(chunk[['movieId', 'title', 'genres', 'imdbId', 'tmdbId',
+                                             'rating_count', 'rating_avg']]))
+        cursor.connection.commit()
+
+
+def build_database(data_dir, db_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    # 임시 파일에 새로 만든 뒤 완료되면 data.db를 교체 (실패해도 기존 DB는 그대로)
+    tmp_path = f'{db_path}.building'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    engine = create_engine(f'sqlite:///{tmp_path}')
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        for pragma in LOAD_PRAGMAS:
+            cursor.execute(pragma)
+
+        # 인덱스는 적재가 끝난 뒤에 한 번에 생성
+        for table in metadata.sorted_tables:
+            cursor.execute(str(CreateTable(table).compile(dialect=engine.dialect)))
+        connection.commit()
+
+        started = time.perf_counter()
+        link_map = load_links(cursor, engine, os.path.join(data_dir, 'links.csv'), chunk_size)
+        aggregates = load_ratings(cursor, engine, os.path.join(data_dir, 'ratings.csv'), chunk_size)
+        load_tags(cursor, engine, os.path.join(data_dir, 'tags.csv'), chunk_size)
+        load_movies(cursor, engine, os.path.join(data_dir, 'movies.csv'), chunk_size, link_map, aggregates)
+        print(f"CSV 적재 완료: {time.perf_counter() - started:.1f}초")
+
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                cursor.execute(str(CreateIndex(index).compile(dialect=engine.dialect)))
+        cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        connection.commit()
+        cursor.execute('ANALYZE')
+        connection.commit()
+    finally:
+        connection.close()
+        engine.dispose()
+    os.replace(tmp_path, db_path)
+
+
+def build_artifacts(db_path, with_als=False):
+    # 추천에 쓰는 파생 산출물을 새 DB 기준으로 다시 생성
+    from db import get_engine
+    from feature_index import build_feature_index, index_path_for
+    from item_cf import build_item_cf, neighbors_path_for
+    from embeddings import build_embedding_index, embedding_path_for
+    from snapshot import write_snapshot
+    engine = get_engine(db_path)
+
+    started = time.perf_counter()
+    write_snapshot(db_path)
+    print(f"영화 목록 스냅숏 생성 완료: {time.perf_counter() - started:.1f}초")
+
+    started = time.perf_counter()
+    build_feature_index(engine).save(index_path_for(db_path))
+    print(f"특징 인덱스 생성 완료: {time.perf_counter() - started:.1f}초")
+
+    started = time.perf_counter()
+    build_item_cf(engine).save(neighbors_path_for(db_path))
+    print(f"협업 필터링 이웃 목록 생성 완료: {time.perf_counter() - started:.1f}초")
+
+    started = time.perf_counter()
+    build_embedding_index(engine).save(embedding_path_for(db_path))
+    print(f"콘텐츠 임베딩 인덱스 생성 완료: {time.perf_counter() - started:.1f}초")
+
+    if with_als:
+        from als import build_als, model_dir_for
+        started = time.perf_counter()
+        build_als(engine).save(model_dir_for(db_path))
+        print(f"ALS 모델 학습 완료: {time.perf_counter() - started:.1f}초")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='MovieLens CSV로 data.db와 추천 산출물을 한 번에 생성합니다.')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--db', default='data.db')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--skip-artifacts', action='store_true', help='DB만 만들고 추천 산출물은 만들지 않음')
+    parser.add_argument('--with-als', action='store_true', help='ALS 모델까지 학습')
+    args = parser.parse_args()
+
+    build_database(args.data_dir, args.db, args.chunk_size)
+    if not args.skip_artifacts:
+        build_artifacts(args.db, args.with_als)
+    print("데이터베이스에 성공적으로 저장되었습니다.")
@@ -0,0 +1,16 @@
+import sys
+from sqlalchemy import create_engine, text
+from createdb.schema import upgrade_schema
+
+# 사용법 (저장소 최상위 디렉터리에서): python -m createdb.migrate [data.db 경로]
+db_path = sys.argv[1] if len(sys.argv) > 1 else 'data.db'
+engine = create_engine(f'sqlite:///{db_path}')
+
+# 기존 테이블을 기본 키/인덱스가 있는 스키마로 변환하고 통계 수집
+if upgrade_schema(engine):
+    # 테이블을 복사하면서 생긴 빈 페이지 정리
+    with engine.connect() as conn:
+        conn.execute(text('VACUUM'))
+    print("데이터베이스 스키마를 업그레이드했습니다.")
+else:
+    print("데이터베이스 스키마가 이미 최신입니다.")
@@ -0,0 +1,108 @@
+from sqlalchemy import (Table, Column, Integer, String, Float, Date, MetaData, ForeignKey, Index,
+                        PrimaryKeyConstraint, inspect, text)
+
+# 스키마 버전 (PRAGMA user_version에 기록해 마이그레이션 필요 여부 판단)
+SCHEMA_VERSION = 1
+
+# 테이블을 위한 메타데이터 생성
+metadata = MetaData()
+
+# movies 테이블 (평점 집계 열 포함)
+movies = Table('movies', metadata,
+               Column('movieId', Integer, primary_key=True, autoincrement=False),
+               Column('title', String, nullable=False),
+               Column('genres', String),
+               Column('imdbId', String),
+               Column('tmdbId', Integer),
+               Column('rating_count', Integer),
+               Column('rating_avg', Float),
+               Index('ix_movies_title', 'title')
+              )
+
+# links 테이블
+links = Table('links', metadata,
+              Column('movieId', Integer, ForeignKey('movies.movieId'), primary_key=True, autoincrement=False),
+              Column('imdbId', Integer),
+              Column('tmdbId', Integer)
+             )
+
+# ratings 테이블 (사용자별 조회는 기본 키, 영화별 조회는 movieId 인덱스 사용)
+ratings = Table('ratings', metadata,
+                Column('userId', Integer, nullable=False),
+                Column('movieId', Integer, ForeignKey('movies.movieId'), nullable=False),
+                Column('rating', Float, nullable=False),
+                Column('timestamp', Date),
+                PrimaryKeyConstraint('userId', 'movieId'),
+                Index('ix_ratings_movieId', 'movieId')
+               )
+
+# tags 테이블 (같은 사용자가 같은 영화에 여러 태그를 달 수 있어 기본 키 없이 인덱스만 둠)
+tags = Table('tags', metadata,
+             Column('userId', Integer, nullable=False),
+             Column('movieId', Integer, ForeignKey('movies.movieId'), nullable=False),
+             Column('tag', String),
+             Column('timestamp', Date),
+             Index('ix_tags_movieId', 'movieId'),
+             Index('ix_tags_userId', 'userId')
+            )
+
+# 사용자별 맞춤 추천 결과 (user_index.py가 추천 방식별로 미리 계산해 통째로 교체)
+user_recommendations = Table('user_recommendations', metadata,
+                             Column('engine', String, nullable=False),
+                             Column('userId', Integer, nullable=False),
+                             Column('rank', Integer, nullable=False),
+                             Column('movieId', Integer, nullable=False),
+                             Column('score', Float, nullable=False),
+                             PrimaryKeyConstraint('engine', 'userId', 'rank')
+                            )
+
+
+def _cast(column):
+    # 예전 to_sql 테이블에는 id가 문자열('862')이나 실수(862.0)로 저장돼 있어 선언된 타입으로 변환
+    name = f'"{column.name}"'
+    if isinstance(column.type, Integer):
+        return f"CAST(CAST(NULLIF({name}, '') AS REAL) AS INTEGER)"
+    if isinstance(column.type, Float):
+        return f"CAST(NULLIF({name}, '') AS REAL)"
+    if isinstance(column.type, String):
+        return f'CAST({name} AS TEXT)'
+    return name
+
+
+def upgrade_schema(engine):
+    # 기존 data.db를 제자리에서 선언된 스키마로 변환 (이미 최신이면 아무것도 하지 않음)
+    with engine.begin() as conn:
+        if conn.execute(text('PRAGMA user_version')).scalar() >= SCHEMA_VERSION:
+            return False
+        existing = set(inspect(conn).get_table_names())
+        for table in metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+            old_name = f'{table.name}__old'
+            old_columns = {column['name'] for column in inspect(conn).get_columns(table.name)}
+            conn.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{old_name}"'))
+            table.create(conn)
+            columns = [column for column in table.columns if column.name in old_columns]
+            column_names = ', '.join(f'"{column.name}"' for column in columns)
+            casts = ', '.join(_cast(column) for column in columns)
+            # 기본 키가 겹치는 행은 마지막 행으로 덮어씀
+            conn.execute(text(f'INSERT OR REPLACE INTO "{table.name}" ({column_names}) '
+                              f'SELECT {casts} FROM "{old_name}"'))
+            conn.execute(text(f'DROP TABLE "{old_name}"'))
+        conn.execute(text(f'PRAGMA user_version = {SCHEMA_VERSION}'))
+    analyze(engine)
+    return True
+
+
+def create_schema(engine):
+    # 데이터베이스에 테이블과 인덱스 생성 (예전 형식의 테이블이 있으면 먼저 변환)
+    upgrade_schema(engine)
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text(f'PRAGMA user_version = {SCHEMA_VERSION}'))
+
+
+def analyze(engine):
+    # 쿼리 플래너가 인덱스를 고를 수 있도록 통계 수집
+    with engine.begin() as conn:
+        conn.execute(text('ANALYZE'))
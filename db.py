@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, select, bindparam, inspect
+# 테이블 선언은 createdb의 스키마를 그대로 공유 (클릭마다 스키마를 다시 읽지 않음)
+from createdb.schema import movies, links, tags, ratings, user_recommendations
+from metrics import metrics
+
+# 기본 데이터베이스 경로
+DB_PATH = 'data.db'
+
+# 프로세스 전체에서 공유하는 엔진 (경로별로 하나, 커넥션 풀 포함)
+_engines = {}
+
+# 미리 만들어 둔 조회 구문 (SQLAlchemy가 컴파일 결과를 캐시해 재사용)
+_movie_by_id = select(movies).where(movies.c.movieId == bindparam('movie_id'))
+_movie_by_title = select(movies).where(movies.c.title == bindparam('title'))
+_tmdb_id_by_movie = select(links.c.tmdbId).where(links.c.movieId == bindparam('movie_id'))
+_tags_by_movie = select(tags.c.tag).where(tags.c.movieId == bindparam('movie_id'))
+_tags_by_movies = select(tags.c.movieId, tags.c.tag).where(tags.c.movieId.in_(bindparam('movie_ids', expanding=True)))
+_tmdb_ids_by_movies = select(links.c.movieId, links.c.tmdbId).where(
+    links.c.movieId.in_(bindparam('movie_ids', expanding=True)))
+_movies_by_ids = select(movies).where(movies.c.movieId.in_(bindparam('movie_ids', expanding=True)))
+_user_recommendations = select(user_recommendations.c.movieId, user_recommendations.c.score).where(
+    (user_recommendations.c.engine == bindparam('engine'))
+    & (user_recommendations.c.userId == bindparam('user_id'))).order_by(user_recommendations.c.rank)
+_raters_of_movies = select(ratings.c.userId).distinct().where(
+    ratings.c.movieId.in_(bindparam('movie_ids', expanding=True)))
+_ratings_by_users = select(ratings.c.userId, ratings.c.movieId, ratings.c.rating).where(
+    ratings.c.userId.in_(bindparam('user_ids', expanding=True)))
+
+# SQLite 바인드 변수 개수 제한을 넘지 않도록 묶음 크기 제한
+BULK_CHUNK_SIZE = 500
+
+
+def get_engine(db_path=DB_PATH):
+    engine = _engines.get(db_path)
+    if engine is None:
+        engine = create_engine(f'sqlite:///{db_path}')
+        _engines[db_path] = engine
+    return engine
+
+
+def dispose_engines():
+    # fork로 만든 작업 프로세스에서 부모 프로세스의 커넥션을 함께 쓰지 않도록 풀을 비움
+    for engine in _engines.values():
+        engine.dispose(close=False)
+
+
+def _to_int(value):
+    # movies/links 테이블에는 id가 문자열이나 실수로 저장된 경우가 있어 정수로 맞춤
+    return int(float(value)) if value not in (None, '') else None
+
+
+def _chunks(values, size=BULK_CHUNK_SIZE):
+    values = [int(v) for v in values]
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+@metrics.timed('db.load_movies')
+def load_movies_frame(db_path=DB_PATH):
+    # 영화 목록 전체를 열 단위 DataFrame으로 한 번에 읽기
+    with get_engine(db_path).connect() as conn:
+        movies_df = pd.read_sql(select(movies.c.movieId, movies.c.title, movies.c.genres, movies.c.rating_avg)
+                                .order_by(movies.c.movieId), conn)
+    movies_df['movieId'] = movies_df['movieId'].astype('int64')
+    return movies_df
+
+
+def get_movie(movie_id, db_path=DB_PATH):
+    with get_engine(db_path).connect() as conn:
+        return conn.execute(_movie_by_id, {'movie_id': int(movie_id)}).mappings().fetchone()
+
+
+def get_movie_by_title(title, db_path=DB_PATH):
+    with get_engine(db_path).connect() as conn:
+        return conn.execute(_movie_by_title, {'title': title}).mappings().fetchone()
+
+
+def get_tmdb_id(movie_id, db_path=DB_PATH):
+    with get_engine(db_path).connect() as conn:
+        return _to_int(conn.execute(_tmdb_id_by_movie, {'movie_id': int(movie_id)}).scalar())
+
+
+def get_tags(movie_id, db_path=DB_PATH):
+    with get_engine(db_path).connect() as conn:
+        return list(conn.execute(_tags_by_movie, {'movie_id': int(movie_id)}).scalars())
+
+
+@metrics.timed('db.movie_detail')
+def get_movie_detail(movie_id, db_path=DB_PATH):
+    # 상세 정보 창에 필요한 영화 정보, tmdbId, 태그를 커넥션 하나로 조회
+    with get_engine(db_path).connect() as conn:
+        movie = conn.execute(_movie_by_id, {'movie_id': int(movie_id)}).mappings().fetchone()
+        if movie is None:
+            return None
+        tmdb_id = _to_int(conn.execute(_tmdb_id_by_movie, {'movie_id': int(movie_id)}).scalar())
+        movie_tags = list(conn.execute(_tags_by_movie, {'movie_id': int(movie_id)}).scalars())
+    return {'movieId': int(movie_id), 'title': movie['title'], 'genres': movie['genres'],
+            'tmdbId': tmdb_id, 'tags': movie_tags}
+
+
+def get_movies(movie_ids, db_path=DB_PATH):
+    # 여러 영화를 묶어서 조회 -> {movieId: 행}
+    result = {}
+    with get_engine(db_path).connect() as conn:
+        for chunk in _chunks(movie_ids):
+            for row in conn.execute(_movies_by_ids, {'movie_ids': chunk}).mappings():
+                result[int(row['movieId'])] = row
+    return result
+
+
+def get_tags_for_movies(movie_ids, db_path=DB_PATH):
+    # 여러 영화의 태그를 묶어서 조회 -> {movieId: [태그, ...]}
+    result = {int(m): [] for m in movie_ids}
+    with get_engine(db_path).connect() as conn:
+        for chunk in _chunks(movie_ids):
+            for movie_id, tag in conn.execute(_tags_by_movies, {'movie_ids': chunk}):
+                result[int(movie_id)].append(tag)
+    return result
+
+
+def get_tmdb_ids(movie_ids, db_path=DB_PATH):
+    # 여러 영화의 tmdbId를 묶어서 조회 -> {movieId: tmdbId}
+    result = {}
+    with get_engine(db_path).connect() as conn:
+        for chunk in _chunks(movie_ids):
+            for movie_id, tmdb_id in conn.execute(_tmdb_ids_by_movies, {'movie_ids': chunk}):
+                result[int(movie_id)] = _to_int(tmdb_id)
+    return result
+
+
+def get_raters(movie_ids, db_path=DB_PATH):
+    # 여러 영화 중 하나라도 평가한 사용자 -> 정렬된 userId 배열 (ix_ratings_movieId 색인 사용)
+    user_ids = set()
+    with get_engine(db_path).connect() as conn:
+        for chunk in _chunks(movie_ids):
+            user_ids.update(conn.execute(_raters_of_movies, {'movie_ids': chunk}).scalars())
+    return np.array(sorted(user_ids), dtype=np.int64)
+
+
+def get_ratings_for_users(user_ids, db_path=DB_PATH):
+    # 여러 사용자의 평점 이력을 묶어서 조회 -> {userId: (movieId 배열, 평점 배열)}
+    frames = []
+    with get_engine(db_path).connect() as conn:
+        for chunk in _chunks(user_ids):
+            frames.append(pd.DataFrame(conn.execute(_ratings_by_users, {'user_ids': chunk}).fetchall(),
+                                       columns=['userId', 'movieId', 'rating']))
+    history = pd.concat(frames) if frames else pd.DataFrame(columns=['userId', 'movieId', 'rating'])
+    result = {int(u): (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)) for u in user_ids}
+    for user_id, group in history.groupby('userId'):
+        result[int(user_id)] = (group['movieId'].to_numpy(dtype=np.int64), group['rating'].to_numpy(dtype=np.float32))
+    return result
+
+
+def get_user_recommendations(user_id, engine='item_cf', db_path=DB_PATH):
+    # 미리 계산해 둔 사용자 맞춤 추천 [(movieId, 점수), ...] (user_index.py로 생성, 없으면 빈 목록)
+    if not inspect(get_engine(db_path)).has_table(user_recommendations.name):
+        return []
+    with get_engine(db_path).connect() as conn:
+        rows = conn.execute(_user_recommendations, {'engine': engine, 'user_id': int(user_id)})
+        return [(int(movie_id), float(score)) for movie_id, score in rows]
@@ -0,0 +1,140 @@
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sqlalchemy import text
+from db import DB_PATH, get_engine, dispose_engines
+from core import RecommenderCore, ENGINES
+from movie_filter import genre_vectors
+from recommend import DEFAULT_K
+from result_cache import ResultCache
+
+# 사용법: python evaluate.py [--db data.db] [--engines content item_cf als embedding] [--k 10] [--test-fraction 0.2]
+# 평점 시각 기준으로 과거 평점으로만 모델을 만들고, 이후 평점을 맞히는지 추천 방식별로 비교
+
+# 평가 기간 비율 (가장 최근 평점 중 이 비율을 정답으로 사용), 정답으로 볼 최소 평점
+DEFAULT_TEST_FRACTION = 0.2
+RELEVANT_RATING = 4.0
+
+# 한 번에 점수를 계산할 사용자 수 (사용자 수 x 영화 수 점수 행렬 크기 상한)
+EVAL_BATCH_SIZE = 256
+
+_rating_aggregates = text(
+    'UPDATE movies SET '
+    'rating_count = (SELECT COUNT(*) FROM ratings WHERE ratings."movieId" = movies."movieId"), '
+    'rating_avg = (SELECT AVG(rating) FROM ratings WHERE ratings."movieId" = movies."movieId")')
+
+
+def temporal_split(db_path, train_db_path, test_fraction=DEFAULT_TEST_FRACTION):
+    # 평점 시각의 (1 - test_fraction) 분위수를 기준일로 나눠
+    # 기준일 이전 평점/태그만 남긴 학습용 DB를 train_db_path에 만들고, 기준일 이후 평점을 돌려줌
+    ratings = pd.read_sql('SELECT userId, movieId, rating, timestamp FROM ratings', get_engine(db_path))
+    dates = np.sort(ratings['timestamp'].astype(str).to_numpy())
+    cutoff = dates[min(int(len(dates) * (1 - test_fraction)), len(dates) - 1)]
+    shutil.copyfile(db_path, train_db_path)
+    with get_engine(train_db_path).begin() as conn:
+        conn.execute(text('DELETE FROM ratings WHERE timestamp >= :cutoff'), {'cutoff': cutoff})
+        conn.execute(text('DELETE FROM tags WHERE timestamp >= :cutoff'), {'cutoff': cutoff})
+        conn.execute(_rating_aggregates)
+    test = ratings[ratings['timestamp'].astype(str) >= cutoff].drop(columns='timestamp')
+    return test.reset_index(drop=True), cutoff
+
+
+def relevance_matrix(test, user_ids, row_of, n_movies, threshold=RELEVANT_RATING):
+    # (평가 사용자 x 영화) 희소 행렬: 기준일 이후 threshold 이상으로 평가한 영화가 1
+    test = test[(test['rating'] >= threshold) & test['movieId'].isin(row_of.keys())]
+    user_pos = pd.Series(np.arange(len(user_ids)), index=user_ids)
+    test = test[test['userId'].isin(user_pos.index)]
+    rows = user_pos[test['userId']].to_numpy()
+    cols = np.array([row_of[int(m)] for m in test['movieId']], dtype=np.int64)
+    matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(len(user_ids), n_movies))
+    matrix.data[:] = 1.0  # 같은 영화가 중복되어도 1
+    return matrix
+
+
+def ranking_metrics(rec_rows, relevant, genre_vecs, k):
+    # rec_rows: (사용자 수 x k) 추천 영화 행 번호 (-1은 빈 자리), relevant: relevance_matrix 결과
+    # 반환: precision@k, recall@k, NDCG@k (사용자 평균), coverage, 목록 내 다양성, 추천 빈도 지니 계수
+    n_users, n_movies = relevant.shape
+    filled = rec_rows >= 0
+    safe_rows = np.where(filled, rec_rows, 0)
+    hits = np.asarray(relevant[np.repeat(np.arange(n_users), k), safe_rows.ravel()]).reshape(n_users, k) * filled
+    n_relevant = np.asarray(relevant.sum(axis=1)).ravel()
+
+    discounts = 1.0 / np.log2(np.arange(k) + 2)
+    ideal = np.cumsum(discounts)[np.minimum(n_relevant, k).astype(np.int64) - 1]
+    ndcg = (hits * discounts).sum(axis=1) / ideal
+
+    # 목록 내 다양성 = 1 - 추천 목록 안 영화 쌍의 평균 장르 코사인 유사도
+    # (합 벡터 노름의 제곱 - 각 벡터 노름 제곱 합) = 서로 다른 쌍의 유사도 합 x 2
+    vecs = genre_vecs[safe_rows] * filled[:, :, None]
+    n_filled = filled.sum(axis=1)
+    pair_sums = (np.square(vecs.sum(axis=1)).sum(axis=1) - np.square(vecs).sum(axis=(1, 2))) / 2
+    n_pairs = n_filled * (n_filled - 1) / 2
+    diversity = 1 - np.divide(pair_sums, n_pairs, out=np.zeros(n_users), where=n_pairs > 0)
+
+    counts = np.sort(np.bincount(rec_rows[filled], minlength=n_movies))
+    total = counts.sum()
+    gini = 1 - 2 * np.sum(np.cumsum(counts) / total) / n_movies + 1 / n_movies if total else 0.0
+    return {'precision': float(np.mean(hits.sum(axis=1) / k)), 'recall': float(np.mean(hits.sum(axis=1) / n_relevant)),
+            'ndcg': float(np.mean(ndcg)), 'coverage': float(np.count_nonzero(counts) / n_movies),
+            'diversity': float(np.mean(diversity[n_pairs > 0])) if np.any(n_pairs > 0) else 0.0,
+            'gini': float(gini)}
+
+
+def evaluate_engine(core, engine, user_ids, relevant, k=DEFAULT_K, batch_size=EVAL_BATCH_SIZE):
+    # 평가 사용자 전체를 batch_size명씩 한 번의 행렬 연산으로 추천해 (사용자 수 x k) 행 번호 배열로 모은 뒤 지표 계산
+    started = time.perf_counter()
+    core.scorer(engine)  # 모델 불러오기/학습 시간은 추천 시간에서 뺌
+    trained = time.perf_counter()
+    rec_rows = np.full((len(user_ids), k), -1, dtype=np.int64)
+    for start in range(0, len(user_ids), batch_size):
+        chunk = user_ids[start:start + batch_size]
+        for i, results in enumerate(core.recommend_for_users(chunk, k, engine=engine)):
+            rec_rows[start + i, :len(results)] = [core.row_of[movie_id] for movie_id, _ in results]
+    scored = time.perf_counter()
+    metrics = ranking_metrics(rec_rows, relevant, genre_vectors(core.movie_filter.genre_masks), k)
+    metrics.update(users=len(user_ids), train_seconds=trained - started, score_seconds=scored - trained)
+    return metrics
+
+
+def evaluate(db_path=DB_PATH, engines=ENGINES, k=DEFAULT_K, test_fraction=DEFAULT_TEST_FRACTION,
+             threshold=RELEVANT_RATING):
+    # 학습용 DB와 그 산출물은 임시 디렉터리에 만들고 끝나면 삭제
+    with tempfile.TemporaryDirectory() as work_dir:
+        train_db_path = os.path.join(work_dir, os.path.basename(db_path))
+        test, cutoff = temporal_split(db_path, train_db_path, test_fraction)
+        core = RecommenderCore(train_db_path, cache=ResultCache(max_items=0))
+        # 기준일 이전 이력이 있고 기준일 이후 정답 영화가 있는 사용자만 평가
+        candidates = np.unique(test.loc[test['rating'] >= threshold, 'userId'].to_numpy(dtype=np.int64))
+        user_ids = np.array([u for u in candidates if u in core.user_index], dtype=np.int64)
+        relevant = relevance_matrix(test, user_ids, core.row_of, len(core), threshold)
+        keep = np.asarray(relevant.sum(axis=1)).ravel() > 0
+        user_ids, relevant = user_ids[keep], relevant[keep]
+        report = {engine: evaluate_engine(core, engine, user_ids, relevant, k) for engine in engines}
+        dispose_engines()  # 임시 DB 파일을 지우기 전에 커넥션 풀 정리
+    return cutoff, report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='평점 시각 기준 학습/평가 분할로 추천 방식별 정확도와 다양성을 비교합니다.')
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--engines', nargs='*', default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument('--k', type=int, default=DEFAULT_K)
+    parser.add_argument('--test-fraction', type=float, default=DEFAULT_TEST_FRACTION)
+    parser.add_argument('--threshold', type=float, default=RELEVANT_RATING, help='정답으로 볼 최소 평점')
+    args = parser.parse_args()
+
+    cutoff, report = evaluate(args.db, args.engines, args.k, args.test_fraction, args.threshold)
+    k = args.k
+    print(f"기준일 {cutoff} 이후 평점으로 평가 (정답: 평점 {args.threshold} 이상)")
+    print(f"{'engine':<10} {'users':>6} {f'P@{k}':>7} {f'R@{k}':>7} {f'NDCG@{k}':>8} {'coverage':>9} "
+          f"{'diversity':>9} {'gini':>6} {'학습(초)':>8} {'추천(초)':>8}")
+    for engine, m in report.items():
+        print(f"{engine:<10} {m['users']:>6} {m['precision']:>7.4f} {m['recall']:>7.4f} {m['ndcg']:>8.4f} "
+              f"{m['coverage']:>9.4f} {m['diversity']:>9.4f} {m['gini']:>6.3f} {m['train_seconds']:>8.2f} "
+              f"{m['score_seconds']:>8.2f}")
@@ -0,0 +1,219 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from db import DB_PATH, get_engine
+
+# 인덱스 파일 이름
+INDEX_FILE = 'feature_index.npz'
+TAG_PREFIX = 'tag:'
+DEFAULT_TAG_WEIGHT = 0.5
+
+
+def index_path_for(db_path=DB_PATH):
+    # 인덱스 파일은 data.db 옆에 저장
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), INDEX_FILE)
+
+
+class FeatureIndex:
+    # 영화별 장르(및 태그) 특징을 CSR 행렬로 들고 있는 인덱스
+    def __init__(self, matrix, movie_ids, vocabulary, n_genres, norms=None, normalized=None):
+        self.matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+        self.movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        self.vocabulary = list(vocabulary)
+        self.n_genres = int(n_genres)
+        self.row_of = {int(movie_id): row for row, movie_id in enumerate(self.movie_ids)}
+        self.feature_of = {name: col for col, name in enumerate(self.vocabulary)}
+
+        # 행 노름과 행 정규화 행렬을 미리 계산 (코사인 유사도 = 정규화 행렬의 내적)
+        # 산출물 디렉터리에서 메모리 매핑으로 불러올 때는 저장된 값을 그대로 사용
+        if normalized is None:
+            norms = np.sqrt(np.asarray(self.matrix.multiply(self.matrix).sum(axis=1)).ravel()).astype(np.float32)
+            inv_norms = np.zeros_like(norms)
+            np.divide(1.0, norms, out=inv_norms, where=norms > 0)
+            normalized = sparse.csr_matrix(sparse.diags(inv_norms) @ self.matrix, dtype=np.float32)
+        self.norms = norms
+        self.normalized = normalized
+
+    def __len__(self):
+        return len(self.movie_ids)
+
+    @property
+    def has_tags(self):
+        # 장르 뒤에 태그 특징 열이 있는지 (include_tags=True로 만든 인덱스)
+        return len(self.vocabulary) > self.n_genres
+
+    def rows_for(self, movie_ids):
+        # movieId 목록을 행 번호 배열로 변환 (인덱스에 없는 영화는 무시)
+        return np.array([self.row_of[int(m)] for m in movie_ids if int(m) in self.row_of], dtype=np.int64)
+
+    def query_vector(self, movie_ids):
+        # 선택된 영화들의 정규화 벡터 평균
+        rows = self.rows_for(movie_ids)
+        if len(rows) == 0:
+            return None
+        return np.asarray(self.normalized[rows].mean(axis=0)).ravel()
+
+    def similarity(self, movie_ids):
+        # 전체 카탈로그에 대한 평균 코사인 유사도 (희소 행렬-벡터 곱 한 번)
+        query = self.query_vector(movie_ids)
+        if query is None:
+            return np.zeros(len(self), dtype=np.float32)
+        return self.normalized @ query.astype(np.float32)
+
+    def similarity_batch(self, seed_sets, weight_sets=None):
+        # 여러 선택 영화 묶음의 유사도를 한 번에 계산 -> (묶음 수 x 영화 수) 행렬
+        # 묶음마다 (가중) 평균을 내는 희소 선택 행렬 S로 질의 행렬 Q = S @ 정규화 행렬을 만든 뒤 희소 행렬 곱 한 번
+        return np.asarray(self.similarity_sparse(seed_sets, weight_sets).todense(), dtype=np.float32)
+
+    def similarity_sparse(self, seed_sets, weight_sets=None):
+        # similarity_batch를 밀집 행렬로 펼치기 전의 희소 행렬 (특징을 하나도 공유하지 않는 영화는 항목 없음)
+        selector = seed_selector(seed_sets, self.row_of, len(self), weight_sets)
+        return sparse.csr_matrix((selector @ self.normalized) @ self.normalized.T, dtype=np.float32)
+
+    def genre_mask(self, genres):
+        # 선택된 장르 중 하나라도 포함하는 영화의 불리언 마스크
+        cols = [self.feature_of[g.lower()] for g in genres if g.lower() in self.feature_of]
+        if not cols:
+            return np.zeros(len(self), dtype=bool)
+        return np.asarray(self.matrix[:, cols].getnnz(axis=1) > 0).ravel()
+
+    def save(self, path):
+        np.savez(path,
+                 data=self.matrix.data, indices=self.matrix.indices, indptr=self.matrix.indptr,
+                 shape=np.array(self.matrix.shape), movie_ids=self.movie_ids,
+                 vocabulary=np.array(self.vocabulary, dtype=str), n_genres=np.array(self.n_genres))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as npz:
+            matrix = sparse.csr_matrix((npz['data'], npz['indices'], npz['indptr']), shape=tuple(npz['shape']))
+            return cls(matrix, npz['movie_ids'], npz['vocabulary'].tolist(), npz['n_genres'])
+
+    def to_arrays(self):
+        # 메모리 매핑으로 공유할 수 있는 배열 묶음 (원본/정규화 CSR 행렬, 노름 포함)
+        return {'data': self.matrix.data, 'indices': self.matrix.indices, 'indptr': self.matrix.indptr,
+                'shape': np.array(self.matrix.shape), 'movie_ids': self.movie_ids,
+                'vocabulary': np.array(self.vocabulary, dtype=str), 'n_genres': np.array(self.n_genres),
+                'norms': self.norms, 'normalized_data': self.normalized.data,
+                'normalized_indices': self.normalized.indices, 'normalized_indptr': self.normalized.indptr}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        # 배열을 복사하지 않고 CSR 행렬을 다시 구성 (메모리 매핑 배열이면 프로세스 간 페이지 공유)
+        shape = tuple(int(n) for n in arrays['shape'])
+        matrix = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=shape)
+        normalized = sparse.csr_matrix((arrays['normalized_data'], arrays['normalized_indices'],
+                                        arrays['normalized_indptr']), shape=shape)
+        return cls(matrix, arrays['movie_ids'], arrays['vocabulary'].tolist(), arrays['n_genres'],
+                   arrays['norms'], normalized)
+
+
+def seed_selector(seed_sets, row_of, n_rows, weight_sets=None, mean=True):
+    # 묶음마다 선택 영화 행에 가중치(주지 않거나 None이면 1)를 둔 (묶음 수 x 영화 수) 희소 행렬
+    # mean이면 묶음별 가중치 절댓값 합으로 나눠 가중 평균이 되게 함 (모르는 영화는 무시)
+    set_ids, cols, values = [], [], []
+    for i, seed_ids in enumerate(seed_sets):
+        weights = weight_sets[i] if weight_sets is not None and weight_sets[i] is not None else np.ones(len(seed_ids))
+        known = [(row_of[int(m)], w) for m, w in zip(seed_ids, weights) if int(m) in row_of]
+        if not known:
+            continue
+        rows = np.array([row for row, _ in known], dtype=np.int64)
+        row_weights = np.array([w for _, w in known], dtype=np.float32)
+        total = np.abs(row_weights).sum()
+        if mean and total > 0:
+            row_weights /= total
+        set_ids.append(np.full(len(rows), i))
+        cols.append(rows)
+        values.append(row_weights)
+    if not cols:
+        return sparse.csr_matrix((len(seed_sets), n_rows), dtype=np.float32)
+    return sparse.csr_matrix((np.concatenate(values), (np.concatenate(set_ids), np.concatenate(cols))),
+                             shape=(len(seed_sets), n_rows), dtype=np.float32)
+
+
+def _one_hot(row_ids, tokens, weights, vocabulary, n_rows):
+    # (행, 토큰, 가중치) 목록을 CSR 행렬로 변환
+    col_of = {name: col for col, name in enumerate(vocabulary)}
+    cols = np.array([col_of[t] for t in tokens], dtype=np.int32)
+    return sparse.csr_matrix((weights, (row_ids, cols)), shape=(n_rows, len(vocabulary)), dtype=np.float32)
+
+
+def tag_counts(tags_df):
+    # (movieId, 정규화된 태그)별 빈도
+    tags_df = tags_df.assign(tag=TAG_PREFIX + tags_df['tag'].astype(str).str.strip().str.lower())
+    return tags_df.groupby(['movieId', 'tag']).size().reset_index(name='count')
+
+
+def update_tag_features(index, tags_df, tag_weight=DEFAULT_TAG_WEIGHT):
+    # 태그가 바뀐 영화의 태그 특징 행만 교체 (tags_df: 해당 영화들의 전체 태그 목록)
+    # 태그 특징이 없는 인덱스는 장르만 쓰므로 그대로 둠
+    if not index.has_tags or tags_df.empty:
+        return index
+    tags_df = tags_df[tags_df['movieId'].astype(np.int64).isin(index.row_of.keys())]
+    counts = tag_counts(tags_df.assign(movieId=tags_df['movieId'].astype(np.int64)))
+    vocabulary = index.vocabulary + sorted(set(counts['tag']) - set(index.feature_of))
+    feature_of = {name: col for col, name in enumerate(vocabulary)}
+
+    # 해당 영화 행의 기존 태그 값을 지우고 새 값을 더함
+    coo = index.matrix.tocoo()
+    changed_rows = index.rows_for(counts['movieId'].unique())
+    keep = ~(np.isin(coo.row, changed_rows) & (coo.col >= index.n_genres))
+    new_rows = np.array([index.row_of[m] for m in counts['movieId']], dtype=np.int64)
+    new_cols = np.array([feature_of[t] for t in counts['tag']], dtype=np.int64)
+    new_values = (tag_weight * np.log1p(counts['count'].to_numpy())).astype(np.float32)
+    matrix = sparse.csr_matrix((np.concatenate([coo.data[keep], new_values]),
+                                (np.concatenate([coo.row[keep], new_rows]), np.concatenate([coo.col[keep], new_cols]))),
+                               shape=(len(index), len(vocabulary)), dtype=np.float32)
+    return FeatureIndex(matrix, index.movie_ids, vocabulary, index.n_genres)
+
+
+def build_feature_index(engine, include_tags=False, tag_weight=DEFAULT_TAG_WEIGHT):
+    movies_df = pd.read_sql('SELECT movieId, genres FROM movies ORDER BY movieId', engine)
+    movies_df['movieId'] = movies_df['movieId'].astype(np.int64)
+    movies_df = movies_df.drop_duplicates('movieId').reset_index(drop=True)
+    n_rows = len(movies_df)
+
+    # 장르 문자열을 '|'로 나눠 (행, 장르) 쌍으로 펼치기
+    genres = movies_df['genres'].fillna('').str.lower().str.split('|').explode()
+    genres = genres[genres != '']
+    genre_vocab = sorted(genres.unique())
+    blocks = [_one_hot(genres.index.to_numpy(), genres.to_numpy(), np.ones(len(genres), dtype=np.float32),
+                       genre_vocab, n_rows)]
+    vocabulary = list(genre_vocab)
+
+    # 태그는 선택 사항: 영화별 태그 빈도의 log 가중치
+    if include_tags:
+        tags_df = pd.read_sql('SELECT movieId, tag FROM tags', engine)
+        tags_df['movieId'] = tags_df['movieId'].astype(np.int64)
+        row_of = pd.Series(np.arange(n_rows), index=movies_df['movieId'])
+        tags_df = tags_df[tags_df['movieId'].isin(row_of.index)]
+        counts = tag_counts(tags_df)
+        tag_vocab = sorted(counts['tag'].unique())
+        weights = (tag_weight * np.log1p(counts['count'].to_numpy())).astype(np.float32)
+        blocks.append(_one_hot(row_of[counts['movieId']].to_numpy(), counts['tag'].to_numpy(), weights,
+                               tag_vocab, n_rows))
+        vocabulary += tag_vocab
+
+    matrix = sparse.hstack(blocks, format='csr')
+    return FeatureIndex(matrix, movies_df['movieId'].to_numpy(), vocabulary, len(genre_vocab))
+
+
+def load_or_build_feature_index(db_path=DB_PATH, include_tags=False):
+    # data.db보다 새로운 인덱스 파일이 있으면 불러오고, 아니면 새로 만들어 저장
+    path = index_path_for(db_path)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(db_path):
+        index = FeatureIndex.load(path)
+        if index.has_tags or not include_tags:
+            return index
+    engine = get_engine(db_path)
+    index = build_feature_index(engine, include_tags=include_tags)
+    index.save(path)
+    return index
+
+
+if __name__ == '__main__':
+    engine = get_engine(DB_PATH)
+    index = build_feature_index(engine, include_tags=True)
+    index.save(index_path_for(DB_PATH))
+    print(f"특징 인덱스 저장 완료: {len(index)}편, 특징 {len(index.vocabulary)}개")
@@ -0,0 +1,226 @@
+import numpy as np
+from scipy import sparse
+from feature_index import seed_selector
+from movie_filter import genre_vectors, genre_bits
+from recommend import top_k, DEFAULT_K
+from metrics import metrics
+
+# 두 단계 하이브리드 추천
+#   1단계 (후보 생성): 장르 특징 유사도, 태그 유사도, 함께 평가된 이웃(ItemCF) 점수에서 각각 상위 N개씩 모음
+#                     (출처별 점수는 희소 행렬 그대로 두고 항목이 있는 영화만 훑음, 카탈로그 크기의 밀집 점수 없음)
+#   2단계 (재순위): 후보 몇백 편만 모아 출처별 점수 + 베이즈 축소 평균 평점 + 인기도를 가중합한 뒤
+#                  MMR로 장르가 겹치는 영화를 뒤로 미룸
+# 단계별 시간은 metrics의 hybrid.* 히스토그램으로 기록 (/metrics, 디버그 창, benchmark.py에서 확인)
+
+# 후보 생성기 이름 (가중치 사전의 키와 같음)
+SOURCES = ('genre', 'tag', 'item_cf')
+
+# 재순위 점수 가중치: 출처별 점수는 요청마다 후보 중 최댓값으로 나눠 0~1로 맞춤, quality/popularity도 0~1
+DEFAULT_WEIGHTS = {'genre': 0.3, 'tag': 0.2, 'item_cf': 0.3, 'quality': 0.15, 'popularity': 0.05}
+
+# 출처별 후보 수 (요청당 후보는 최대 출처 수 x 이 값)
+DEFAULT_CANDIDATES = 100
+
+# MMR 가중치: 1이면 재순위 점수만, 낮출수록 이미 고른 영화와 장르가 비슷한 영화를 더 많이 깎음
+DEFAULT_MMR_LAMBDA = 0.8
+
+# 베이즈 축소 평균의 사전 평점 수: 평점 수가 이보다 적은 영화는 평균이 전체 평균 쪽으로 크게 당겨짐
+DEFAULT_PRIOR_COUNT = 10
+
+# 평점 척도 (quality를 0~1로 맞출 때 사용)
+MIN_RATING = 0.5
+MAX_RATING = 5.0
+
+
+def shrunk_ratings(rating_count, rating_avg, prior_count=DEFAULT_PRIOR_COUNT):
+    # (n x 평균 + m x 전체 평균) / (n + m): 평점 1개짜리 영화가 많이 평가된 명작과 같은 점수를 받지 않게 함
+    counts = np.asarray(rating_count, dtype=np.float64)
+    averages = np.nan_to_num(np.asarray(rating_avg, dtype=np.float64))
+    global_mean = (averages * counts).sum() / counts.sum() if counts.sum() else (MIN_RATING + MAX_RATING) / 2
+    return ((counts * averages + prior_count * global_mean) / (counts + prior_count)).astype(np.float32)
+
+
+def tag_matrix(tag_indptr, tag_ids, tag_counts, n_tags):
+    # 스냅숏의 영화별 태그 집계 CSR -> 행 정규화된 (영화 수 x 태그 수) TF-IDF 행렬
+    # TF는 log(1 + 태그 개수), IDF는 그 태그가 달린 영화 수가 적을수록 큼
+    n_movies = len(tag_indptr) - 1
+    tag_ids = np.asarray(tag_ids, dtype=np.int32)
+    document_freq = np.bincount(tag_ids, minlength=n_tags)
+    idf = np.log((1 + n_movies) / (1 + document_freq)) + 1
+    values = (np.log1p(np.asarray(tag_counts, dtype=np.float32)) * idf[tag_ids]).astype(np.float32)
+    matrix = sparse.csr_matrix((values, tag_ids, np.asarray(tag_indptr, dtype=np.int64)), shape=(n_movies, n_tags))
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel()).astype(np.float32)
+    inv_norms = np.zeros_like(norms)
+    np.divide(1.0, norms, out=inv_norms, where=norms > 0)
+    return sparse.csr_matrix(sparse.diags(inv_norms) @ matrix, dtype=np.float32)
+
+
+class HybridRanker:
+    # 특징 인덱스(장르), 태그 행렬, ItemCF 이웃 목록, 영화별 평점 수/평균을 묶은 두 단계 추천기
+    # 모든 배열은 특징 인덱스와 같은 영화 행 순서(movieId 오름차순)
+    def __init__(self, feature_index, tags, item_cf, rating_count, rating_avg, genre_masks, weights=None,
+                 candidates=DEFAULT_CANDIDATES, mmr_lambda=DEFAULT_MMR_LAMBDA, prior_count=DEFAULT_PRIOR_COUNT):
+        if not np.array_equal(item_cf.movie_ids, feature_index.movie_ids):
+            raise ValueError("ItemCF와 특징 인덱스의 영화 순서가 다릅니다.")
+        self.feature_index = feature_index
+        self.tags = tags
+        self.item_cf = item_cf
+        self.movie_ids = feature_index.movie_ids
+        self.row_of = feature_index.row_of
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.candidates = candidates
+        self.mmr_lambda = mmr_lambda
+
+        counts = np.asarray(rating_count, dtype=np.float32)
+        self.quality = np.clip((shrunk_ratings(counts, rating_avg, prior_count) - MIN_RATING)
+                               / (MAX_RATING - MIN_RATING), 0, 1)
+        self.popularity = (np.log1p(counts) / np.log1p(counts.max())) if counts.max() > 0 else np.zeros_like(counts)
+        self.genre_masks = np.asarray(genre_masks, dtype=np.uint32)
+        self.genre_vecs = genre_vectors(genre_masks)
+
+    def __len__(self):
+        return len(self.movie_ids)
+
+    def source_scores(self, seed_sets, weight_sets=None):
+        # 후보 생성기별 (묶음 수 x 영화 수) 희소 점수 행렬 (각각 희소 행렬 곱 한 번, 행마다 열 번호 오름차순)
+        scores = {}
+        with metrics.timer('hybrid.source.genre'):
+            scores['genre'] = _canonical(self.feature_index.similarity_sparse(seed_sets, weight_sets))
+        with metrics.timer('hybrid.source.tag'):
+            selector = seed_selector(seed_sets, self.row_of, len(self), weight_sets)
+            scores['tag'] = _canonical((selector @ self.tags) @ self.tags.T)
+        with metrics.timer('hybrid.source.item_cf'):
+            scores['item_cf'] = _canonical(self.item_cf.similarity_sparse(seed_sets, weight_sets))
+        return scores
+
+    def allowed(self, rows, seed_rows, genres=None):
+        # 후보 행 중 장르 필터(선택 장르 중 하나라도 포함)를 통과하고 제외할 선택 영화가 아닌 것
+        # (recommend.candidate_mask와 같은 조건을 카탈로그 전체가 아니라 후보 행에만 적용)
+        keep = ~np.isin(rows, seed_rows)
+        if genres:
+            keep &= (self.genre_masks[rows] & genre_bits(genres)) != 0
+        return keep
+
+    def candidate_rows(self, scores, seed_row_sets, genre_sets):
+        # 출처마다 허용된 영화 중 점수가 양수인 상위 candidates개를 모아 중복 제거
+        # 반환: (묶음 수 x 후보 자리) 행 번호, 행마다 행 번호 오름차순이고 남는 자리는 -1 (후보가 없어도 자리 1개)
+        per_set = []
+        for i, (seed_rows, genres) in enumerate(zip(seed_row_sets, genre_sets)):
+            found = [np.empty(0, dtype=np.int64)]
+            for name in SOURCES:
+                if not self.weights.get(name):
+                    continue
+                cols, values = _row_entries(scores[name], i)
+                keep = (values > 0) & self.allowed(cols, seed_rows, genres)
+                found.append(cols[top_k(values, self.candidates, keep)].astype(np.int64))
+            per_set.append(np.unique(np.concatenate(found)))
+        rows = np.full((len(per_set), max([1] + [len(r) for r in per_set])), -1, dtype=np.int64)
+        for i, set_rows in enumerate(per_set):
+            rows[i, :len(set_rows)] = set_rows
+        return rows
+
+    def blend(self, scores, rows):
+        # 후보 자리마다 재순위 점수 (빈 자리는 -inf)
+        valid = rows >= 0
+        safe = np.where(valid, rows, 0)
+        blended = np.zeros(rows.shape, dtype=np.float32)
+        for name in SOURCES:
+            weight = self.weights.get(name)
+            if not weight:
+                continue
+            values = np.maximum(_gather(scores[name], rows), 0)
+            top = values.max(axis=1, keepdims=True)
+            blended += weight * np.divide(values, top, out=np.zeros_like(values), where=top > 0)
+        blended += self.weights['quality'] * self.quality[safe] + self.weights['popularity'] * self.popularity[safe]
+        blended[~valid] = -np.inf
+        return blended
+
+    def diversify(self, rows, blended, k):
+        # 묶음 전체를 한꺼번에 k번 고르는 MMR:
+        #   lambda x 재순위 점수 - (1 - lambda) x 이미 고른 영화와의 최대 장르 코사인 유사도가 가장 큰 후보
+        # 반환: (묶음 수 x k) 행 번호 (-1은 빈 자리), 고른 순서의 재순위 점수
+        n_sets = rows.shape[0]
+        k = min(k, rows.shape[1])
+        vectors = self.genre_vecs[np.where(rows >= 0, rows, 0)]
+        available = np.isfinite(blended)
+        max_sim = np.zeros(rows.shape, dtype=np.float32)
+        picked_rows = np.full((n_sets, k), -1, dtype=np.int64)
+        picked_scores = np.zeros((n_sets, k), dtype=np.float32)
+        sets = np.arange(n_sets)
+        lam = self.mmr_lambda
+        for step in range(k):
+            objective = np.where(available, lam * blended - (1 - lam) * max_sim, -np.inf)
+            pick = objective.argmax(axis=1)
+            ok = available[sets, pick]
+            if not ok.any():
+                break
+            picked_rows[ok, step] = rows[sets[ok], pick[ok]]
+            picked_scores[ok, step] = blended[sets[ok], pick[ok]]
+            available[sets, pick] = False
+            sims = np.einsum('scg,sg->sc', vectors, vectors[sets, pick])
+            max_sim = np.where(ok[:, None], np.maximum(max_sim, sims), max_sim)
+        return picked_rows, picked_scores
+
+    def recommend_batch(self, seed_sets, k=DEFAULT_K, genre_sets=None, weight_sets=None, exclude_seeds=True):
+        # recommend.recommend_batch와 같은 형식: 요청마다 (movieId, 재순위 점수) 목록 (MMR이 고른 순서)
+        if not seed_sets:
+            return []
+        ks = [k] * len(seed_sets) if np.isscalar(k) else list(k)
+        genre_sets = genre_sets if genre_sets is not None else [None] * len(seed_sets)
+        with metrics.timer('hybrid.candidates'):
+            scores = self.source_scores(seed_sets, weight_sets)
+            seed_row_sets = [self.feature_index.rows_for(seed_ids) if exclude_seeds else np.empty(0, dtype=np.int64)
+                             for seed_ids in seed_sets]
+            rows = self.candidate_rows(scores, seed_row_sets, genre_sets)
+        # 요청당 평균 후보 수 = hybrid.candidate_rows / hybrid.requests
+        metrics.incr('hybrid.requests', len(seed_sets))
+        metrics.incr('hybrid.candidate_rows', int(np.count_nonzero(rows >= 0)))
+        with metrics.timer('hybrid.rerank'):
+            blended = self.blend(scores, rows)
+        with metrics.timer('hybrid.mmr'):
+            picked_rows, picked_scores = self.diversify(rows, blended, max(ks))
+        results = []
+        for i, n in enumerate(ks):
+            keep = picked_rows[i, :n] >= 0
+            results.append([(int(self.movie_ids[row]), float(score))
+                            for row, score in zip(picked_rows[i, :n][keep], picked_scores[i, :n][keep])])
+        return results
+
+
+def _canonical(matrix):
+    # 중복 항목을 합치고 행마다 열 번호를 정렬한 CSR (_gather의 이진 탐색에 필요)
+    matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+    matrix.sum_duplicates()
+    return matrix
+
+
+def _row_entries(matrix, i):
+    # CSR 행 i의 (열 번호, 값) (복사 없음)
+    start, end = matrix.indptr[i], matrix.indptr[i + 1]
+    return matrix.indices[start:end], matrix.data[start:end]
+
+
+def _gather(matrix, rows):
+    # 묶음마다 후보 행 번호 자리의 점수 -> (묶음 수 x 후보 자리), 항목이 없거나 빈 자리(-1)는 0
+    values = np.zeros(rows.shape, dtype=np.float32)
+    for i in range(rows.shape[0]):
+        cols, data = _row_entries(matrix, i)
+        if len(cols) == 0:
+            continue
+        pos = np.minimum(np.searchsorted(cols, rows[i]), len(cols) - 1)
+        hit = (rows[i] >= 0) & (cols[pos] == rows[i])
+        values[i, hit] = data[pos[hit]]
+    return values
+
+
+def load_hybrid(core, **options):
+    # RecommenderCore의 특징 인덱스, ItemCF, 스냅숏(평점 수/평균, 태그 집계)으로 만듦
+    if core.snapshot is None:
+        raise ValueError("하이브리드 추천에는 영화 스냅숏이 필요합니다.")
+    columns = core.snapshot.arrays
+    # 평점 수/평균, 태그 집계는 스냅숏 행 순서이므로 특징 인덱스와 같은 영화 순서인지 확인
+    if not np.array_equal(columns['movie_ids'], core.feature_index.movie_ids):
+        raise ValueError("스냅숏과 특징 인덱스의 영화 순서가 다릅니다.")
+    tags = tag_matrix(columns['tag_indptr'], columns['tag_ids'], columns['tag_counts'], len(core.snapshot.tag_vocab))
+    return HybridRanker(core.feature_index, tags, core.scorer('item_cf'), columns['rating_count'],
+                        columns['rating_avg'], core.catalog.genre_masks, **options)
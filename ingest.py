@@ -0,0 +1,208 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+import db
+from db import DB_PATH, get_engine
+from createdb.build import to_date
+from feature_index import FeatureIndex, index_path_for, update_tag_features
+from item_cf import ItemCF, neighbors_path_for, load_rater_matrix, mean_center, update_neighbors, build_item_cf
+from als import ALSModel, model_dir_for
+from user_index import UserIndex, user_index_path_for
+from embeddings import EmbeddingIndex, build_embedding_index, embedding_path_for, update_embeddings
+from snapshot import snapshot_dir_for, write_snapshot
+
+# 사용법: python ingest.py ratings new_ratings.csv  /  python ingest.py tags new_tags.csv
+# CSV 형식은 data/ratings.csv, data/tags.csv와 같음 (timestamp는 유닉스 시간)
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+# 같은 (userId, movieId) 평점은 새 값으로 교체하고, 교체된 이전 평점을 집계에서 빼기 위해 함께 조회
+_CREATE_INCOMING = text('CREATE TEMP TABLE IF NOT EXISTS incoming_ratings '
+                        '("userId" INTEGER, "movieId" INTEGER, rating REAL, timestamp TEXT)')
+_INSERT_INCOMING = text('INSERT INTO incoming_ratings VALUES (:userId, :movieId, :rating, :timestamp)')
+_REPLACED_RATINGS = text('SELECT r."movieId", r.rating FROM incoming_ratings i '
+                         'JOIN ratings r ON r."userId" = i."userId" AND r."movieId" = i."movieId"')
+_UPSERT_RATINGS = text('INSERT OR REPLACE INTO ratings ("userId", "movieId", rating, timestamp) '
+                       'SELECT "userId", "movieId", rating, timestamp FROM incoming_ratings')
+_CLEAR_INCOMING = text('DELETE FROM incoming_ratings')
+
+# 평점 합계/개수 변화량을 기존 집계에 더해 평균을 다시 계산
+_UPDATE_AGGREGATES = text(
+    'UPDATE movies SET '
+    'rating_avg = CASE WHEN COALESCE(rating_count, 0) + :count_delta > 0 THEN '
+    '(COALESCE(rating_avg, 0) * COALESCE(rating_count, 0) + :sum_delta) / (COALESCE(rating_count, 0) + :count_delta) '
+    'END, '
+    'rating_count = COALESCE(rating_count, 0) + :count_delta '
+    'WHERE "movieId" = :movieId')
+_INSERT_TAG = text('INSERT INTO tags ("userId", "movieId", tag, timestamp) VALUES (:userId, :movieId, :tag, :timestamp)')
+
+
+def _prepare(events, columns):
+    events = pd.DataFrame(events)[columns].copy()
+    if np.issubdtype(events['timestamp'].dtype, np.number):
+        events['timestamp'] = to_date(events['timestamp'])
+    return events
+
+
+def ingest_ratings(events, db_path=DB_PATH):
+    # 평점 이벤트를 한 트랜잭션으로 추가하고 movies의 rating_count/rating_avg를 변화량만큼 갱신
+    # 반환값: 평점이 바뀐 movieId, userId 목록 (추천 산출물 갱신에 사용)
+    events = _prepare(events, ['userId', 'movieId', 'rating', 'timestamp'])
+    # 같은 배치 안에서 같은 (userId, movieId)가 여러 번 나오면 마지막 값만 사용
+    events = events.drop_duplicates(['userId', 'movieId'], keep='last')
+    if events.empty:
+        return [], []
+    with get_engine(db_path).begin() as conn:
+        conn.execute(_CREATE_INCOMING)
+        conn.execute(_CLEAR_INCOMING)
+        conn.execute(_INSERT_INCOMING, events.to_dict('records'))
+        replaced = pd.DataFrame(conn.execute(_REPLACED_RATINGS).fetchall(), columns=['movieId', 'rating'])
+        conn.execute(_UPSERT_RATINGS)
+        conn.execute(_CLEAR_INCOMING)
+
+        added = events.groupby('movieId')['rating'].agg(['sum', 'count'])
+        removed = replaced.groupby('movieId')['rating'].agg(['sum', 'count'])
+        delta = added.sub(removed, fill_value=0)
+        conn.execute(_UPDATE_AGGREGATES, [
+            {'movieId': int(movie_id), 'sum_delta': float(row['sum']), 'count_delta': int(row['count'])}
+            for movie_id, row in delta.iterrows()
+        ])
+    return events['movieId'].unique().tolist(), events['userId'].unique().tolist()
+
+
+def ingest_tags(events, db_path=DB_PATH):
+    # 태그 이벤트를 한 트랜잭션으로 추가, 반환값: 태그가 바뀐 movieId 목록
+    events = _prepare(events, ['userId', 'movieId', 'tag', 'timestamp'])
+    if events.empty:
+        return []
+    with get_engine(db_path).begin() as conn:
+        conn.execute(_INSERT_TAG, events.to_dict('records'))
+    return events['movieId'].unique().tolist()
+
+
+def _save_atomic(model, path):
+    # 임시 파일에 저장한 뒤 교체 (읽는 쪽이 반쯤 쓰인 파일을 보지 않도록)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        model.save(f)
+    os.replace(tmp_path, path)
+
+
+def _movies_with_tags(movie_ids, db_path):
+    # 영화들의 (movieId, 제목, 장르) 표와 전체 태그 (movieId, 태그) 표
+    movies = db.get_movies(movie_ids, db_path)
+    movies_df = pd.DataFrame([(movie_id, row['title'], row['genres']) for movie_id, row in sorted(movies.items())],
+                             columns=['movieId', 'title', 'genres'])
+    tags = db.get_tags_for_movies(movie_ids, db_path)
+    tags_df = pd.DataFrame([(movie_id, tag) for movie_id, movie_tags in tags.items() for tag in movie_tags],
+                           columns=['movieId', 'tag'])
+    return movies_df, tags_df
+
+
+def _touch(path):
+    # 이번 반영과 무관한 산출물은 파일 시각만 갱신해 최신 상태로 표시 (다음 로드 때 전체 재생성하지 않도록)
+    if os.path.exists(path):
+        os.utime(path)
+
+
+def update_artifacts(movie_ids=(), user_ids=(), tagged_movie_ids=(), db_path=DB_PATH):
+    # DB 커밋 후 디스크에 있는 추천 산출물만 부분 갱신 (평점 반영: 평점 관련 산출물, 태그 반영: 태그 관련 산출물)
+    # (여기서 실패하면 산출물이 DB보다 오래된 것으로 남아 다음 로드 때 전체 재생성됨)
+    updated = []
+
+    # 장르/태그 특징 인덱스: 태그 특징 열이 있는 인덱스만 태그가 바뀐 영화 행을 교체
+    # (기본으로 만드는 장르 전용 인덱스는 태그와 무관하므로 다시 쓰지 않음)
+    index_path = index_path_for(db_path)
+    index = FeatureIndex.load(index_path) if tagged_movie_ids and os.path.exists(index_path) else None
+    if index is not None and index.has_tags:
+        _, tags_df = _movies_with_tags(tagged_movie_ids, db_path)
+        _save_atomic(update_tag_features(index, tags_df), index_path)
+        updated.append('feature_index')
+    else:
+        _touch(index_path)
+
+    # 이웃 목록: 바뀐 영화를 평가한 사용자의 평점만 읽어 해당 영화의 이웃을 다시 계산 (근사)
+    # 평균이 바뀐 사용자가 오차 예산(item_cf.REBUILD_FRACTION)을 넘으면 전체를 다시 생성 (노름이 없는 이전 파일도)
+    neighbors_path = neighbors_path_for(db_path)
+    if movie_ids and os.path.exists(neighbors_path):
+        model = ItemCF.load(neighbors_path)
+        if model.needs_rebuild(len(user_ids)):
+            model = build_item_cf(get_engine(db_path), n_neighbors=model.neighbors.shape[1])
+        else:
+            matrix = load_rater_matrix(db_path, model.movie_ids, movie_ids)
+            model = update_neighbors(model, mean_center(matrix), movie_ids, raters_only=True)
+            model.stale_users += len(user_ids)
+        _save_atomic(model, neighbors_path)
+        updated.append('item_cf')
+    else:
+        _touch(neighbors_path)
+
+    model_dir = model_dir_for(db_path)
+    if user_ids and os.path.exists(os.path.join(model_dir, 'meta.json')):
+        histories = db.get_ratings_for_users(user_ids, db_path)
+        model = ALSModel.load(model_dir)
+        model.fold_in_users(user_ids, [histories[int(u)] for u in user_ids]).save(model_dir)
+        updated.append('als')
+    else:
+        _touch(os.path.join(model_dir, 'meta.json'))
+
+    # 사용자 평점 이력 인덱스: 평점이 바뀐 사용자 구간만 교체
+    user_index_path = user_index_path_for(db_path)
+    if user_ids and os.path.exists(user_index_path):
+        histories = db.get_ratings_for_users(user_ids, db_path)
+        _save_atomic(UserIndex.load(user_index_path).updated(histories), user_index_path)
+        updated.append('user_index')
+    else:
+        _touch(user_index_path)
+
+    # 콘텐츠 임베딩: 장르/태그/제목으로만 만들므로 평점과 무관
+    # 태그가 바뀐 영화만 저장된 SVD 기저에 다시 투영하고 가장 가까운 IVF 군집에 배정 (기저/군집은 그대로)
+    # (특징 구성이 없는 이전 파일은 한 번 전체 생성)
+    embedding_path = embedding_path_for(db_path)
+    if tagged_movie_ids and os.path.exists(embedding_path):
+        index = EmbeddingIndex.load(embedding_path)
+        if index.features is None:
+            index = build_embedding_index(get_engine(db_path))
+        else:
+            movies_df, tags_df = _movies_with_tags(tagged_movie_ids, db_path)
+            index = update_embeddings(index, movies_df, tags_df)
+        _save_atomic(index, embedding_path)
+        updated.append('embedding')
+    else:
+        _touch(embedding_path)
+
+    # 영화 목록/평점 집계/태그 집계 스냅숏은 통째로 다시 씀 (movies, links, 태그 집계만 읽으므로 빠름)
+    if (movie_ids or tagged_movie_ids) and os.path.exists(snapshot_dir_for(db_path)):
+        write_snapshot(db_path)
+        updated.append('snapshot')
+    return updated
+
+
+def ingest_file(path, kind, db_path=DB_PATH, chunk_size=DEFAULT_CHUNK_SIZE, artifacts=True):
+    # CSV를 청크마다 한 트랜잭션으로 넣고, 산출물은 마지막에 한 번만 갱신
+    movie_ids, user_ids, tagged_movie_ids = set(), set(), set()
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        if kind == 'ratings':
+            movies_changed, users_changed = ingest_ratings(chunk, db_path)
+            movie_ids.update(movies_changed)
+            user_ids.update(users_changed)
+        else:
+            tagged_movie_ids.update(ingest_tags(chunk, db_path))
+    if not artifacts:
+        return []
+    return update_artifacts(sorted(movie_ids), sorted(user_ids), sorted(tagged_movie_ids), db_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='새 평점/태그를 data.db와 추천 산출물에 증분 반영합니다.')
+    parser.add_argument('kind', choices=['ratings', 'tags'])
+    parser.add_argument('path')
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--no-artifacts', action='store_true', help='DB만 갱신')
+    args = parser.parse_args()
+
+    updated = ingest_file(args.path, args.kind, args.db, args.chunk_size, not args.no_artifacts)
+    print(f"반영 완료 (갱신된 산출물: {', '.join(updated) if updated else '없음'})")
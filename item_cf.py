@@ -0,0 +1,284 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+import db
+from db import DB_PATH, get_engine
+from feature_index import seed_selector
+
+# 이웃 목록 파일 이름
+NEIGHBORS_FILE = 'item_neighbors.npz'
+
+# 영화당 보관할 이웃 수, 한 번에 계산할 영화 블록 크기, 공동 평가 수 축소 계수
+DEFAULT_NEIGHBORS = 50
+DEFAULT_BLOCK_SIZE = 512
+DEFAULT_SHRINKAGE = 10.0
+RATINGS_CHUNK_SIZE = 1_000_000
+
+# 증분 갱신은 근사 (update_neighbors 참고): 전체 생성 이후 증분 갱신으로 평균이 바뀐 사용자 수가
+# 전체 생성 때 사용자 수의 이 비율을 넘으면 다음 반영 때 전체를 다시 생성해 오차를 없앰
+REBUILD_FRACTION = 0.05
+
+
+def neighbors_path_for(db_path=DB_PATH):
+    # 이웃 목록 파일은 data.db 옆에 저장
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), NEIGHBORS_FILE)
+
+
+class ItemCF:
+    # 영화별 상위 N개 이웃(행 번호, 유사도)을 고정 크기 배열로 들고 있는 아이템 기반 협업 필터링 모델
+    # norms는 영화별 중심화 평점 벡터의 노름 (증분 갱신 때 전체 평점을 다시 읽지 않도록 보관, 이전 파일에는 없음)
+    # built_users는 전체 생성 때 사용자 수, stale_users는 그 뒤 증분 갱신으로 평균이 바뀐 사용자 수 (누적, 중복 포함)
+    def __init__(self, movie_ids, neighbors, similarities, norms=None, built_users=0, stale_users=0):
+        self.movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        self.neighbors = np.asarray(neighbors, dtype=np.int32)
+        self.similarities = np.asarray(similarities, dtype=np.float32)
+        self.norms = None if norms is None else np.asarray(norms, dtype=np.float32)
+        self.built_users = int(built_users)
+        self.stale_users = int(stale_users)
+        self.row_of = {int(movie_id): row for row, movie_id in enumerate(self.movie_ids)}
+        self._neighbor_matrix = None
+
+    def __len__(self):
+        return len(self.movie_ids)
+
+    def rows_for(self, movie_ids):
+        return np.array([self.row_of[int(m)] for m in movie_ids if int(m) in self.row_of], dtype=np.int64)
+
+    def needs_rebuild(self, n_users, fraction=REBUILD_FRACTION):
+        # n_users명의 평점을 더 반영하면 증분 갱신 오차 예산을 넘는지 (노름이 없는 이전 파일도 전체 생성)
+        return self.norms is None or self.stale_users + n_users > fraction * self.built_users
+
+    def similarity(self, movie_ids, weights=None):
+        # 선택된 영화들의 이웃 목록을 모아 더하기 (gather-and-sum)
+        scores = np.zeros(len(self), dtype=np.float32)
+        known = [int(m) in self.row_of for m in movie_ids]
+        rows = self.rows_for(movie_ids)
+        if len(rows) == 0:
+            return scores
+        sims = self.similarities[rows]
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float32)[np.array(known, dtype=bool)]
+            sims = sims * weights[:, None]
+        np.add.at(scores, self.neighbors[rows].ravel(), sims.ravel())
+        return scores
+
+    def neighbor_matrix(self):
+        # 이웃 목록을 (영화 x 영화) 희소 행렬로 펼친 것 (처음 쓸 때 한 번만 만듦)
+        # 행마다 이웃 수가 같으므로 indptr만 만들고 이웃/유사도 배열은 복사 없이 그대로 사용
+        if self._neighbor_matrix is None:
+            n_rows, n_neighbors = self.neighbors.shape
+            indptr = np.arange(0, n_rows * n_neighbors + 1, n_neighbors, dtype=np.int32)
+            self._neighbor_matrix = sparse.csr_matrix(
+                (self.similarities.reshape(-1), self.neighbors.reshape(-1), indptr), shape=(n_rows, len(self)))
+        return self._neighbor_matrix
+
+    def similarity_batch(self, seed_sets, weight_sets=None):
+        # 여러 선택 영화 묶음의 점수를 희소 선택 행렬 x 이웃 행렬 곱 한 번으로 계산 -> (묶음 수 x 영화 수)
+        return np.asarray(self.similarity_sparse(seed_sets, weight_sets).todense(), dtype=np.float32)
+
+    def similarity_sparse(self, seed_sets, weight_sets=None):
+        # similarity_batch를 밀집 행렬로 펼치기 전의 희소 행렬 (선택 영화의 이웃 목록에 없는 영화는 항목 없음)
+        selector = seed_selector(seed_sets, self.row_of, len(self), weight_sets, mean=False)
+        return sparse.csr_matrix(selector @ self.neighbor_matrix(), dtype=np.float32)
+
+    def save(self, path):
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as npz:
+            return cls.from_arrays(npz)
+
+    def to_arrays(self):
+        arrays = {'movie_ids': self.movie_ids, 'neighbors': self.neighbors, 'similarities': self.similarities}
+        if self.norms is not None:
+            arrays.update(norms=self.norms, built_users=np.array(self.built_users),
+                          stale_users=np.array(self.stale_users))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        if 'norms' not in arrays:
+            return cls(arrays['movie_ids'], arrays['neighbors'], arrays['similarities'])
+        return cls(arrays['movie_ids'], arrays['neighbors'], arrays['similarities'], arrays['norms'],
+                   int(arrays['built_users']) if 'built_users' in arrays else 0,
+                   int(arrays['stale_users']) if 'stale_users' in arrays else 0)
+
+
+def load_rating_matrix(engine, movie_ids, chunk_size=RATINGS_CHUNK_SIZE):
+    # ratings 테이블을 청크 단위로 읽어 (사용자 x 영화) 희소 행렬 생성
+    # 사용자 행 번호는 먼저 DISTINCT userId로 고정해 두고 청크마다 CSR 조각을 만들어 더함
+    # (청크의 원시 열을 모두 모아 두지 않으므로 추가 메모리는 청크 하나 + 결과 행렬 수준)
+    row_of = pd.Series(np.arange(len(movie_ids), dtype=np.int32), index=movie_ids)
+    user_ids = pd.read_sql('SELECT DISTINCT userId FROM ratings ORDER BY userId', engine)['userId'].to_numpy(
+        dtype=np.int64)
+    shape = (len(user_ids), len(movie_ids))
+    matrix = sparse.csr_matrix(shape, dtype=np.float32)
+    for chunk in pd.read_sql('SELECT userId, movieId, rating FROM ratings', engine, chunksize=chunk_size):
+        chunk = chunk[chunk['movieId'].astype(np.int64).isin(row_of.index)]
+        user_rows = np.searchsorted(user_ids, chunk['userId'].to_numpy(dtype=np.int64))
+        items = row_of[chunk['movieId'].astype(np.int64)].to_numpy()
+        matrix = matrix + sparse.csr_matrix((chunk['rating'].to_numpy(dtype=np.float32), (user_rows, items)),
+                                            shape=shape, dtype=np.float32)
+    # 목록에 없는 영화만 평가한 사용자는 행에서 뺌
+    rated = np.diff(matrix.indptr) > 0
+    if not rated.all():
+        matrix, user_ids = matrix[rated], user_ids[rated]
+    return matrix, user_ids
+
+
+def load_rater_matrix(db_path, movie_ids, changed_movie_ids):
+    # 바뀐 영화를 평가한 사용자들의 전체 평점 이력만 읽어 (해당 사용자 x 영화) 희소 행렬 생성
+    # 바뀐 영화와 다른 영화 사이의 유사도/공동 평가 수에는 이 사용자들만 기여하므로 ratings 테이블 전체를 읽지 않아도 됨
+    row_of = pd.Series(np.arange(len(movie_ids), dtype=np.int32), index=movie_ids)
+    user_ids = db.get_raters(changed_movie_ids, db_path)
+    histories = db.get_ratings_for_users(user_ids, db_path)
+    users, items, values = [], [], []
+    for user_row, user_id in enumerate(user_ids):
+        rated, rating = histories[int(user_id)]
+        known = np.isin(rated, row_of.index)
+        users.append(np.full(int(known.sum()), user_row))
+        items.append(row_of[rated[known]].to_numpy())
+        values.append(rating[known])
+    users = np.concatenate(users) if users else np.empty(0, dtype=np.int64)
+    items = np.concatenate(items) if items else np.empty(0, dtype=np.int32)
+    values = np.concatenate(values) if values else np.empty(0, dtype=np.float32)
+    return sparse.csr_matrix((values, (users, items)), shape=(len(user_ids), len(movie_ids)), dtype=np.float32)
+
+
+def item_norms(centered):
+    # 영화별 중심화 평점 벡터의 노름
+    centered = sparse.csc_matrix(centered)
+    return np.sqrt(np.asarray(centered.multiply(centered).sum(axis=0)).ravel()).astype(np.float32)
+
+
+def mean_center(matrix):
+    # 사용자별 평균 평점을 빼서 평가 성향 차이 제거 (관측된 값에만 적용)
+    matrix = matrix.tocsr(copy=True)
+    counts = np.diff(matrix.indptr)
+    sums = np.asarray(matrix.sum(axis=1)).ravel()
+    means = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+    matrix.data -= np.repeat(means, counts).astype(np.float32)
+    return matrix
+
+
+class SimilarityBlocks:
+    # 중심화된 평점 행렬에서 영화 블록 x 전체 영화 유사도를 계산하는 데 필요한 행렬을 한 번만 준비
+    # norms를 주면 영화별 노름을 행렬에서 계산하지 않고 그 값을 사용 (일부 사용자만 담은 행렬로 갱신할 때)
+    def __init__(self, centered, shrinkage=DEFAULT_SHRINKAGE, norms=None):
+        self.item_user = sparse.csr_matrix(centered.T, dtype=np.float32)
+        self.user_item = self.item_user.T.tocsc()
+        self.binary = self.item_user.copy()
+        self.binary.data[:] = 1.0
+        self.binary_t = self.binary.T.tocsc()
+        if norms is None:
+            norms = np.sqrt(np.asarray(self.item_user.multiply(self.item_user).sum(axis=1)).ravel()).astype(np.float32)
+        self.inv_norms = np.zeros_like(norms)
+        np.divide(1.0, norms, out=self.inv_norms, where=norms > 0)
+        self.shrinkage = shrinkage
+        self.n_items = self.item_user.shape[0]
+
+    def block(self, rows):
+        # 조정 코사인 유사도 (자기 자신은 -inf)
+        rows = np.asarray(rows)
+        block = (self.item_user[rows] @ self.user_item).toarray()
+        block *= self.inv_norms[rows, None]
+        block *= self.inv_norms[None, :]
+        # 공동 평가 수가 적은 쌍은 유사도를 줄임
+        if self.shrinkage > 0:
+            co_counts = (self.binary[rows] @ self.binary_t).toarray()
+            block *= co_counts / (co_counts + self.shrinkage)
+        block[np.arange(len(rows)), rows] = -np.inf
+        return block
+
+
+def _top_neighbors(block, n_neighbors):
+    top = np.argpartition(-block, n_neighbors - 1, axis=1)[:, :n_neighbors]
+    top_sims = np.take_along_axis(block, top, axis=1)
+    order = np.argsort(-top_sims, axis=1)
+    # 음수 유사도 이웃은 점수에 기여하지 않도록 0으로
+    return np.take_along_axis(top, order, axis=1), np.maximum(np.take_along_axis(top_sims, order, axis=1), 0)
+
+
+def build_neighbors(centered, n_neighbors=DEFAULT_NEIGHBORS, block_size=DEFAULT_BLOCK_SIZE,
+                    shrinkage=DEFAULT_SHRINKAGE):
+    # 영화 블록 단위로 유사도를 계산해 상위 N개만 남김 (메모리는 block_size x 영화 수로 제한)
+    blocks = SimilarityBlocks(centered, shrinkage)
+    n_items = blocks.n_items
+    n_neighbors = min(n_neighbors, max(n_items - 1, 1))
+    neighbors = np.zeros((n_items, n_neighbors), dtype=np.int32)
+    similarities = np.zeros((n_items, n_neighbors), dtype=np.float32)
+    for start in range(0, n_items, block_size):
+        end = min(start + block_size, n_items)
+        neighbors[start:end], similarities[start:end] = _top_neighbors(blocks.block(np.arange(start, end)),
+                                                                       n_neighbors)
+    return neighbors, similarities
+
+
+def update_neighbors(model, centered, movie_ids, block_size=DEFAULT_BLOCK_SIZE, shrinkage=DEFAULT_SHRINKAGE,
+                     raters_only=False):
+    # 평점이 바뀐 영화의 이웃 목록만 다시 계산하고, 다른 영화 목록 속 해당 영화의 유사도도 갱신
+    # raters_only: centered가 바뀐 영화를 평가한 사용자만 담은 행렬(load_rater_matrix)이면 True
+    #   바뀐 영화의 노름만 다시 계산하고 나머지 영화는 저장된 노름을 사용 (model.norms 필요)
+    # 근사: 새 평점으로 사용자 평균이 바뀌면 그 사용자가 평가한 다른 영화의 중심화 값/노름과 그 영화들끼리의 유사도도
+    #   바뀌지만 다시 계산하지 않음 (바뀐 영화가 포함된 쌍만 정확) -> ItemCF.needs_rebuild로 주기적으로 전체 생성
+    rows = model.rows_for(movie_ids)
+    if len(rows) == 0:
+        return model
+    norms = item_norms(centered)
+    if raters_only:
+        if model.norms is None:
+            raise ValueError("영화별 노름이 없는 이웃 목록은 전체 평점 행렬로 갱신해야 합니다.")
+        model.norms[rows] = norms[rows]
+    else:
+        model.norms = norms
+    blocks = SimilarityBlocks(centered, shrinkage, model.norms)
+    n_neighbors = model.neighbors.shape[1]
+    for start in range(0, len(rows), block_size):
+        block_rows = rows[start:start + block_size]
+        block = blocks.block(block_rows)
+        model.neighbors[block_rows], model.similarities[block_rows] = _top_neighbors(block, n_neighbors)
+        for i, row in enumerate(block_rows):
+            # 유사도가 대칭이므로 block[i, j] = sim(j, row): row를 이웃으로 가진 목록은 값 갱신,
+            # 그렇지 않은 목록은 새 유사도가 최솟값보다 크면 교체
+            sims = np.maximum(block[i], 0)
+            has_row = (model.neighbors == row).any(axis=1)
+            has_row[row] = False
+            for other in np.flatnonzero(has_row):
+                model.similarities[other, model.neighbors[other] == row] = sims[other]
+            candidates = np.flatnonzero(~has_row & (sims > model.similarities[:, -1]))
+            candidates = candidates[candidates != row]
+            model.neighbors[candidates, -1] = row
+            model.similarities[candidates, -1] = sims[candidates]
+            for other in np.concatenate([np.flatnonzero(has_row), candidates]):
+                order = np.argsort(-model.similarities[other], kind='stable')
+                model.neighbors[other] = model.neighbors[other, order]
+                model.similarities[other] = model.similarities[other, order]
+    return model
+
+
+def build_item_cf(engine, n_neighbors=DEFAULT_NEIGHBORS, block_size=DEFAULT_BLOCK_SIZE, shrinkage=DEFAULT_SHRINKAGE):
+    # movies 테이블 순서대로 행 번호를 맞춰 특징 인덱스와 같은 행 공간을 사용
+    movie_ids = pd.read_sql('SELECT movieId FROM movies ORDER BY movieId', engine)['movieId'].astype(np.int64)
+    movie_ids = movie_ids.drop_duplicates().to_numpy()
+    matrix, _ = load_rating_matrix(engine, movie_ids)
+    centered = mean_center(matrix)
+    neighbors, similarities = build_neighbors(centered, n_neighbors, block_size, shrinkage)
+    return ItemCF(movie_ids, neighbors, similarities, item_norms(centered), built_users=matrix.shape[0])
+
+
+def load_or_build_item_cf(db_path=DB_PATH):
+    # data.db보다 새로운 이웃 목록 파일이 있으면 불러오고, 아니면 새로 만들어 저장
+    path = neighbors_path_for(db_path)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(db_path):
+        return ItemCF.load(path)
+    model = build_item_cf(get_engine(db_path))
+    model.save(path)
+    return model
+
+
+if __name__ == '__main__':
+    model = build_item_cf(get_engine(DB_PATH))
+    model.save(neighbors_path_for(DB_PATH))
+    print(f"이웃 목록 저장 완료: {len(model)}편, 영화당 이웃 {model.neighbors.shape[1]}개")
@@ -0,0 +1,179 @@
+import os
+import io
+import sys
+import json
+import time
+import bisect
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+# 히스토그램 구간 경계 (초): 1µs부터 2^(1/4)배씩 약 100초까지 (구간마다 상대 오차 약 19%)
+BUCKET_BOUNDS = [1e-6 * 2 ** (i / 4) for i in range(107)]
+
+# 프로파일 보고서에 남길 함수/할당 위치 수
+PROFILE_TOP_N = 50
+
+
+class Histogram:
+    # 고정 로그 구간에 개수만 세는 지연 시간 히스토그램 (기록 비용은 이진 탐색 한 번)
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        # 구간 위쪽 경계로 추정한 q 분위수 (최댓값을 넘지 않음)
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max, self.max)
+        return self.max
+
+    def summary(self):
+        # 밀리초 단위 요약
+        if not self.count:
+            return {'count': 0}
+        return {'count': self.count, 'total_ms': self.total * 1000, 'mean_ms': self.total / self.count * 1000,
+                'min_ms': self.min * 1000, 'p50_ms': self.percentile(50) * 1000,
+                'p90_ms': self.percentile(90) * 1000, 'p99_ms': self.percentile(99) * 1000,
+                'max_ms': self.max * 1000}
+
+
+class Metrics:
+    # 이름별 카운터와 지연 시간 히스토그램 모음 (여러 스레드에서 기록해도 안전)
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+
+    def incr(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def timed(self, name):
+        # 함수 전체 실행 시간을 기록하는 데코레이터
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        with self.lock:
+            return {'pid': os.getpid(), 'uptime': time.time() - self.started, 'counters': dict(self.counters),
+                    'histograms': {name: h.summary() for name, h in sorted(self.histograms.items())}}
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+
+# 프로세스 전체에서 공유하는 기록기
+metrics = Metrics()
+
+
+class _ThreadProfilers:
+    # 세션 중에 시작된 스레드(추천 작업 스레드, 이벤트 루프의 실행기 등)마다 cProfile을 하나씩 켬
+    # cProfile은 Python 3.11까지 켠 스레드만 측정하므로 threading.setprofile로 새 스레드의 첫 호출에서 켜고,
+    # 세션이 끝나면 모든 스레드의 결과를 하나로 합침 (세션 전에 이미 돌고 있던 스레드는 측정하지 못하고,
+    # 다른 스레드의 프로파일러는 밖에서 끌 수 없어 그 스레드가 끝날 때까지 켜져 있음: 세션은 프로세스 전체를 감싸는 용도)
+    # 3.12부터는 cProfile이 sys.monitoring으로 모든 스레드를 함께 측정하므로 스레드별 프로파일러가 필요 없음
+    def __init__(self):
+        self.profilers = []
+        self.lock = threading.Lock()
+
+    def _start_thread(self, frame, event, arg):
+        # 새 스레드의 첫 프로파일 이벤트에서 한 번 불림 (enable 후에는 cProfile이 이벤트를 직접 받음)
+        profiler = cProfile.Profile()
+        with self.lock:
+            self.profilers.append(profiler)
+        profiler.enable()
+
+    def start(self):
+        if sys.version_info < (3, 12):
+            threading.setprofile(self._start_thread)
+
+    def stop(self):
+        threading.setprofile(None)
+        with self.lock:
+            return list(self.profilers)
+
+
+@contextmanager
+def profile_session(output_dir):
+    # 구간 전체를 cProfile(이 스레드와 세션 중 시작된 스레드)과 tracemalloc(전체 할당)으로 감싸고 끝나면 보고서를 씀
+    #   profile-<pid>.pstats (snakeviz 등으로 열기), profile-<pid>.txt (누적 시간 상위 함수),
+    #   tracemalloc-<pid>.txt (할당 위치 상위), metrics-<pid>.json (카운터/히스토그램)
+    os.makedirs(output_dir, exist_ok=True)
+    prefix = os.path.join(output_dir, f'{{}}-{os.getpid()}')
+    tracemalloc.start()
+    threads = _ThreadProfilers()
+    threads.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        thread_profilers = threads.stop()
+        memory = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        text = io.StringIO()
+        stats = pstats.Stats(profiler, stream=text)
+        for thread_profiler in thread_profilers:
+            stats.add(thread_profiler)
+        stats.dump_stats(prefix.format('profile') + '.pstats')
+        stats.sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+        with open(prefix.format('profile') + '.txt', 'w', encoding='utf-8') as f:
+            f.write(text.getvalue())
+        with open(prefix.format('tracemalloc') + '.txt', 'w', encoding='utf-8') as f:
+            f.write(f'current {current / 2**20:.1f} MiB, peak {peak / 2**20:.1f} MiB\n')
+            for stat in memory.statistics('lineno')[:PROFILE_TOP_N]:
+                f.write(f'{stat}\n')
+        metrics.dump(prefix.format('metrics') + '.json')
+        print(f"프로파일 보고서 저장: {output_dir}")
@@ -0,0 +1,71 @@
+import numpy as np
+from title_search import TitleIndex, TitleSearch
+
+# 화면에 체크박스로 표시하는 장르 목록 (비트 위치 = 목록 순서)
+GENRES = [
+    'Action', 'Adventure', 'Animation', "Children", 'Comedy', 'Crime',
+    'Documentary', 'Drama', 'Fantasy', 'Film-Noir', 'Horror', 'Musical',
+    'Mystery', 'Romance', 'Sci-Fi', 'Thriller', 'War', 'Western'
+]
+GENRE_BIT = {genre.lower(): np.uint32(1 << i) for i, genre in enumerate(GENRES)}
+
+
+def genre_bits(genres):
+    # 장르 이름 목록 -> 비트마스크 (목록에 없는 장르는 무시)
+    bits = np.uint32(0)
+    for genre in genres:
+        bits |= GENRE_BIT.get(genre.lower(), np.uint32(0))
+    return bits
+
+
+def genre_bitmask(genre_strings):
+    # '|'로 구분된 장르 문자열 배열 -> 영화별 uint32 비트마스크 배열
+    masks = np.zeros(len(genre_strings), dtype=np.uint32)
+    for row, genres in enumerate(genre_strings):
+        masks[row] = genre_bits(genres.split('|')) if genres else 0
+    return masks
+
+
+def genre_vectors(genre_masks):
+    # 장르 비트마스크 -> 행 정규화된 (영화 수 x 장르 수) 행렬 (목록 내 다양성, MMR 계산용)
+    vectors = ((np.asarray(genre_masks, dtype=np.uint32)[:, None] >> np.arange(len(GENRES), dtype=np.uint32)) & 1)
+    vectors = vectors.astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+class MovieFilter:
+    # 제목 3-gram 색인, 장르 비트마스크, 평점 배열을 미리 계산해 두고 필터마다 불리언 마스크를 만들어 결합
+    def __init__(self, titles, genres, ratings, title_index=None, genre_masks=None):
+        self.title_index = TitleIndex(titles) if title_index is None else title_index
+        self.title_search = TitleSearch(self.title_index)
+        self.genre_masks = genre_bitmask(genres) if genre_masks is None else genre_masks
+        self.ratings = np.asarray(ratings)
+
+    def __len__(self):
+        return len(self.genre_masks)
+
+    def title_mask(self, search_text):
+        if not search_text.strip():
+            return np.ones(len(self), dtype=bool)
+        return self.title_search.mask(search_text)
+
+    def genre_mask(self, genres):
+        # 선택된 장르를 모두 포함하는 영화
+        required = genre_bits(genres)
+        return (self.genre_masks & required) == required
+
+    def rating_mask(self, min_rating, max_rating):
+        # 평점이 없는 영화(NaN)는 범위 비교에서 자동으로 제외됨
+        # 경계값은 평점 배열과 같은 자료형(float32)으로 바꿔 비교: float64 3.6과 비교하면 float32 3.6(3.5999999...)이 빠짐
+        to_dtype = self.ratings.dtype.type
+        with np.errstate(invalid='ignore'):
+            return (self.ratings >= to_dtype(min_rating)) & (self.ratings <= to_dtype(max_rating))
+
+    def mask(self, search_text='', genres=None, rating_range=None):
+        mask = self.title_mask(search_text)
+        if genres:
+            mask &= self.genre_mask(genres)
+        if rating_range is not None:
+            mask &= self.rating_mask(*rating_range)
+        return mask
@@ -0,0 +1,102 @@
+import numpy as np
+from PyQt5.QtCore import Qt, QAbstractTableModel, QAbstractProxyModel, QModelIndex, QVariant
+
+# 표에 표시할 열 제목
+HEADERS = ['Title', 'Genres', 'Avg Rating']
+
+
+class MovieTableModel(QAbstractTableModel):
+    # 공유 Catalog의 열 배열을 바탕으로 Qt가 그리려는 셀만 그때그때 만들어 주는 영화 목록 모델 (복사 없음)
+    def __init__(self, catalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.movie_ids = catalog.movie_ids
+        self.titles = catalog.titles
+        self.genres = catalog.genres
+        self.ratings = catalog.ratings
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.movie_ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return QVariant()
+        row, column = index.row(), index.column()
+        if column == 0:
+            return self.titles[row]
+        if column == 1:
+            return self.genres[row]
+        rating = self.ratings[row]
+        # 소수점 둘째 자리에서 반올림, 평점 평균이 없으면 빈 문자열
+        return '' if np.isnan(rating) else str(round(float(rating), 2))
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return QVariant()
+        if orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return str(section + 1)
+
+    def flags(self, index):
+        # 편집 불가능하도록 설정
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def movie_id(self, row):
+        return int(self.movie_ids[row])
+
+    def title(self, row):
+        return self.titles[row]
+
+
+class MovieFilterProxyModel(QAbstractProxyModel):
+    # 필터 결과(보이는 행 번호 배열)만 원본 모델에 연결해 보여 주는 프록시 모델
+    def __init__(self, source_model, parent=None):
+        super().__init__(parent)
+        self.setSourceModel(source_model)
+        self.visible_rows = np.arange(source_model.rowCount(), dtype=np.int64)
+
+    def set_mask(self, mask):
+        # 보이는 행 집합을 한 번에 교체 (뷰는 한 번만 갱신됨)
+        self.beginResetModel()
+        self.visible_rows = np.flatnonzero(mask)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.visible_rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.sourceModel().columnCount()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < len(self.visible_rows)):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        # 인자가 없으면 QObject의 부모 객체, 있으면 (평평한 표이므로) 빈 인덱스
+        if index is None:
+            return super().parent()
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(int(self.visible_rows[proxy_index.row()]), proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        row = int(np.searchsorted(self.visible_rows, source_index.row()))
+        if row >= len(self.visible_rows) or self.visible_rows[row] != source_index.row():
+            return QModelIndex()
+        return self.createIndex(row, source_index.column())
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Vertical and role == Qt.DisplayRole and section < len(self.visible_rows):
+            return str(int(self.visible_rows[section]) + 1)
+        return self.sourceModel().headerData(section, orientation, role)
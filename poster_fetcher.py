@@ -0,0 +1,160 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from metrics import metrics
+
+# TMDb API / 이미지 서버 주소 (테스트 시 로컬 스텁 서버 주소로 바꿀 수 있음)
+TMDB_API_BASE = 'https://api.themoviedb.org/3'
+TMDB_IMAGE_BASE = 'https://image.tmdb.org/t/p'
+
+# 상세 정보 창 포스터 폭(300px)에 맞는 TMDb 이미지 크기
+POSTER_SIZE = 'w342'
+
+# 캐시 설정: 디스크 캐시 디렉터리 이름과 최대 용량, 메모리 캐시 항목 수
+CACHE_DIR = 'poster_cache'
+DISK_CACHE_BYTES = 200 * 1024 * 1024
+MEMORY_METADATA_ITEMS = 1024
+MEMORY_POSTER_ITEMS = 64
+REQUEST_TIMEOUT = 10
+
+
+class LRUCache:
+    # 스레드 안전한 최근 사용 순 메모리 캐시
+    def __init__(self, max_items):
+        self.max_items = max_items
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.items:
+                return None
+            self.items.move_to_end(key)
+            return self.items[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+
+
+class DiskCache:
+    # 용량 제한이 있는 파일 캐시 (넘치면 가장 오래 쓰지 않은 파일부터 삭제)
+    def __init__(self, directory, max_bytes=DISK_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # 최근 사용 시각 갱신
+            return data
+        except OSError:
+            return None
+
+    def put(self, key, data):
+        path = self._path(key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        with self.lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+
+class PosterFetcher:
+    # 스레드 풀에서 TMDb 메타데이터와 포스터를 가져오는 백그라운드 조회기 (HTTP 세션 공유, 2단계 캐시)
+    def __init__(self, api_key, cache_dir=CACHE_DIR, api_base=TMDB_API_BASE, image_base=TMDB_IMAGE_BASE,
+                 poster_size=POSTER_SIZE, max_workers=4, disk_bytes=DISK_CACHE_BYTES, session=None):
+        self.api_key = api_key
+        self.api_base = api_base.rstrip('/')
+        self.image_base = image_base.rstrip('/')
+        self.poster_size = poster_size
+        self.session = session if session is not None else requests.Session()
+        self.metadata_cache = LRUCache(MEMORY_METADATA_ITEMS)
+        self.poster_cache = LRUCache(MEMORY_POSTER_ITEMS)
+        self.disk_cache = DiskCache(cache_dir, disk_bytes)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tmdb')
+
+    def poster_url(self, poster_path, size=None):
+        return f'{self.image_base}/{size or self.poster_size}{poster_path}'
+
+    def fetch_metadata(self, tmdb_id):
+        # tmdbId -> 영화 정보 (메모리 -> 디스크 -> 네트워크 순으로 확인)
+        key = f'meta_{int(tmdb_id)}.json'
+        metadata = self.metadata_cache.get(key)
+        if metadata is not None:
+            metrics.incr('tmdb.metadata.memory_hit')
+            return metadata
+        data = self.disk_cache.get(key)
+        if data is not None:
+            metrics.incr('tmdb.metadata.disk_hit')
+            metadata = json.loads(data)
+        else:
+            with metrics.timer('tmdb.metadata.request'):
+                response = self.session.get(f'{self.api_base}/movie/{int(tmdb_id)}',
+                                            params={'api_key': self.api_key}, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            metadata = response.json()
+            self.disk_cache.put(key, json.dumps(metadata).encode('utf-8'))
+        self.metadata_cache.put(key, metadata)
+        return metadata
+
+    def fetch_poster(self, tmdb_id):
+        # tmdbId -> 화면 크기에 맞는 포스터 이미지 바이트 (포스터가 없으면 None)
+        key = f'poster_{self.poster_size}_{int(tmdb_id)}'
+        poster = self.poster_cache.get(key)
+        if poster is not None:
+            metrics.incr('tmdb.poster.memory_hit')
+            return poster
+        poster = self.disk_cache.get(key)
+        if poster is None:
+            poster_path = self.fetch_metadata(tmdb_id).get('poster_path')
+            if not poster_path:
+                return None
+            with metrics.timer('tmdb.poster.request'):
+                response = self.session.get(self.poster_url(poster_path), timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            poster = response.content
+            self.disk_cache.put(key, poster)
+        self.poster_cache.put(key, poster)
+        return poster
+
+    def submit_poster(self, tmdb_id):
+        # 백그라운드에서 포스터를 가져오는 Future 반환
+        return self.executor.submit(self.fetch_poster, tmdb_id)
+
+    def submit_metadata(self, tmdb_id):
+        return self.executor.submit(self.fetch_metadata, tmdb_id)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
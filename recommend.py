@@ -0,0 +1,89 @@
+import numpy as np
+from metrics import metrics
+
+# 기본 추천 개수
+DEFAULT_K = 20
+
+
+def top_k(scores, k, mask=None):
+    # argpartition으로 상위 k개만 골라 점수 내림차순으로 정렬한 행 번호 반환
+    scores = np.asarray(scores)
+    rows = np.arange(len(scores)) if mask is None else np.flatnonzero(mask)
+    if k <= 0 or len(rows) == 0:
+        return np.empty(0, dtype=np.int64)
+    candidate_scores = scores[rows]
+    if k < len(rows):
+        part = np.argpartition(-candidate_scores, k - 1)[:k]
+    else:
+        part = np.arange(len(rows))
+    # 점수가 같으면 행 번호가 작은 쪽 우선 (결과가 매번 같도록)
+    order = np.lexsort((rows[part], -candidate_scores[part]))
+    return rows[part[order]]
+
+
+def top_k_batch(scores, k):
+    # 점수 행렬의 각 행마다 상위 k개 열 번호를 점수 내림차순으로 반환 (행 단위 argpartition)
+    scores = np.asarray(scores)
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if k < scores.shape[1]:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    # top_k와 같이 점수가 같으면 열 번호가 작은 쪽 우선
+    order = np.lexsort((part, -np.take_along_axis(scores, part, axis=1)), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
+def candidate_mask(index, seed_ids=(), genres=None, exclude_seeds=True):
+    # 장르 필터(선택 장르 중 하나라도 포함)와 이미 선택한 영화 제외를 불리언 마스크로 결합
+    if genres:
+        mask = index.genre_mask(genres)
+    else:
+        mask = np.ones(len(index), dtype=bool)
+    if exclude_seeds:
+        seed_rows = index.rows_for(seed_ids)
+        mask[seed_rows] = False
+    return mask
+
+
+def recommend(index, seed_ids, k=DEFAULT_K, genres=None, exclude_seeds=True, scorer=None):
+    # 선택된 영화와 유사한 상위 k개 영화의 (movieId, 점수) 목록
+    # scorer를 주면 (예: ItemCF) 그 모델의 점수를 쓰고, 장르 마스크는 특징 인덱스에서 만든다
+    scorer = index if scorer is None else scorer
+    if not np.array_equal(scorer.movie_ids, index.movie_ids):
+        raise ValueError("scorer와 특징 인덱스의 영화 순서가 다릅니다.")
+    scores = scorer.similarity(seed_ids)
+    # 근사 검색 점수 모델은 후보가 아닌 영화를 -inf로 돌려줌
+    mask = candidate_mask(index, seed_ids, genres, exclude_seeds) & np.isfinite(scores)
+    rows = top_k(scores, k, mask)
+    return [(int(index.movie_ids[row]), float(scores[row])) for row in rows]
+
+
+def recommend_batch(index, seed_sets, k=DEFAULT_K, genre_sets=None, exclude_seeds=True, scorer=None,
+                    weight_sets=None):
+    # 여러 추천 요청을 한 번의 행렬 연산으로 점수화해 요청마다 (movieId, 점수) 목록 반환
+    # k는 정수 하나 또는 요청별 목록, genre_sets는 요청별 장르 목록, weight_sets는 요청별 선택 영화 가중치
+    scorer = index if scorer is None else scorer
+    if not np.array_equal(scorer.movie_ids, index.movie_ids):
+        raise ValueError("scorer와 특징 인덱스의 영화 순서가 다릅니다.")
+    if not seed_sets:
+        return []
+    ks = [k] * len(seed_sets) if np.isscalar(k) else list(k)
+    genre_sets = genre_sets if genre_sets is not None else [None] * len(seed_sets)
+    with metrics.timer('recommend.similarity'):
+        if weight_sets is None:
+            scores = np.array(scorer.similarity_batch(seed_sets), dtype=np.float32)
+        else:
+            scores = np.array(scorer.similarity_batch(seed_sets, weight_sets), dtype=np.float32)
+    with metrics.timer('recommend.rank'):
+        for i, (seed_ids, genres) in enumerate(zip(seed_sets, genre_sets)):
+            scores[i, ~candidate_mask(index, seed_ids, genres, exclude_seeds)] = -np.inf
+        rows = top_k_batch(scores, max(ks))
+    results = []
+    for i, row_ids in enumerate(rows):
+        row_ids = row_ids[:ks[i]]
+        row_ids = row_ids[np.isfinite(scores[i, row_ids])]
+        results.append([(int(index.movie_ids[row]), float(scores[i, row])) for row in row_ids])
+    return results
@@ -0,0 +1,81 @@
+import time
+import threading
+from collections import OrderedDict
+
+# 추천 결과 캐시 기본 설정: 최대 항목 수, 유효 시간(초)
+DEFAULT_MAX_ITEMS = 10_000
+DEFAULT_TTL = 300.0
+
+# 가중치 키의 소수점 자릿수: 차이가 0.00005 미만인 가중치 요청은 같은 키 (결과 차이는 무시할 수준)
+WEIGHT_DECIMALS = 4
+
+
+def cache_key(seed_ids, genres, k, engine, version, weights=None):
+    # 같은 요청이 같은 키가 되도록 정규화 (선택 영화/장르 순서 무시, 장르 대소문자 무시)
+    # 가중치가 정확히 모두 1일 때만 가중치를 주지 않은 요청과 결과가 같으므로 같은 키
+    # (1.00004처럼 반올림하면 1이 되는 가중치는 가중치 키로 남음, 가중치 키끼리만 WEIGHT_DECIMALS 허용 오차 적용)
+    if weights is not None and all(float(w) == 1.0 for w in weights):
+        weights = None
+    if weights is None:
+        seeds = tuple(sorted(int(m) for m in seed_ids))
+    else:
+        seeds = tuple(sorted((int(m), round(float(w), WEIGHT_DECIMALS)) for m, w in zip(seed_ids, weights)))
+    genres = tuple(sorted({g.lower() for g in genres})) if genres else ()
+    return engine, version, int(k), genres, seeds
+
+
+class ResultCache:
+    # 스레드 안전한 LRU + TTL 캐시 (적중/미스/만료/축출 횟수 집계)
+    def __init__(self, max_items=DEFAULT_MAX_ITEMS, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.clock = clock
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.items.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl is not None and self.clock() - stored_at > self.ttl:
+                del self.items[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self.items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.max_items <= 0:
+            return
+        with self.lock:
+            self.items[key] = (self.clock(), value)
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        # 산출물이 바뀌었을 때 전체 비우기 (키에 모델 버전이 들어 있어 이전 결과가 섞이지는 않음)
+        with self.lock:
+            self.items.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'items': len(self.items), 'max_items': self.max_items, 'ttl': self.ttl,
+                    'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0,
+                    'expired': self.expired, 'evictions': self.evictions, 'invalidations': self.invalidations}
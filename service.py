@@ -0,0 +1,395 @@
+import os
+import re
+import json
+import time
+import signal
+import socket
+import asyncio
+import argparse
+import contextlib
+import multiprocessing
+from urllib.parse import urlsplit, parse_qs
+import db
+from db import DB_PATH
+from core import RecommenderCore, ENGINES, DEFAULT_SEARCH_LIMIT
+from recommend import DEFAULT_K
+from artifacts import artifacts_dir_for, current_version, export_artifacts, exported_engines, load_core
+from metrics import metrics, profile_session
+
+# 사용법: python service.py [--host 127.0.0.1] [--port 8000] [--db data.db]
+#         python service.py --workers 4   (산출물 디렉터리를 메모리 매핑으로 공유하는 작업 프로세스 4개)
+#   GET  /recommend?seeds=1,260&k=20&genres=Action,Comedy&engine=content
+#   POST /recommend  {"seeds": [1, 260], "k": 20, "genres": ["Action"], "engine": "item_cf"}
+#   GET  /users/1/recommend?k=20&engine=item_cf   (사용자 평점 이력 기반 맞춤 추천)
+#   GET  /search?q=toy story&limit=20
+#   GET  /movies/1
+#   GET  /health
+#   GET  /metrics   (이 프로세스의 경로별 지연 시간 히스토그램, 카운터)
+
+HOST = '127.0.0.1'
+PORT = 8000
+
+# 추천 요청을 모으는 최대 대기 시간(밀리초)과 한 번에 처리할 최대 요청 수
+BATCH_WINDOW_MS = 5
+MAX_BATCH_SIZE = 64
+
+# 요청 크기 제한
+MAX_K = 100
+MAX_SEEDS = 100
+MAX_BODY_BYTES = 64 * 1024
+
+# 산출물 디렉터리의 CURRENT 변경을 확인하는 간격(초)
+RELOAD_INTERVAL = 1.0
+
+# 지연 시간 기록용 경로 이름 (dispatch가 처리하는 경로만, 나머지는 other로 묶어 히스토그램 수를 고정)
+_ROUTES = [(re.compile(pattern), name) for pattern, name in [
+    (r'/recommend', 'recommend'), (r'/search', 'search'), (r'/users/[^/]+/recommend', 'users.recommend'),
+    (r'/movies/[^/]+', 'movies'), (r'/health', 'health'), (r'/metrics', 'metrics')]]
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class RecommendBatcher:
+    # 동시에 들어온 추천 요청을 짧은 시간 모아 추천 방식별로 한 번의 행렬 연산으로 처리
+    # (점수 계산은 스레드 풀에서 실행해 이벤트 루프가 다른 연결을 계속 받도록 함)
+    def __init__(self, core, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH_SIZE):
+        self.core = core
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.requests = 0
+
+    async def submit(self, seed_ids, k, genres, engine, weights=None):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((engine, seed_ids, k, genres, weights, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # 연결이 끊겨 취소된 요청은 계산하지 않음
+            batch = [item for item in batch if not item[-1].done()]
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[0], []).append(item)
+            for engine, items in groups.items():
+                # 묶음을 시작할 때의 core를 끝까지 사용 (중간에 산출물이 교체돼도 요청이 끊기지 않음)
+                core = self.core
+                try:
+                    results = await loop.run_in_executor(
+                        None, core.recommend_batch, [item[1] for item in items], [item[2] for item in items],
+                        [item[3] for item in items], engine, [item[4] for item in items])
+                except Exception as error:
+                    for item in items:
+                        if not item[-1].done():
+                            item[-1].set_exception(error)
+                    continue
+                for item, result in zip(items, results):
+                    if not item[-1].done():
+                        item[-1].set_result(result)
+                self.batches += 1
+                self.requests += len(items)
+
+
+def _ids(values):
+    try:
+        return [int(v) for v in values if str(v).strip()]
+    except (TypeError, ValueError):
+        raise HTTPError(400, "movieId는 정수여야 합니다.")
+
+
+def _int(value, default, low, high, name):
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{name}는 정수여야 합니다.")
+    if not low <= value <= high:
+        raise HTTPError(400, f"{name}는 {low}~{high} 사이여야 합니다.")
+    return value
+
+
+def _split(value):
+    return [v for v in value.split(',') if v.strip()] if value else []
+
+
+def _genres(value):
+    # 쿼리 문자열('Action,Comedy') 또는 JSON 문자열 목록 -> 장르 목록
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return _split(value)
+    if not isinstance(value, list) or not all(isinstance(genre, str) for genre in value):
+        raise HTTPError(400, "genres는 문자열 목록이어야 합니다.")
+    return value
+
+
+class RecommendService:
+    # asyncio 스트림 위의 최소 HTTP/1.1 JSON 서버 (keep-alive 지원, Qt 불필요)
+    def __init__(self, core, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH_SIZE):
+        self.core = core
+        self.batcher = RecommendBatcher(core, window_ms, max_batch)
+
+    def set_core(self, core):
+        # 새 산출물로 교체 (진행 중인 묶음은 이전 core로 끝나고, 다음 묶음부터 새 core 사용)
+        # 결과 캐시는 이어서 쓰되 이전 버전 결과는 비움 (키에 버전이 있어 늦게 들어온 이전 결과도 적중하지 않음)
+        core.cache = self.core.cache
+        core.cache.invalidate()
+        self.core = core
+        self.batcher.core = core
+
+    async def watch_artifacts(self, root, interval=RELOAD_INTERVAL):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            version = current_version(root)
+            if version is None or version == self.core.version:
+                continue
+            try:
+                core = await loop.run_in_executor(None, load_core, root, version, self.core.db_path)
+            except Exception as error:
+                print(f"[{os.getpid()}] 산출물 {version} 불러오기 실패, 이전 버전 유지: {error!r}")
+                continue
+            self.set_core(core)
+            print(f"[{os.getpid()}] 산출물 {version}(으)로 교체")
+
+    async def recommend(self, params):
+        seeds = params.get('seeds')
+        if seeds is not None and not isinstance(seeds, (str, list)):
+            raise HTTPError(400, "seeds는 movieId 목록이어야 합니다.")
+        seeds = _ids(_split(seeds) if isinstance(seeds, str) else seeds or [])
+        if not seeds:
+            raise HTTPError(400, "seeds가 필요합니다.")
+        if len(seeds) > MAX_SEEDS:
+            raise HTTPError(400, f"seeds는 최대 {MAX_SEEDS}개입니다.")
+        return await self._recommend(seeds, None, params)
+
+    async def recommend_for_user(self, user_id, params):
+        # 사용자의 평점 이력을 가중치 있는 선택 영화로 사용 (이미 본 영화 제외), 다른 요청과 함께 묶어 처리
+        # (첫 호출은 사용자 평점 이력 인덱스를 불러오거나 만들므로 스레드 풀에서 실행)
+        user_id = _ids([user_id])[0]
+        seeds, weights = await asyncio.get_running_loop().run_in_executor(None, self.core.user_seeds, user_id)
+        if len(seeds) == 0:
+            raise HTTPError(404, f"평점 이력이 없는 사용자입니다: {user_id}")
+        return {'userId': user_id, **await self._recommend(seeds, weights, params)}
+
+    async def _recommend(self, seeds, weights, params):
+        genres = _genres(params.get('genres'))
+        k = _int(params.get('k'), DEFAULT_K, 1, MAX_K, 'k')
+        engine = params.get('engine') or 'content'
+        if not isinstance(engine, str) or engine not in ENGINES:
+            raise HTTPError(400, f"engine은 {', '.join(ENGINES)} 중 하나여야 합니다.")
+        results = await self.batcher.submit(seeds, k, genres, engine, weights)
+        return {'engine': engine, 'results': [
+            {'movieId': movie_id, 'title': self.core.catalog.title(movie_id), 'score': score}
+            for movie_id, score in results]}
+
+    async def search(self, params):
+        limit = _int(params.get('limit'), DEFAULT_SEARCH_LIMIT, 1, 1000, 'limit')
+        rows = self.core.search(params.get('q', ''), limit)
+        return {'results': [self.core.movie(row) for row in rows]}
+
+    async def detail(self, movie_id):
+        movie_id = _ids([movie_id])[0]
+        movie = await asyncio.get_running_loop().run_in_executor(None, self.core.detail, movie_id)
+        if movie is None:
+            raise HTTPError(404, f"영화를 찾을 수 없습니다: {movie_id}")
+        return movie
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        path = url.path.rstrip('/') or '/'
+        if path == '/recommend':
+            if method == 'POST':
+                try:
+                    params = json.loads(body or b'{}')
+                except ValueError:
+                    raise HTTPError(400, "JSON 본문을 해석할 수 없습니다.")
+                if not isinstance(params, dict):
+                    raise HTTPError(400, "JSON 본문은 객체여야 합니다.")
+            elif method != 'GET':
+                raise HTTPError(405, "GET 또는 POST만 지원합니다.")
+            return await self.recommend(params)
+        if method != 'GET':
+            raise HTTPError(405, "GET만 지원합니다.")
+        if path == '/search':
+            return await self.search(params)
+        if path.startswith('/users/') and path.endswith('/recommend'):
+            return await self.recommend_for_user(path[len('/users/'):-len('/recommend')], params)
+        if path.startswith('/movies/'):
+            return await self.detail(path[len('/movies/'):])
+        if path == '/health':
+            return {'status': 'ok', 'pid': os.getpid(), 'version': self.core.version, 'movies': len(self.core),
+                    'batches': self.batcher.batches, 'requests': self.batcher.requests,
+                    'cache': self.core.cache.stats()}
+        if path == '/metrics':
+            return metrics.snapshot()
+        raise HTTPError(404, f"경로를 찾을 수 없습니다: {path}")
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                parts = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = (len(parts) == 3 and parts[2] == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+                try:
+                    if len(parts) != 3:
+                        raise HTTPError(400, "잘못된 요청 줄입니다.")
+                    length = int(headers.get('content-length') or 0)
+                    if length > MAX_BODY_BYTES:
+                        keep_alive = False
+                        raise HTTPError(413, "요청 본문이 너무 큽니다.")
+                    body = await reader.readexactly(length) if length else b''
+                    with metrics.timer(f'service.{_route(parts[1])}'):
+                        status, payload = 200, await self.dispatch(parts[0], parts[1], body)
+                except HTTPError as error:
+                    status, payload = error.status, {'error': error.message}
+                except ValueError as error:
+                    status, payload = 400, {'error': str(error)}
+                except Exception as error:
+                    status, payload = 500, {'error': repr(error)}
+                metrics.incr(f'service.status.{status}')
+                self._write(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _write(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f'HTTP/1.1 {status} {_REASONS.get(status, "")}\r\n'
+                f'Content-Type: application/json; charset=utf-8\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+        writer.write(head.encode('latin-1') + body)
+
+    async def serve(self, host=HOST, port=PORT, artifacts_root=None, **kwargs):
+        # kwargs는 asyncio.start_server로 전달 (작업 프로세스는 sock=공유 소켓)
+        tasks = [asyncio.create_task(self.batcher.run())]
+        if artifacts_root is not None:
+            tasks.append(asyncio.create_task(self.watch_artifacts(artifacts_root)))
+        server = await asyncio.start_server(self.handle, host, port, **kwargs)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def _route(target):
+    # 지연 시간 기록용 경로 이름 (/movies/1 -> movies, /users/1/recommend -> users.recommend, 모르는 경로 -> other)
+    path = urlsplit(target).path.rstrip('/') or '/'
+    for pattern, name in _ROUTES:
+        if pattern.fullmatch(path):
+            return name
+    return 'other'
+
+
+def _worker_main(sock, root, db_path, window_ms, max_batch):
+    # 작업 프로세스: 부모가 연 소켓에서 연결을 받고, 산출물은 메모리 매핑으로 공유
+    # 종료는 부모가 terminate()로 알림 (Ctrl+C는 부모만 처리, 부모의 SIGTERM 처리기는 물려받지 않음)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    db.dispose_engines()
+    service = RecommendService(load_core(root, db_path=db_path), window_ms, max_batch)
+    asyncio.run(service.serve(None, None, artifacts_root=root, sock=sock))
+
+
+def serve_workers(host=HOST, port=PORT, workers=None, db_path=DB_PATH, root=None,
+                  window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH_SIZE):
+    # 소켓 하나를 여러 작업 프로세스가 함께 받음 (커널이 연결을 나눠 줌), 죽은 작업 프로세스는 다시 시작
+    root = artifacts_dir_for(db_path) if root is None else root
+    if current_version(root) is None:
+        export_artifacts(db_path, root)
+    # 산출물에 없는 추천 방식은 작업 프로세스에서 400으로 거절되므로 시작할 때 알려 둠
+    print(f"산출물 버전 {current_version(root)}의 추천 방식: {', '.join(['content'] + exported_engines(root))}")
+    workers = workers or os.cpu_count()
+    sock = socket.create_server((host, port), backlog=1024)
+    context = multiprocessing.get_context('fork')
+
+    def start():
+        process = context.Process(target=_worker_main, args=(sock, root, db_path, window_ms, max_batch), daemon=True)
+        process.start()
+        return process
+
+    processes = [start() for _ in range(workers)]
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    try:
+        while not stopping:
+            time.sleep(RELOAD_INTERVAL)
+            processes = [process if process.is_alive() else start() for process in processes]
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        sock.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='영화 추천 HTTP/JSON 서버 (Qt 없이 실행)')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--batch-window-ms', type=float, default=BATCH_WINDOW_MS)
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=0, help='작업 프로세스 수 (0이면 단일 프로세스)')
+    parser.add_argument('--artifacts', default=None, help='산출물 디렉터리 (기본: data.db 옆 artifacts)')
+    parser.add_argument('--profile', default=None, metavar='DIR',
+                        help='종료할 때까지 cProfile/tracemalloc으로 측정해 DIR에 보고서 저장 (단일 프로세스만)')
+    args = parser.parse_args()
+
+    print(f"추천 서버 시작: http://{args.host}:{args.port}")
+    if args.workers:
+        serve_workers(args.host, args.port, args.workers, args.db, args.artifacts,
+                      args.batch_window_ms, args.max_batch)
+    else:
+        service = RecommendService(RecommenderCore(args.db), args.batch_window_ms, args.max_batch)
+        with profile_session(args.profile) if args.profile else contextlib.nullcontext():
+            try:
+                asyncio.run(service.serve(args.host, args.port))
+            except KeyboardInterrupt:
+                pass
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from db import DB_PATH, get_engine
+from catalog import Catalog
+from movie_filter import genre_bitmask
+from title_search import TitleIndex, pack_strings, unpack_strings
+
+# 사용법: python snapshot.py [--db data.db] [--verify]
+# 영화 목록, 링크, 평점 집계, 태그 집계를 열 단위 .npy 파일로 저장한 스냅숏 (data.db 옆 snapshot/)
+# 앱/서버는 시작할 때 DB를 훑지 않고 이 파일들을 메모리 매핑으로 불러옴
+
+SNAPSHOT_DIR = 'snapshot'
+META_FILE = 'meta.json'
+TITLE_INDEX_PREFIX = 'title_index.'
+
+# 스냅숏 형식 버전 (배열 구성이나 지문 계산이 바뀌면 올려서 이전 스냅숏을 다시 만들게 함)
+SNAPSHOT_FORMAT = 2
+
+# data.db 내용 지문: 스냅숏에 담기는 행(영화와 평점 집계 열, 링크, 영화별 태그 개수)을 movieId 순서로 모두 읽어 해시
+# (합계만 비교하면 길이가 같은 제목 수정, 장르 맞바꾸기 등을 놓침, ratings 테이블은 훑지 않음)
+_FINGERPRINT_QUERIES = [
+    'SELECT "movieId", title, genres, rating_count, rating_avg FROM movies ORDER BY "movieId"',
+    'SELECT "movieId", "imdbId", "tmdbId" FROM links ORDER BY "movieId"',
+    'SELECT "movieId", tag, COUNT(*) FROM tags GROUP BY "movieId", tag ORDER BY "movieId", tag',
+    'PRAGMA user_version',
+]
+FINGERPRINT_CHUNK_SIZE = 10_000
+
+
+def snapshot_dir_for(db_path=DB_PATH):
+    # 스냅숏 디렉터리는 data.db 옆에 둠
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), SNAPSHOT_DIR)
+
+
+def db_fingerprint(db_path=DB_PATH):
+    # 스냅숏에 담기는 내용이 바뀌면 달라지는 data.db 지문 (평점 추가/수정은 movies 집계 열에 반영됨)
+    digest = hashlib.sha256()
+    with get_engine(db_path).connect() as conn:
+        for query in _FINGERPRINT_QUERIES:
+            digest.update(query.encode('utf-8'))
+            for rows in conn.execute(text(query)).partitions(FINGERPRINT_CHUNK_SIZE):
+                digest.update(repr([tuple(row) for row in rows]).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def arrays_checksum(arrays):
+    # 배열 이름/자료형/내용의 sha256 (스냅숏 파일 손상 확인용)
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        digest.update(f'{name}:{array.dtype.str}:{array.shape}'.encode('utf-8'))
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+class Snapshot:
+    # 영화 행 순서(movieId 오름차순)에 맞춘 열 배열 묶음
+    #   movie_ids int32, titles/genres/imdb_ids (NUL로 이어 붙인 UTF-8), genre_masks uint32,
+    #   rating_count int32, rating_avg float32 (평가 없으면 NaN), tmdb_ids int32 (없으면 -1),
+    #   태그 집계 CSR: tag_indptr (영화 수 + 1), tag_ids/tag_counts (영화별 태그 번호/개수, 개수 내림차순), tag_vocab
+    #   제목 검색 3-gram 색인 (title_index.*)
+    def __init__(self, arrays, meta):
+        self.arrays = arrays
+        self.meta = meta
+        self._tag_vocab = None
+
+    def __len__(self):
+        return len(self.arrays['movie_ids'])
+
+    def catalog(self):
+        # 열 배열은 그대로 공유하고 제목/장르 문자열만 만듦
+        a = self.arrays
+        return Catalog(a['movie_ids'], unpack_strings(a['titles']), unpack_strings(a['genres']), a['rating_avg'],
+                       a['genre_masks'])
+
+    def title_index(self):
+        prefix = TITLE_INDEX_PREFIX
+        return TitleIndex.from_arrays({name[len(prefix):]: array for name, array in self.arrays.items()
+                                       if name.startswith(prefix)})
+
+    @property
+    def tag_vocab(self):
+        if self._tag_vocab is None:
+            self._tag_vocab = np.array(unpack_strings(self.arrays['tag_vocab']), dtype=object)
+        return self._tag_vocab
+
+    def tags(self, row):
+        # 영화 행 -> [(태그, 개수), ...] (많이 달린 순)
+        a = self.arrays
+        start, end = int(a['tag_indptr'][row]), int(a['tag_indptr'][row + 1])
+        return list(zip(self.tag_vocab[a['tag_ids'][start:end]].tolist(), a['tag_counts'][start:end].tolist()))
+
+    def detail(self, row, catalog):
+        # db.get_movie_detail과 같은 형식 (태그는 중복 없이 많이 달린 순)
+        tmdb_id = int(self.arrays['tmdb_ids'][row])
+        return {'movieId': int(catalog.movie_ids[row]), 'title': catalog.titles[row], 'genres': catalog.genres[row],
+                'tmdbId': None if tmdb_id < 0 else tmdb_id, 'tags': [tag for tag, _ in self.tags(row)]}
+
+    def matches(self, db_path=DB_PATH):
+        # data.db와 같은 내용으로 만든 스냅숏인지 (파일 크기/수정 시각이 같으면 바로 통과, 다르면 지문 비교)
+        stat = os.stat(db_path)
+        source = self.meta.get('source', {})
+        if source.get('size') == stat.st_size and source.get('mtime_ns') == stat.st_mtime_ns:
+            return True
+        return source.get('fingerprint') == db_fingerprint(db_path)
+
+    def verify(self):
+        # 파일 내용이 저장할 때의 체크섬과 같은지 (모든 배열을 읽으므로 느림)
+        return arrays_checksum(self.arrays) == self.meta.get('checksum')
+
+    def to_arrays(self):
+        # 산출물 디렉터리에 함께 저장할 배열 묶음 (메타 정보는 JSON 바이트 배열로)
+        return {**self.arrays, 'meta': pack_strings([json.dumps(self.meta)])}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        arrays = dict(arrays)
+        meta = json.loads(unpack_strings(arrays.pop('meta'))[0])
+        return cls(arrays, meta)
+
+
+def build_snapshot_arrays(engine):
+    movies_df = pd.read_sql('SELECT movieId, title, genres, rating_count, rating_avg FROM movies ORDER BY movieId',
+                            engine)
+    movie_ids = movies_df['movieId'].to_numpy(dtype=np.int64)
+    row_of = pd.Series(np.arange(len(movie_ids)), index=movie_ids)
+    genres = movies_df['genres'].fillna('').tolist()
+
+    links_df = pd.read_sql('SELECT movieId, imdbId, tmdbId FROM links', engine)
+    links_df = links_df[links_df['movieId'].isin(row_of.index)]
+    link_rows = row_of[links_df['movieId']].to_numpy()
+    tmdb_ids = np.full(len(movie_ids), -1, dtype=np.int32)
+    tmdb_ids[link_rows] = links_df['tmdbId'].fillna(-1).to_numpy(dtype=np.int64)
+    imdb_ids = np.full(len(movie_ids), '', dtype=object)
+    imdb_ids[link_rows] = [f'{int(i):07d}' if pd.notna(i) else '' for i in links_df['imdbId']]
+
+    # 영화별 (태그, 개수)를 개수 내림차순으로 이어 붙인 CSR
+    tags_df = pd.read_sql('SELECT movieId, tag, COUNT(*) AS count FROM tags GROUP BY movieId, tag', engine)
+    tags_df = tags_df[tags_df['movieId'].isin(row_of.index) & tags_df['tag'].notna()]
+    tags_df = tags_df.assign(row=row_of[tags_df['movieId']].to_numpy(), tag=tags_df['tag'].astype(str))
+    tags_df = tags_df.sort_values(['row', 'count', 'tag'], ascending=[True, False, True])
+    tag_vocab, tag_ids = np.unique(tags_df['tag'].to_numpy(dtype=object).astype(str), return_inverse=True)
+    tag_indptr = np.concatenate([[0], np.cumsum(np.bincount(tags_df['row'], minlength=len(movie_ids)))])
+    titles = movies_df['title'].fillna('').tolist()
+    title_index = TitleIndex(titles).to_arrays()
+
+    return {'movie_ids': movie_ids.astype(np.int32), 'titles': pack_strings(titles),
+            'genres': pack_strings(genres), 'genre_masks': genre_bitmask(genres),
+            'rating_count': movies_df['rating_count'].fillna(0).to_numpy(dtype=np.int32),
+            'rating_avg': movies_df['rating_avg'].to_numpy(dtype=np.float32),
+            'imdb_ids': pack_strings(imdb_ids.tolist()), 'tmdb_ids': tmdb_ids,
+            'tag_indptr': tag_indptr.astype(np.int64), 'tag_ids': tag_ids.astype(np.int32),
+            'tag_counts': tags_df['count'].to_numpy(dtype=np.int32), 'tag_vocab': pack_strings(tag_vocab.tolist()),
+            **{TITLE_INDEX_PREFIX + name: array for name, array in title_index.items()}}
+
+
+def write_snapshot(db_path=DB_PATH, directory=None):
+    # 새 스냅숏을 임시 디렉터리에 다 쓴 뒤 기존 디렉터리와 교체
+    directory = snapshot_dir_for(db_path) if directory is None else directory
+    stat = os.stat(db_path)
+    fingerprint = db_fingerprint(db_path)
+    arrays = build_snapshot_arrays(get_engine(db_path))
+    meta = {'format': SNAPSHOT_FORMAT, 'version': time.strftime('%Y%m%d-%H%M%S'), 'movies': len(arrays['movie_ids']),
+            'checksum': arrays_checksum(arrays),
+            'source': {'path': os.path.abspath(db_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                       'fingerprint': fingerprint}}
+    building = f'{directory}.building'
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+    for name, array in arrays.items():
+        np.save(os.path.join(building, f'{name}.npy'), array)
+    _write_meta(building, meta)
+    old = f'{directory}.old'
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(directory):
+        os.rename(directory, old)
+    os.rename(building, directory)
+    shutil.rmtree(old, ignore_errors=True)  # 매핑 중인 파일은 삭제해도 매핑을 해제할 때까지 내용이 유지됨
+    return Snapshot(arrays, meta)
+
+
+def _write_meta(directory, meta):
+    tmp_path = os.path.join(directory, f'{META_FILE}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(directory, META_FILE))
+
+
+def load_snapshot(directory):
+    # 배열은 복사 없이 메모리 매핑, 형식 버전이 다르면 ValueError
+    with open(os.path.join(directory, META_FILE), encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError(f"스냅숏 형식이 다릅니다: {meta.get('format')} (현재 {SNAPSHOT_FORMAT})")
+    arrays = {name[:-len('.npy')]: np.load(os.path.join(directory, name), mmap_mode='r')
+              for name in os.listdir(directory) if name.endswith('.npy')}
+    return Snapshot(arrays, meta)
+
+
+def load_or_build_snapshot(db_path=DB_PATH):
+    # data.db와 맞는 스냅숏이 있으면 불러오고, 없거나 다르면 새로 만듦
+    directory = snapshot_dir_for(db_path)
+    try:
+        snapshot = load_snapshot(directory)
+    except (OSError, ValueError):
+        return write_snapshot(db_path, directory)
+    if not snapshot.matches(db_path):
+        return write_snapshot(db_path, directory)
+    # 내용 지문(전체 행 해시)까지 같고 파일만 바뀐 경우(예: user_recommendations 갱신)에만
+    # 다음 확인이 지문 계산 없이 끝나도록 크기/수정 시각을 기록
+    stat = os.stat(db_path)
+    if snapshot.meta['source'].get('mtime_ns') != stat.st_mtime_ns:
+        snapshot.meta['source'].update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        _write_meta(directory, snapshot.meta)
+    return snapshot
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='영화 목록/링크/평점 집계/태그 집계 열 스냅숏을 만들거나 검사합니다.')
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--verify', action='store_true', help='새로 만들지 않고 기존 스냅숏을 data.db, 체크섬과 비교')
+    args = parser.parse_args()
+
+    if args.verify:
+        snapshot = load_snapshot(snapshot_dir_for(args.db))
+        print(f"스냅숏 {snapshot.meta['version']}: data.db 일치 {snapshot.matches(args.db)}, "
+              f"체크섬 일치 {snapshot.verify()}")
+    else:
+        started = time.perf_counter()
+        snapshot = write_snapshot(args.db)
+        print(f"스냅숏 {snapshot.meta['version']} 생성 완료: 영화 {len(snapshot)}편, "
+              f"{time.perf_counter() - started:.2f}초")
@@ -0,0 +1,60 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# 저장소 최상위의 모듈(poster_fetcher, result_cache 등)을 테스트에서 바로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 작은 MovieLens 형식 카탈로그 (movieId, 제목, 장르)
+MOVIES = [
+    (1, 'Toy Story (1995)', 'Adventure|Animation|Children|Comedy|Fantasy'),
+    (2, 'Jumanji (1995)', 'Adventure|Children|Fantasy'),
+    (3, 'Grumpier Old Men (1995)', 'Comedy|Romance'),
+    (5, 'Father of the Bride Part II (1995)', 'Comedy'),
+    (6, 'Heat (1995)', 'Action|Crime|Thriller'),
+    (10, 'GoldenEye (1995)', 'Action|Adventure|Thriller'),
+    (32, 'Twelve Monkeys (a.k.a. 12 Monkeys) (1995)', 'Mystery|Sci-Fi|Thriller'),
+    (47, 'Seven (a.k.a. Se7en) (1995)', 'Mystery|Thriller'),
+    (260, 'Star Wars: Episode IV - A New Hope (1977)', 'Action|Adventure|Sci-Fi'),
+    (296, 'Pulp Fiction (1994)', 'Comedy|Crime|Drama|Thriller'),
+    (318, 'Shawshank Redemption, The (1994)', 'Crime|Drama'),
+    (2571, 'Matrix, The (1999)', 'Action|Sci-Fi|Thriller'),
+]
+TAGS = [
+    (1, 1, 'pixar'), (2, 1, 'Pixar'), (1, 260, 'space'), (3, 2571, 'cyberpunk'),
+    (2, 2571, 'sci-fi'), (4, 32, 'time travel'), (4, 296, 'quirky'), (5, 47, 'twist ending'),
+]
+
+
+def write_csvs(data_dir, n_users=20, seed=7):
+    # 사용자마다 영화 6~9편에 0.5 단위 평점을 준 평점 CSV와 영화/링크/태그 CSV
+    rng = np.random.default_rng(seed)
+    os.makedirs(data_dir, exist_ok=True)
+    movie_ids = [movie_id for movie_id, _, _ in MOVIES]
+    pd.DataFrame(MOVIES, columns=['movieId', 'title', 'genres']).to_csv(os.path.join(data_dir, 'movies.csv'),
+                                                                         index=False)
+    pd.DataFrame({'movieId': movie_ids, 'imdbId': [f'{114700 + m:07d}' for m in movie_ids],
+                  'tmdbId': [800 + m for m in movie_ids]}).to_csv(os.path.join(data_dir, 'links.csv'), index=False)
+    rows = []
+    for user_id in range(1, n_users + 1):
+        for movie_id in rng.choice(movie_ids, rng.integers(6, 10), replace=False):
+            rows.append((user_id, int(movie_id), float(rng.integers(1, 11)) / 2, 964982703 + len(rows)))
+    pd.DataFrame(rows, columns=['userId', 'movieId', 'rating', 'timestamp']).to_csv(
+        os.path.join(data_dir, 'ratings.csv'), index=False)
+    pd.DataFrame([(u, m, t, 1445714994 + i) for i, (u, m, t) in enumerate(TAGS)],
+                 columns=['userId', 'movieId', 'tag', 'timestamp']).to_csv(os.path.join(data_dir, 'tags.csv'),
+                                                                           index=False)
+
+
+@pytest.fixture
+def small_db(tmp_path):
+    # 위 카탈로그로 임시 디렉터리에 만든 data.db 경로 (산출물은 만들지 않음)
+    from createdb.build import build_database
+    from db import dispose_engines
+    write_csvs(str(tmp_path / 'data'))
+    db_path = str(tmp_path / 'data.db')
+    build_database(str(tmp_path / 'data'), db_path)
+    yield db_path
+    dispose_engines()
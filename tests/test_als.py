@@ -0,0 +1,30 @@
+import numpy as np
+from scipy import sparse
+from als import train_als, ALSModel
+from recommend import DEFAULT_K
+
+
+def _ratings(n_users=40, n_movies=30, seed=5):
+    rng = np.random.default_rng(seed)
+    dense = rng.integers(1, 11, size=(n_users, n_movies)) / 2 * (rng.random((n_users, n_movies)) < 0.3)
+    return sparse.csr_matrix(dense.astype(np.float32))
+
+
+def test_worker_pool_matches_single_process():
+    # 작업 프로세스는 고정 요인을 메모리 매핑 파일로 읽지만 결과는 한 프로세스로 푼 것과 같아야 함
+    matrix = _ratings()
+    serial = train_als(matrix, n_factors=4, iterations=3, workers=1)
+    pooled = train_als(matrix, n_factors=4, iterations=3, workers=2)
+    for expected, actual in zip(serial[:2], pooled[:2]):
+        np.testing.assert_array_equal(expected, actual)
+    assert serial[2] == pooled[2]
+
+
+def test_recommend_defaults_to_default_k():
+    matrix = _ratings()
+    user_factors, item_factors, global_mean = train_als(matrix, n_factors=4, iterations=2, workers=1)
+    model = ALSModel(np.arange(1, 41), np.arange(1, 31), user_factors, item_factors, global_mean)
+    movie_ids, _ = model.recommend_users([1, 2])
+    assert movie_ids.shape == (2, DEFAULT_K)
+    movie_ids, _ = model.recommend_seed_sets([[1, 2]])
+    assert movie_ids.shape == (1, DEFAULT_K) and not np.isin([1, 2], movie_ids).any()
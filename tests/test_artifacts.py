@@ -0,0 +1,27 @@
+import os
+import pytest
+from artifacts import export_artifacts, exported_engines, load_core, available_engines
+from embeddings import load_or_build_embedding_index
+
+
+def test_export_includes_every_engine_with_a_source_artifact(small_db, tmp_path):
+    # 임베딩 원본 산출물만 만들어 둔 상태: item_cf는 항상, embedding은 원본이 있으니 포함, als는 제외
+    load_or_build_embedding_index(small_db)
+    assert available_engines(small_db) == ['item_cf', 'embedding']
+
+    root = str(tmp_path / 'artifacts')
+    version = export_artifacts(small_db, root)
+    assert exported_engines(root, version) == ['item_cf', 'embedding', 'hybrid']
+
+    core = load_core(root, db_path=small_db)
+    for engine in ('content', 'item_cf', 'embedding', 'hybrid'):
+        assert core.recommend([1, 260], k=3, engine=engine)
+    with pytest.raises(ValueError, match='artifacts.py --engines als'):
+        core.recommend([1, 260], k=3, engine='als')
+
+
+def test_explicit_engines_always_keep_item_cf(small_db, tmp_path):
+    root = str(tmp_path / 'artifacts')
+    version = export_artifacts(small_db, root, engines=['embedding'])
+    assert exported_engines(root, version) == ['item_cf', 'embedding', 'hybrid']
+    assert os.path.exists(os.path.join(root, version, 'embedding.movie_ids.npy'))
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from scipy import sparse
+from feature_index import FeatureIndex
+from item_cf import ItemCF
+from movie_filter import genre_bitmask
+from hybrid import HybridRanker, tag_matrix
+
+# 영화 5편: 10과 20은 Action, 30은 Action|Comedy, 40은 Comedy, 50은 Drama
+MOVIE_IDS = [10, 20, 30, 40, 50]
+GENRES = ['Action', 'Action', 'Action|Comedy', 'Comedy', 'Drama']
+WEIGHTS = {'genre': 0.5, 'tag': 0.1, 'item_cf': 0.3, 'quality': 0.2, 'popularity': 0.0}
+
+
+def _ranker(mmr_lambda):
+    vocabulary = ['action', 'comedy', 'drama']
+    one_hot = sparse.csr_matrix([[1, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [0, 0, 1]], dtype=np.float32)
+    index = FeatureIndex(one_hot, MOVIE_IDS, vocabulary, n_genres=3)
+    # 10과 50만 같은 태그 하나를 공유
+    tags = tag_matrix(np.array([0, 1, 1, 1, 1, 2]), np.array([0, 0]), np.array([1, 1]), n_tags=1)
+    # 10의 이웃은 40(0.8), 50(0.4), 나머지 영화의 이웃 유사도는 0
+    neighbors = np.array([[3, 4], [0, 2], [0, 1], [0, 1], [0, 1]])
+    similarities = np.array([[0.8, 0.4], [0, 0], [0, 0], [0, 0], [0, 0]])
+    item_cf = ItemCF(MOVIE_IDS, neighbors, similarities)
+    # 평점 수가 모두 같고 사전 평점 수 0 -> quality = (평균 - 0.5) / 4.5, 인기도는 가중치 0
+    rating_avg = np.array([5.0, 5.0, 0.5, 2.75, 0.5])
+    return HybridRanker(index, tags, item_cf, np.full(5, 100), rating_avg, genre_masks=genre_bitmask(GENRES),
+                        weights=WEIGHTS, candidates=3, mmr_lambda=mmr_lambda, prior_count=0)
+
+
+def test_blend_scores_candidates_from_every_source():
+    # 장르: 20 -> 1, 30 -> 1/sqrt(2) / ItemCF: 40 -> 0.8, 50 -> 0.4 (최댓값으로 나눔) / 태그: 50 -> 1
+    results = _ranker(mmr_lambda=1.0).recommend_batch([[10]], k=5)[0]
+    assert [movie_id for movie_id, _ in results] == [20, 40, 30, 50]
+    expected = [0.5 + 0.2, 0.3 + 0.2 * 0.5, 0.5 / np.sqrt(2), 0.1 + 0.3 * 0.5]
+    np.testing.assert_allclose([score for _, score in results], expected, rtol=1e-5)
+
+
+def test_mmr_pushes_back_same_genre_candidates():
+    # 20(Action)을 고른 뒤 30(Action|Comedy)은 장르 유사도 1/sqrt(2)만큼 깎여 50(Drama) 뒤로 밀림
+    results = _ranker(mmr_lambda=0.5).recommend_batch([[10]], k=5)[0]
+    assert [movie_id for movie_id, _ in results] == [20, 40, 50, 30]
+
+
+# Comedy만 남으면 30의 장르 점수가 후보 중 최댓값이 되어 1로 맞춰짐 (0.5 > 40의 0.4)
+@pytest.mark.parametrize('genres, expected', [(['Comedy'], [30, 40]), (['drama'], [50]), (['Western'], [])])
+def test_genre_filter_applies_to_candidates(genres, expected):
+    results = _ranker(mmr_lambda=1.0).recommend_batch([[10]], k=5, genre_sets=[genres])[0]
+    assert [movie_id for movie_id, _ in results] == expected
+
+
+def test_seeds_are_excluded_unless_asked():
+    ranker = _ranker(mmr_lambda=1.0)
+    assert 20 not in [movie_id for movie_id, _ in ranker.recommend_batch([[10, 20]], k=5)[0]]
+    assert 10 in [movie_id for movie_id, _ in ranker.recommend_batch([[10]], k=5, exclude_seeds=False)[0]]
@@ -0,0 +1,200 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy.exc import IntegrityError
+from db import get_engine
+from feature_index import FeatureIndex, TAG_PREFIX, build_feature_index, index_path_for
+from embeddings import EmbeddingIndex, build_embedding_index, embedding_path_for, content_features, project
+from item_cf import ItemCF, build_item_cf, neighbors_path_for
+from user_index import UserIndex, build_user_index, user_index_path_for
+from snapshot import load_or_build_snapshot, write_snapshot
+from ingest import ingest_ratings, ingest_tags, update_artifacts
+
+
+def _tag_events(movie_ids, tags):
+    return pd.DataFrame({'userId': 9, 'movieId': movie_ids, 'tag': tags, 'timestamp': 1445714994})
+
+
+def test_tag_ingest_projects_only_changed_embeddings(small_db):
+    path = embedding_path_for(small_db)
+    before = build_embedding_index(get_engine(small_db))
+    before.save(path)
+
+    changed = ingest_tags(_tag_events([2, 6], ['pixar', 'cyberpunk']), small_db)
+    assert 'embedding' in update_artifacts(tagged_movie_ids=changed, db_path=small_db)
+    after = EmbeddingIndex.load(path)
+
+    # 기저와 군집 중심은 그대로, 바뀐 영화만 새 태그로 다시 투영
+    rows = after.rows_for(changed)
+    others = np.setdiff1d(np.arange(len(after)), rows)
+    np.testing.assert_array_equal(after.centroids, before.centroids)
+    np.testing.assert_array_equal(after.vectors[others], before.vectors[others])
+    assert not np.allclose(after.vectors[rows], before.vectors[rows])
+
+    engine = get_engine(small_db)
+    movies_df = pd.read_sql('SELECT movieId, title, genres FROM movies ORDER BY movieId', engine)
+    tags_df = pd.read_sql('SELECT movieId, tag FROM tags', engine)
+    expected = project(content_features(movies_df, tags_df, after.features), after.features['basis'])
+    np.testing.assert_allclose(after.vectors, expected, atol=1e-6)
+
+    # 바뀐 영화는 가장 가까운 군집의 역파일 목록에 들어 있음
+    assignments = after.assignments()
+    np.testing.assert_array_equal(assignments[rows], np.argmax(after.vectors[rows] @ after.centroids.T, axis=1))
+    assert sorted(after.list_rows.tolist()) == list(range(len(after)))
+    assert os.path.getmtime(path) >= os.path.getmtime(small_db)
+
+
+def test_tag_ingest_updates_tag_columns_of_changed_rows(small_db):
+    path = index_path_for(small_db)
+    before = build_feature_index(get_engine(small_db), include_tags=True)
+    before.save(path)
+
+    changed = ingest_tags(_tag_events([1, 6, 6], ['pixar', 'heist', 'Heist']), small_db)
+    assert 'feature_index' in update_artifacts(tagged_movie_ids=changed, db_path=small_db)
+    after = FeatureIndex.load(path)
+
+    # 새 태그는 어휘 끝에 추가, 장르 열과 다른 영화 행은 그대로
+    assert after.vocabulary[:len(before.vocabulary)] == before.vocabulary
+    heist = after.feature_of[TAG_PREFIX + 'heist']
+    pixar = after.feature_of[TAG_PREFIX + 'pixar']
+    rows = after.rows_for(changed)
+    assert after.matrix[after.row_of[6], heist] > 0
+    assert after.matrix[after.row_of[1], pixar] > before.matrix[before.row_of[1], pixar]
+    width = len(before.vocabulary)
+    others = np.setdiff1d(np.arange(len(after)), rows)
+    np.testing.assert_array_equal(after.matrix[others][:, :width].toarray(), before.matrix[others].toarray())
+    np.testing.assert_array_equal(after.matrix[:, :after.n_genres].toarray(),
+                                  before.matrix[:, :before.n_genres].toarray())
+
+    # 태그 특징이 있는 전체 생성과 같은 값
+    rebuilt = build_feature_index(get_engine(small_db), include_tags=True)
+    for row in rows:
+        expected = {name: rebuilt.matrix[row, col] for col, name in enumerate(rebuilt.vocabulary)
+                    if rebuilt.matrix[row, col]}
+        actual = {name: after.matrix[row, col] for col, name in enumerate(after.vocabulary) if after.matrix[row, col]}
+        assert actual == pytest.approx(expected)
+
+
+def test_tag_ingest_leaves_genre_only_index_alone(small_db):
+    path = index_path_for(small_db)
+    build_feature_index(get_engine(small_db)).save(path)
+    with open(path, 'rb') as f:
+        before = f.read()
+
+    changed = ingest_tags(_tag_events([1], ['pixar']), small_db)
+    assert 'feature_index' not in update_artifacts(tagged_movie_ids=changed, db_path=small_db)
+    with open(path, 'rb') as f:
+        assert f.read() == before
+    assert os.path.getmtime(path) >= os.path.getmtime(small_db)
+
+
+def _dense(model):
+    # 이웃 목록 -> (영화 x 영화) 유사도 행렬
+    dense = np.zeros((len(model), len(model)), dtype=np.float32)
+    np.put_along_axis(dense, model.neighbors.astype(np.int64), model.similarities, axis=1)
+    return dense
+
+
+def _rating_events(rows):
+    return pd.DataFrame(rows, columns=['userId', 'movieId', 'rating']).assign(timestamp=964982703)
+
+
+def test_incremental_neighbors_track_full_rebuild(small_db):
+    path = neighbors_path_for(small_db)
+    built = build_item_cf(get_engine(small_db), n_neighbors=11)
+    built.save(path)
+    assert built.built_users == 20
+
+    # 사용자 한 명의 평점만 바뀌면 오차 예산(20명의 5%) 안이라 증분 갱신
+    movie_ids, user_ids = ingest_ratings(_rating_events([(3, 1, 5.0), (3, 318, 0.5)]), small_db)
+    assert 'item_cf' in update_artifacts(movie_ids, user_ids, db_path=small_db)
+    incremental = ItemCF.load(path)
+    assert incremental.stale_users == 1
+    full = build_item_cf(get_engine(small_db), n_neighbors=11)
+
+    # 바뀐 영화의 이웃 목록은 전체 생성과 거의 같고, 나머지는 사용자 평균 변화만큼만 어긋남 (근사)
+    rows = full.rows_for(movie_ids)
+    assert np.abs(_dense(incremental)[rows] - _dense(full)[rows]).max() < 0.01
+    assert np.abs(_dense(incremental) - _dense(full)).max() < 0.05
+    np.testing.assert_allclose(incremental.norms[rows], full.norms[rows], rtol=1e-5)
+
+    # 오차 예산을 넘으면 전체를 다시 생성해 전체 생성과 같아짐
+    movie_ids, user_ids = ingest_ratings(_rating_events([(5, 2, 4.0), (6, 2, 1.0)]), small_db)
+    assert 'item_cf' in update_artifacts(movie_ids, user_ids, db_path=small_db)
+    rebuilt = ItemCF.load(path)
+    full = build_item_cf(get_engine(small_db), n_neighbors=11)
+    assert rebuilt.stale_users == 0
+    np.testing.assert_allclose(_dense(rebuilt), _dense(full), atol=1e-6)
+
+
+def _aggregates(db_path):
+    engine = get_engine(db_path)
+    stored = pd.read_sql('SELECT movieId, rating_count, rating_avg FROM movies ORDER BY movieId', engine)
+    expected = pd.read_sql('SELECT m.movieId, COUNT(r.rating) AS rating_count, AVG(r.rating) AS rating_avg '
+                           'FROM movies m LEFT JOIN ratings r ON r.movieId = m.movieId '
+                           'GROUP BY m.movieId ORDER BY m.movieId', engine)
+    return stored, expected
+
+
+def test_rating_ingest_updates_aggregates_by_delta(small_db):
+    engine = get_engine(small_db)
+    existing = pd.read_sql('SELECT userId, movieId, rating FROM ratings LIMIT 1', engine).iloc[0]
+    before = pd.read_sql('SELECT COUNT(*) AS n FROM ratings', engine)['n'][0]
+
+    # 기존 평점 교체, 같은 배치 안의 중복(마지막 값 사용), 평가가 없던 사용자의 새 평점
+    replaced = (int(existing['userId']), int(existing['movieId']), 0.5 if existing['rating'] != 0.5 else 5.0)
+    movie_ids, user_ids = ingest_ratings(_rating_events([replaced, (99, 2571, 1.0), (99, 2571, 4.5), (99, 318, 3.0)]),
+                                         small_db)
+    assert sorted(user_ids) == sorted({replaced[0], 99})
+    assert sorted(movie_ids) == sorted({replaced[1], 2571, 318})
+
+    stored, expected = _aggregates(small_db)
+    np.testing.assert_array_equal(stored['rating_count'], expected['rating_count'])
+    np.testing.assert_allclose(stored['rating_avg'], expected['rating_avg'], rtol=1e-9)
+    assert pd.read_sql('SELECT COUNT(*) AS n FROM ratings', engine)['n'][0] == before + 2
+    assert pd.read_sql('SELECT rating FROM ratings WHERE userId = 99 AND movieId = 2571', engine)['rating'][0] == 4.5
+
+
+def test_bad_rating_batch_rolls_back(small_db):
+    engine = get_engine(small_db)
+    ratings_before = pd.read_sql('SELECT * FROM ratings ORDER BY userId, movieId', engine)
+    movies_before = pd.read_sql('SELECT * FROM movies ORDER BY movieId', engine)
+
+    # 평점이 없는 행(NOT NULL 위반)이 섞인 배치는 앞의 정상 행까지 모두 취소
+    with pytest.raises(IntegrityError):
+        ingest_ratings(_rating_events([(99, 1, 4.0), (99, 2, np.nan)]), small_db)
+    pd.testing.assert_frame_equal(pd.read_sql('SELECT * FROM ratings ORDER BY userId, movieId', engine), ratings_before)
+    pd.testing.assert_frame_equal(pd.read_sql('SELECT * FROM movies ORDER BY movieId', engine), movies_before)
+
+    # 같은 연결로 다음 배치는 정상 반영 (임시 테이블에 이전 배치가 남지 않음)
+    ingest_ratings(_rating_events([(99, 1, 4.0)]), small_db)
+    stored, expected = _aggregates(small_db)
+    np.testing.assert_array_equal(stored['rating_count'], expected['rating_count'])
+
+
+def test_rating_ingest_patches_user_index_and_snapshot(small_db):
+    engine = get_engine(small_db)
+    build_user_index(engine).save(user_index_path_for(small_db))
+    write_snapshot(small_db)
+    build_feature_index(engine).save(index_path_for(small_db))
+    build_embedding_index(engine).save(embedding_path_for(small_db))
+
+    movie_ids, user_ids = ingest_ratings(_rating_events([(3, 260, 5.0), (99, 260, 2.0)]), small_db)
+    updated = update_artifacts(movie_ids, user_ids, db_path=small_db)
+    assert {'user_index', 'snapshot'} <= set(updated)
+    assert not {'feature_index', 'embedding'} & set(updated)
+
+    patched = UserIndex.load(user_index_path_for(small_db))
+    full = build_user_index(engine)
+    for name, array in full.to_arrays().items():
+        np.testing.assert_array_equal(patched.to_arrays()[name], array)
+
+    snapshot = load_or_build_snapshot(small_db)
+    assert snapshot.matches(small_db)
+    stored, _ = _aggregates(small_db)
+    np.testing.assert_array_equal(snapshot.arrays['rating_count'], stored['rating_count'])
+
+    # 이번 반영과 무관한 산출물도 data.db보다 오래되지 않아 다음 로드 때 다시 만들지 않음
+    for path in (index_path_for(small_db), embedding_path_for(small_db), user_index_path_for(small_db)):
+        assert os.path.getmtime(path) >= os.path.getmtime(small_db)
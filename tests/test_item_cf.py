@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from db import get_engine
+from item_cf import load_rating_matrix, mean_center, build_neighbors
+
+
+def _dense_similarities(matrix, shrinkage):
+    # 조정 코사인 유사도를 밀집 배열로 직접 계산 (관측된 값에서만 사용자 평균을 뺌)
+    dense = matrix.toarray().astype(np.float64)
+    observed = dense != 0
+    means = dense.sum(axis=1) / np.maximum(observed.sum(axis=1), 1)
+    centered = np.where(observed, dense - means[:, None], 0.0)
+    norms = np.sqrt((centered ** 2).sum(axis=0))
+    sims = centered.T @ centered / np.outer(norms, norms)
+    co_counts = observed.T.astype(np.float64) @ observed
+    sims *= co_counts / (co_counts + shrinkage)
+    np.fill_diagonal(sims, -np.inf)
+    return sims
+
+
+def test_blocked_neighbors_match_dense_computation():
+    rng = np.random.default_rng(3)
+    dense = rng.integers(1, 11, size=(15, 9)) / 2 * (rng.random((15, 9)) < 0.6)
+    matrix = sparse.csr_matrix(dense.astype(np.float32))
+    n_neighbors, shrinkage = 4, 2.0
+
+    neighbors, similarities = build_neighbors(mean_center(matrix), n_neighbors, block_size=2, shrinkage=shrinkage)
+
+    expected = _dense_similarities(matrix, shrinkage)
+    top = np.sort(expected, axis=1)[:, ::-1][:, :n_neighbors]
+    np.testing.assert_allclose(similarities, np.maximum(top, 0), atol=1e-5)
+    # 고른 이웃의 실제 유사도가 저장된 값과 같고 자기 자신은 없음
+    np.testing.assert_allclose(np.maximum(np.take_along_axis(expected, neighbors, axis=1), 0), similarities, atol=1e-5)
+    assert not (neighbors == np.arange(9)[:, None]).any()
+
+
+def test_chunked_rating_matrix_matches_ratings_table(small_db):
+    engine = get_engine(small_db)
+    ratings = pd.read_sql('SELECT userId, movieId, rating FROM ratings', engine)
+    movie_ids = np.sort(ratings['movieId'].unique())[:-1]  # 목록에 없는 영화 하나는 빠져야 함
+
+    matrix, user_ids = load_rating_matrix(engine, movie_ids, chunk_size=7)
+
+    known = ratings[ratings['movieId'].isin(movie_ids)]
+    assert list(user_ids) == sorted(known['userId'].unique())
+    expected = np.zeros((len(user_ids), len(movie_ids)), dtype=np.float32)
+    expected[np.searchsorted(user_ids, known['userId']), np.searchsorted(movie_ids, known['movieId'])] = known['rating']
+    assert matrix.dtype == np.float32
+    np.testing.assert_array_equal(matrix.toarray(), expected)
@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from metrics import metrics
+from poster_fetcher import PosterFetcher, DiskCache, LRUCache
+
+API_KEY = 'test-key'
+POSTER_BYTES = b'\x89PNG stub poster'
+
+# 스텁 TMDb가 아는 영화: tmdbId -> 메타데이터 (poster_path가 없는 영화 포함)
+MOVIES = {
+    862: {'id': 862, 'title': 'Toy Story', 'poster_path': '/toy.png'},
+    8844: {'id': 8844, 'title': 'Jumanji', 'poster_path': None},
+    949: {'id': 949, 'title': 'Heat', 'poster_path': '/broken.png'},
+}
+
+
+class StubTMDb(BaseHTTPRequestHandler):
+    # /3/movie/<id> 메타데이터와 /t/p/<size><poster_path> 이미지를 흉내 내는 로컬 서버
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        path, _, query = self.path.partition('?')
+        if path.startswith('/3/movie/'):
+            movie = MOVIES.get(int(path.rsplit('/', 1)[1]))
+            if movie is None or f'api_key={API_KEY}' not in query:
+                return self._send(404, b'{"status_code": 34}', 'application/json')
+            return self._send(200, json.dumps(movie).encode('utf-8'), 'application/json')
+        if path == '/t/p/w342/toy.png':
+            return self._send(200, POSTER_BYTES, 'image/png')
+        self._send(500, b'error', 'text/plain')
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StubTMDb)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def make_fetcher(server, tmp_path):
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    fetchers = []
+
+    def make(**options):
+        fetcher = PosterFetcher(API_KEY, cache_dir=str(tmp_path / 'cache'), api_base=f'{base}/3',
+                                image_base=f'{base}/t/p', **options)
+        fetchers.append(fetcher)
+        return fetcher
+
+    metrics.reset()
+    yield make
+    for fetcher in fetchers:
+        fetcher.shutdown()
+
+
+def test_network_then_memory_hit(server, make_fetcher):
+    fetcher = make_fetcher()
+    assert fetcher.fetch_poster(862) == POSTER_BYTES
+    assert [p.partition('?')[0] for p in server.requests] == ['/3/movie/862', '/t/p/w342/toy.png']
+
+    assert fetcher.fetch_poster(862) == POSTER_BYTES
+    assert fetcher.fetch_metadata(862)['title'] == 'Toy Story'
+    assert len(server.requests) == 2
+    assert metrics.counters['tmdb.poster.memory_hit'] == 1
+    assert metrics.counters['tmdb.metadata.memory_hit'] == 1
+    assert metrics.histograms['tmdb.metadata.request'].count == 1
+    assert metrics.histograms['tmdb.poster.request'].count == 1
+
+
+def test_disk_hit_survives_new_fetcher(server, make_fetcher):
+    make_fetcher().fetch_poster(862)
+    server.requests.clear()
+
+    fetcher = make_fetcher()
+    assert fetcher.fetch_poster(862) == POSTER_BYTES
+    assert fetcher.fetch_metadata(862)['title'] == 'Toy Story'
+    assert server.requests == []
+    # 포스터가 디스크에서 나오면 메타데이터는 읽지 않음, 이후 메타데이터 조회는 디스크 -> 메모리
+    assert 'tmdb.poster.memory_hit' not in metrics.counters
+    assert metrics.counters['tmdb.metadata.disk_hit'] == 1
+
+
+def test_missing_poster_path_returns_none(server, make_fetcher):
+    fetcher = make_fetcher()
+    assert fetcher.fetch_poster(8844) is None
+    assert [p.partition('?')[0] for p in server.requests] == ['/3/movie/8844']
+    # 메타데이터는 캐시되어 다시 요청하지 않음
+    assert fetcher.fetch_poster(8844) is None
+    assert len(server.requests) == 1
+
+
+def test_metadata_error_is_raised_and_not_cached(server, make_fetcher, tmp_path):
+    fetcher = make_fetcher()
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch_metadata(1)
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch_poster(1)
+    assert len(server.requests) == 2
+    assert os.listdir(tmp_path / 'cache') == []
+
+
+def test_wrong_api_key_is_an_error(make_fetcher):
+    fetcher = make_fetcher()
+    fetcher.api_key = 'wrong'
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch_metadata(862)
+
+
+def test_image_error_is_raised_and_not_cached(server, make_fetcher, tmp_path):
+    fetcher = make_fetcher()
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch_poster(949)
+    # 메타데이터는 저장되고 포스터는 저장되지 않음
+    assert sorted(os.listdir(tmp_path / 'cache')) == ['meta_949.json']
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch_poster(949)
+    assert [p.partition('?')[0] for p in server.requests] == ['/3/movie/949', '/t/p/w342/broken.png',
+                                                              '/t/p/w342/broken.png']
+
+
+def test_connection_error(make_fetcher, server):
+    fetcher = make_fetcher()
+    server.shutdown()
+    server.server_close()
+    with pytest.raises(requests.ConnectionError):
+        fetcher.fetch_metadata(862)
+
+
+def test_submit_poster_runs_in_background(make_fetcher):
+    fetcher = make_fetcher()
+    futures = [fetcher.submit_poster(862) for _ in range(4)]
+    assert [future.result(timeout=10) for future in futures] == [POSTER_BYTES] * 4
+    assert fetcher.submit_metadata(862).result(timeout=10)['id'] == 862
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=25)
+    cache.put('a', b'x' * 10)
+    cache.put('b', b'x' * 10)
+    os.utime(tmp_path / 'a', (1, 1))
+    os.utime(tmp_path / 'b', (2, 2))
+    cache.put('c', b'x' * 10)
+    assert cache.get('a') is None
+    assert cache.get('b') == b'x' * 10
+    assert cache.get('c') == b'x' * 10
+
+
+def test_lru_cache_evicts_oldest():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
@@ -0,0 +1,114 @@
+from result_cache import ResultCache, cache_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_key_ignores_seed_and_genre_order_and_case():
+    key = cache_key([3, 1, 2], ['Drama', 'Action'], 10, 'content', 1)
+    assert cache_key([1, 2, 3], ['action', 'DRAMA'], 10, 'content', 1) == key
+    assert cache_key(['2', 3.0, 1], ('Action', 'Drama', 'drama'), '10', 'content', 1) == key
+
+
+def test_cache_key_distinguishes_request_fields():
+    key = cache_key([1, 2], ['Drama'], 10, 'content', 1)
+    assert cache_key([1, 3], ['Drama'], 10, 'content', 1) != key
+    assert cache_key([1, 2], ['Comedy'], 10, 'content', 1) != key
+    assert cache_key([1, 2], None, 10, 'content', 1) != key
+    assert cache_key([1, 2], ['Drama'], 20, 'content', 1) != key
+    assert cache_key([1, 2], ['Drama'], 10, 'item_cf', 1) != key
+    assert cache_key([1, 2], ['Drama'], 10, 'content', 2) != key
+
+
+def test_cache_key_no_genres():
+    assert cache_key([1], None, 10, 'content', 1) == cache_key([1], [], 10, 'content', 1)
+
+
+def test_weighted_key_pairs_weights_with_seeds():
+    key = cache_key([1, 2], None, 10, 'content', 1, weights=[0.5, -1.0])
+    assert cache_key([2, 1], None, 10, 'content', 1, weights=[-1.0, 0.5]) == key
+    assert cache_key([1, 2], None, 10, 'content', 1, weights=[-1.0, 0.5]) != key
+    assert cache_key([1, 2], None, 10, 'content', 1, weights=[0.50001, -1.0]) == key
+
+
+def test_unit_weights_share_unweighted_key():
+    unweighted = cache_key([2, 1], ['Drama'], 10, 'content', 1)
+    assert cache_key([1, 2], ['Drama'], 10, 'content', 1, weights=[1.0, 1]) == unweighted
+    assert cache_key([1, 2], ['Drama'], 10, 'content', 1, weights=[1.0, 0.5]) != unweighted
+
+
+def test_nearly_unit_weights_keep_weighted_key():
+    # 반올림하면 1이어도 정확히 1이 아니면 가중치 없는 키와 나누고, 가중치 키끼리는 소수점 4자리 허용 오차
+    unweighted = cache_key([1, 2], None, 10, 'content', 1)
+    nearly = cache_key([1, 2], None, 10, 'content', 1, weights=[1.00004, 1])
+    assert nearly != unweighted
+    assert cache_key([1, 2], None, 10, 'content', 1, weights=[1.00003, 1]) == nearly
+    assert cache_key([1, 2], None, 10, 'content', 1, weights=[1.0001, 1]) != nearly
+
+
+def test_get_and_put():
+    cache = ResultCache(max_items=10, ttl=None)
+    assert cache.get('a') is None
+    cache.put('a', (1, 2))
+    assert cache.get('a') == (1, 2)
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['items'], stats['hit_rate']) == (1, 1, 1, 0.5)
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = ResultCache(ttl=5.0, clock=clock)
+    cache.put('a', 1)
+    clock.now = 5.0
+    assert cache.get('a') == 1
+    clock.now = 5.1
+    assert cache.get('a') is None
+    assert len(cache) == 0
+    assert cache.stats()['expired'] == 1
+    # 다시 넣으면 그 시각부터 유효
+    cache.put('a', 2)
+    clock.now = 10.0
+    assert cache.get('a') == 2
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = ResultCache(max_items=2, ttl=None)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_put_existing_key_refreshes_position():
+    cache = ResultCache(max_items=2, ttl=None)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.put('a', 10)
+    cache.put('c', 3)
+    assert cache.get('a') == 10
+    assert cache.get('b') is None
+
+
+def test_zero_capacity_stores_nothing():
+    cache = ResultCache(max_items=0)
+    cache.put('a', 1)
+    assert len(cache) == 0
+    assert cache.get('a') is None
+
+
+def test_invalidate_clears_everything():
+    cache = ResultCache(ttl=None)
+    for key in 'abc':
+        cache.put(key, key)
+    cache.invalidate()
+    assert len(cache) == 0
+    assert all(cache.get(key) is None for key in 'abc')
+    assert cache.stats()['invalidations'] == 1
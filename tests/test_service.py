@@ -0,0 +1,74 @@
+import json
+import asyncio
+import pytest
+from core import RecommenderCore
+from service import RecommendService, HTTPError
+
+
+@pytest.fixture
+def core(small_db):
+    return RecommenderCore(small_db)
+
+
+def run(core, method, target, body=None):
+    # 이벤트 루프마다 서비스를 새로 만들고 묶음 처리기를 띄운 채 요청 하나를 처리
+    async def main():
+        service = RecommendService(core, window_ms=1)
+        batcher = asyncio.create_task(service.batcher.run())
+        try:
+            return await service.dispatch(method, target, json.dumps(body).encode('utf-8') if body else b'')
+        finally:
+            batcher.cancel()
+    return asyncio.run(main())
+
+
+def status_of(core, method, target, body=None):
+    with pytest.raises(HTTPError) as error:
+        run(core, method, target, body)
+    return error.value.status
+
+
+def test_recommend_get_and_post(core):
+    result = run(core, 'GET', '/recommend?seeds=1,2&k=3&genres=Adventure,comedy')
+    assert result['engine'] == 'content'
+    assert 0 < len(result['results']) <= 3
+    assert not {1, 2} & {item['movieId'] for item in result['results']}
+    posted = run(core, 'POST', '/recommend', {'seeds': [2, 1], 'k': 3, 'genres': ['comedy', 'Adventure']})
+    assert posted == result
+
+
+@pytest.mark.parametrize('query', ['k=abc', 'k=0', 'k=101', 'k=1.5'])
+def test_bad_k(core, query):
+    assert status_of(core, 'GET', f'/recommend?seeds=1&{query}') == 400
+
+
+@pytest.mark.parametrize('body', [{'seeds': [1], 'engine': 'magic'}, {'seeds': [1], 'engine': ['content']},
+                                  {'seeds': [1], 'engine': 1}])
+def test_bad_engine(core, body):
+    assert status_of(core, 'POST', '/recommend', body) == 400
+
+
+@pytest.mark.parametrize('genres', [5, {'Action': 1}, [1, 2], ['Action', None], True])
+def test_bad_genres(core, genres):
+    assert status_of(core, 'POST', '/recommend', {'seeds': [1], 'genres': genres}) == 400
+
+
+@pytest.mark.parametrize('body', [{}, {'seeds': []}, {'seeds': 5}, {'seeds': {'1': 1}}, {'seeds': ['x']},
+                                  {'seeds': list(range(101))}])
+def test_bad_seeds(core, body):
+    assert status_of(core, 'POST', '/recommend', body) == 400
+
+
+def test_recommend_for_user(core):
+    result = run(core, 'GET', '/users/1/recommend?k=5&engine=item_cf')
+    assert result['userId'] == 1 and result['engine'] == 'item_cf'
+    seen, _ = core.user_seeds(1)
+    assert not set(seen.tolist()) & {item['movieId'] for item in result['results']}
+    assert status_of(core, 'GET', '/users/12345/recommend') == 404
+    assert status_of(core, 'GET', '/users/abc/recommend') == 400
+
+
+def test_unknown_path_and_method(core):
+    assert status_of(core, 'GET', '/nope') == 404
+    assert status_of(core, 'DELETE', '/recommend') == 405
+    assert status_of(core, 'POST', '/search') == 405
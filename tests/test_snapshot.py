@@ -0,0 +1,62 @@
+import os
+import json
+import pytest
+from sqlalchemy import text
+import snapshot as snapshot_module
+from db import get_engine
+from snapshot import db_fingerprint, load_or_build_snapshot, write_snapshot, snapshot_dir_for, META_FILE
+
+
+def _execute(db_path, statement, **params):
+    with get_engine(db_path).begin() as conn:
+        conn.execute(text(statement), params)
+
+
+def test_fingerprint_tracks_movie_rows(small_db):
+    original = db_fingerprint(small_db)
+    assert db_fingerprint(small_db) == original
+    # 길이가 같은 제목 수정, 장르 맞바꾸기도 지문을 바꿈
+    _execute(small_db, 'UPDATE movies SET title = :title WHERE "movieId" = 1', title='Toy Storm (1995)')
+    changed = db_fingerprint(small_db)
+    assert changed != original
+    _execute(small_db, 'UPDATE movies SET title = :title WHERE "movieId" = 1', title='Toy Story (1995)')
+    assert db_fingerprint(small_db) == original
+    _execute(small_db, 'UPDATE movies SET genres = :genres WHERE "movieId" = 3', genres='Romance|Comedy')
+    assert db_fingerprint(small_db) not in (original, changed)
+
+
+def test_changed_movie_row_rebuilds_snapshot(small_db):
+    before = write_snapshot(small_db)
+    _execute(small_db, 'UPDATE movies SET title = :title WHERE "movieId" = 1', title='Toy Storm (1995)')
+
+    after = load_or_build_snapshot(small_db)
+    assert after.meta['source']['fingerprint'] != before.meta['source']['fingerprint']
+    assert after.catalog().titles[0] == 'Toy Storm (1995)'
+    assert after.matches(small_db)
+    # 새 스냅숏이 디스크에 쓰였으므로 다시 불러와도 같은 내용
+    assert load_or_build_snapshot(small_db).catalog().titles[0] == 'Toy Storm (1995)'
+
+
+def test_unrelated_write_keeps_snapshot(small_db, monkeypatch):
+    before = write_snapshot(small_db)
+    # 스냅숏에 담기지 않는 내용만 바뀐 경우 (파일 수정 시각만 달라짐)
+    _execute(small_db, 'CREATE TABLE scratch (x INTEGER)')
+    monkeypatch.setattr(snapshot_module, 'write_snapshot', lambda *args: pytest.fail('다시 만들면 안 됨'))
+
+    after = load_or_build_snapshot(small_db)
+    assert after.meta['source']['fingerprint'] == before.meta['source']['fingerprint']
+    # 다음 확인이 지문 계산 없이 끝나도록 새 크기/수정 시각을 기록
+    with open(os.path.join(snapshot_dir_for(small_db), META_FILE), encoding='utf-8') as f:
+        assert json.load(f)['source']['mtime_ns'] == os.stat(small_db).st_mtime_ns
+
+
+def test_other_format_rebuilds_snapshot(small_db):
+    write_snapshot(small_db)
+    meta_path = os.path.join(snapshot_dir_for(small_db), META_FILE)
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    meta['format'] -= 1
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+    assert load_or_build_snapshot(small_db).meta['format'] == snapshot_module.SNAPSHOT_FORMAT
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from conftest import MOVIES
+from movie_filter import MovieFilter
+from title_search import TitleIndex, TitleSearch, fold
+
+# conftest 카탈로그 + 악센트/구두점이 있는 제목
+TITLES = [title for _, title, _ in MOVIES] + ['Amélie (Fabuleux destin d\'Amélie Poulain, Le) (2001)',
+                                              'Spider-Man (2002)']
+GENRES = [genres for _, _, genres in MOVIES] + ['Comedy|Romance', 'Action|Adventure|Sci-Fi|Thriller']
+
+
+def _titles(rows):
+    return [TITLES[row] for row in rows]
+
+
+@pytest.fixture
+def index():
+    return TitleIndex(TITLES)
+
+
+def test_fold_removes_accents_case_and_punctuation():
+    assert fold("Amélie (2001)") == 'amelie 2001'
+    assert fold('  SPIDER-man!! ') == 'spider man'
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('toy story', ['Toy Story (1995)']),
+    ('TOY STORY', ['Toy Story (1995)']),
+    ('star wars: episode', ['Star Wars: Episode IV - A New Hope (1977)']),
+    ('amelie', ["Amélie (Fabuleux destin d'Amélie Poulain, Le) (2001)"]),
+    ('spider man', ['Spider-Man (2002)']),
+    ('spider-man', ['Spider-Man (2002)']),
+    ('matrix 1999', ['Matrix, The (1999)']),
+    ('no such movie', []),
+    ('qqq', []),
+])
+def test_search(index, query, expected):
+    assert _titles(index.search(query)) == expected
+
+
+def test_short_or_empty_query_matches_by_substring(index):
+    assert len(index.search('')) == len(TITLES)
+    # 3글자보다 짧으면 3-gram이 없으므로 전체를 후보로 두고 부분 문자열만 확인
+    assert _titles(index.search('se')) == ['Seven (a.k.a. Se7en) (1995)']
+
+
+def test_typing_narrows_within_previous_rows(index):
+    search = TitleSearch(index)
+    calls = []
+    original = index.search
+    index.search = lambda query, within=None: calls.append(within) or original(query, within)
+
+    assert len(search.search('the')) == 3
+    # 검색어가 앞 검색어로 시작하면 이전 결과 안에서만 확인
+    assert _titles(search.search('the b')) == ['Father of the Bride Part II (1995)']
+    assert calls[-1] is not None and len(calls[-1]) == 3
+    # 같은 검색어(대소문자/구두점만 다름)는 다시 찾지 않음
+    n_calls = len(calls)
+    assert _titles(search.search('THE-B!')) == ['Father of the Bride Part II (1995)']
+    assert len(calls) == n_calls
+    # 지우면 (앞 검색어로 시작하지 않으면) 전체에서 다시 찾음
+    assert len(search.search('th')) >= 3
+    assert calls[-1] is None
+    # 연도 토큰이 들어가면 결과가 줄어든다는 보장이 없어 전체 검색
+    search.search('seven')
+    assert _titles(search.search('seven 1995')) == ['Seven (a.k.a. Se7en) (1995)']
+    assert calls[-1] is None
+
+
+def test_packed_index_gives_same_results(index):
+    packed = TitleIndex.from_arrays(index.to_arrays())
+    for query in ('toy', 'the', 'amelie', 'matrix 1999', 'no such movie', ''):
+        np.testing.assert_array_equal(packed.search(query), index.search(query))
+
+
+def test_movie_filter_combines_title_and_genre(index):
+    movie_filter = MovieFilter(TITLES, GENRES, np.full(len(TITLES), 3.0, dtype=np.float32), index)
+    assert _titles(np.flatnonzero(movie_filter.mask('the', ['Sci-Fi']))) == ['Matrix, The (1999)']
+    assert _titles(np.flatnonzero(movie_filter.mask('the', ['Drama']))) == ['Shawshank Redemption, The (1994)']
+    assert not movie_filter.mask('nothing here').any()
+    assert movie_filter.mask('   ').all()
@@ -0,0 +1,29 @@
+import time
+from contextlib import contextmanager
+
+
+class PhaseTimer:
+    # 시작 과정 같은 순차 작업의 단계별 소요 시간 기록
+    # on_phase를 주면 각 단계가 시작될 때 단계 이름으로 호출 (진행 상황 표시용)
+    def __init__(self, on_phase=None):
+        self.on_phase = on_phase
+        self.phases = []
+
+    def record(self, name, seconds):
+        self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name):
+        if self.on_phase is not None:
+            self.on_phase(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def total(self):
+        return sum(seconds for _, seconds in self.phases)
+
+    def as_dict(self):
+        return dict(self.phases)
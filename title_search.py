@@ -0,0 +1,146 @@
+import re
+import unicodedata
+import numpy as np
+
+# 제목 끝의 개봉 연도, 검색어 안의 연도 토큰
+TITLE_YEAR = re.compile(r'\((\d{4})\)\s*$')
+QUERY_YEAR = re.compile(r'\b(1[89]\d{2}|20\d{2})\b')
+NON_WORD = re.compile(r'[^\w]+')
+
+
+def fold(text):
+    # 악센트 제거 + 대소문자 통합 + 구두점을 공백으로 ("Amélie (2001)" -> "amelie 2001")
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return NON_WORD.sub(' ', text.casefold()).strip()
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def pack_strings(strings):
+    # 문자열 목록 -> NUL로 이어 붙인 UTF-8 바이트 배열 (메모리 매핑으로 저장/공유 가능)
+    return np.frombuffer('\0'.join(strings).encode('utf-8'), dtype=np.uint8)
+
+
+def unpack_strings(packed):
+    return bytes(packed).decode('utf-8').split('\0') if len(packed) else []
+
+
+class PackedPostings:
+    # 정렬된 3-gram 배열 + 구간 오프셋 + 행 번호를 이어 붙인 배열로 된 역색인 (dict와 같은 get 인터페이스)
+    def __init__(self, grams, offsets, rows):
+        self.grams = grams
+        self.offsets = offsets
+        self.rows = rows
+
+    def get(self, gram):
+        i = int(np.searchsorted(self.grams, gram))
+        if i == len(self.grams) or self.grams[i] != gram:
+            return None
+        return self.rows[self.offsets[i]:self.offsets[i + 1]]
+
+
+class TitleIndex:
+    # 정규화된 제목의 3-gram -> 행 번호 배열 역색인 (로드 시 한 번 생성)
+    def __init__(self, titles):
+        self.keys = [fold(title) for title in titles]
+        self.years = np.array([int(m.group(1)) if (m := TITLE_YEAR.search(title)) else 0 for title in titles],
+                              dtype=np.int32)
+        postings = {}
+        for row, key in enumerate(self.keys):
+            for gram in trigrams(key):
+                postings.setdefault(gram, []).append(row)
+        self.postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+        self.all_rows = np.arange(len(self.keys), dtype=np.int32)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def to_arrays(self):
+        # 역색인을 배열 몇 개로 묶어 저장 (작업 프로세스마다 색인을 다시 만들지 않도록)
+        if isinstance(self.postings, PackedPostings):
+            grams, offsets, rows = self.postings.grams, self.postings.offsets, self.postings.rows
+        else:
+            grams = sorted(self.postings)
+            lengths = [len(self.postings[gram]) for gram in grams]
+            offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+            rows = np.concatenate([self.postings[gram] for gram in grams]) if grams else np.empty(0, np.int32)
+            grams = np.array(grams, dtype='U3')
+        return {'keys': pack_strings(self.keys), 'years': self.years,
+                'grams': grams, 'offsets': offsets, 'rows': rows}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        index = cls.__new__(cls)
+        index.keys = unpack_strings(arrays['keys'])
+        index.years = arrays['years']
+        index.postings = PackedPostings(arrays['grams'], arrays['offsets'], arrays['rows'])
+        index.all_rows = np.arange(len(index.keys), dtype=np.int32)
+        return index
+
+    def candidates(self, key):
+        # 검색어의 모든 3-gram을 포함하는 행 (짧은 목록부터 교집합)
+        grams = trigrams(key)
+        if not grams:
+            return self.all_rows
+        lists = sorted((self.postings.get(gram) for gram in grams), key=lambda p: 0 if p is None else len(p))
+        if lists[0] is None:
+            return self.all_rows[:0]
+        rows = lists[0]
+        for posting in lists[1:]:
+            rows = np.intersect1d(rows, posting, assume_unique=True)
+            if len(rows) == 0:
+                break
+        return rows
+
+    def verify(self, rows, key, year=None, rest=None):
+        # 후보 행 중 실제로 부분 문자열이 일치하는 행만 남김 (연도 토큰은 개봉 연도와 비교)
+        keys = self.keys
+        matched = [row for row in rows if key in keys[row]]
+        if year is not None:
+            year_rows = rows[self.years[rows] == year]
+            matched += [row for row in year_rows if rest in keys[row]]
+        return np.unique(np.array(matched, dtype=np.int32))
+
+    def search(self, query, within=None):
+        key = fold(query)
+        if not key:
+            return self.all_rows
+        year, rest = None, None
+        match = QUERY_YEAR.search(key)
+        if match:
+            year = int(match.group(1))
+            rest = ' '.join((key[:match.start()] + ' ' + key[match.end():]).split())
+        if within is None:
+            rows = self.candidates(key)
+            if year is not None:
+                rows = np.union1d(rows, self.candidates(rest))
+        else:
+            rows = within
+        return self.verify(rows, key, year, rest)
+
+
+class TitleSearch:
+    # 입력창 하나의 검색 상태: 검색어가 길어지기만 하면 이전 결과 안에서만 다시 확인
+    # (연도 토큰이 있으면 '제목 + 개봉 연도' 일치도 허용하므로 결과가 줄어든다는 보장이 없어 전체 검색)
+    def __init__(self, index):
+        self.index = index
+        self.last_key = ''
+        self.last_rows = index.all_rows
+
+    def search(self, query):
+        key = fold(query)
+        if key == self.last_key:
+            return self.last_rows
+        narrowing = self.last_key and key.startswith(self.last_key) and not QUERY_YEAR.search(key)
+        within = self.last_rows if narrowing else None
+        rows = self.index.search(query, within)
+        self.last_key, self.last_rows = key, rows
+        return rows
+
+    def mask(self, query):
+        mask = np.zeros(len(self.index), dtype=bool)
+        mask[self.search(query)] = True
+        return mask
@@ -0,0 +1,191 @@
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import text
+from db import DB_PATH, get_engine
+from createdb.schema import user_recommendations
+from recommend import recommend_batch, DEFAULT_K
+from feature_index import index_path_for
+from item_cf import neighbors_path_for
+from als import model_dir_for
+from embeddings import embedding_path_for
+
+# 사용법: python user_index.py [--engine item_cf] [--k 20] [--workers 4]
+# 모든 사용자의 맞춤 추천을 미리 계산해 user_recommendations 테이블에 저장
+
+# 사용자 인덱스 파일 이름
+USER_INDEX_FILE = 'user_index.npz'
+
+# 평점 청크 크기, 전체 사용자 추천 시 작업 하나가 맡는 사용자 수
+RATINGS_CHUNK_SIZE = 1_000_000
+USER_BATCH_SIZE = 256
+
+_ratings_by_user = 'SELECT userId, movieId, rating FROM ratings ORDER BY userId, movieId'
+
+
+def user_index_path_for(db_path=DB_PATH):
+    # 사용자 인덱스 파일은 data.db 옆에 저장
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), USER_INDEX_FILE)
+
+
+class UserIndex:
+    # 사용자별 평점 이력을 CSR 형태(정렬된 userId, 오프셋, movieId/평점 배열)로 들고 있는 인덱스
+    # 한 사용자의 이력 조회는 이진 탐색 한 번 + 구간 잘라내기 (ratings 테이블을 훑지 않음)
+    def __init__(self, user_ids, indptr, movie_ids, ratings):
+        self.user_ids = np.asarray(user_ids, dtype=np.int64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.movie_ids = np.asarray(movie_ids, dtype=np.int32)
+        self.ratings = np.asarray(ratings, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def __contains__(self, user_id):
+        i = int(np.searchsorted(self.user_ids, user_id))
+        return i < len(self.user_ids) and self.user_ids[i] == user_id
+
+    def history(self, user_id):
+        # (movieId 배열, 평점 배열), 평점이 없는 사용자는 빈 배열
+        i = int(np.searchsorted(self.user_ids, user_id))
+        if i == len(self.user_ids) or self.user_ids[i] != user_id:
+            return self.movie_ids[:0], self.ratings[:0]
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.movie_ids[start:end], self.ratings[start:end]
+
+    def seeds(self, user_id):
+        # 평점 이력 -> (선택 영화, 가중치): 사용자 평균보다 높게 준 영화는 양수, 낮게 준 영화는 음수 가중치
+        # 모든 평점이 같으면 가중치를 모두 1로 둠
+        movie_ids, ratings = self.history(user_id)
+        weights = ratings - ratings.mean() if len(ratings) else ratings
+        if not np.any(weights):
+            weights = np.ones(len(ratings), dtype=np.float32)
+        return movie_ids, weights
+
+    def updated(self, histories):
+        # 일부 사용자의 이력을 새 이력으로 바꾼 인덱스 ({userId: (movieId 배열, 평점 배열)}, 나머지 사용자는 그대로)
+        changed = np.array(sorted(int(u) for u in histories), dtype=np.int64)
+        owners = np.repeat(self.user_ids, np.diff(self.indptr))
+        keep = ~np.isin(owners, changed)
+        users = np.concatenate([owners[keep]] + [np.full(len(histories[u][0]), u, dtype=np.int64) for u in changed])
+        movies = np.concatenate([self.movie_ids[keep]] + [np.asarray(histories[u][0], dtype=np.int32) for u in changed])
+        ratings = np.concatenate([self.ratings[keep]] + [np.asarray(histories[u][1], dtype=np.float32) for u in changed])
+        # build_user_index와 같은 (userId, movieId) 순서
+        order = np.lexsort((movies, users))
+        user_ids, counts = np.unique(users[order], return_counts=True)
+        return UserIndex(user_ids, np.concatenate([[0], np.cumsum(counts)]), movies[order], ratings[order])
+
+    def save(self, path):
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as npz:
+            return cls.from_arrays(npz)
+
+    def to_arrays(self):
+        return {'user_ids': self.user_ids, 'indptr': self.indptr, 'movie_ids': self.movie_ids,
+                'ratings': self.ratings}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['user_ids'], arrays['indptr'], arrays['movie_ids'], arrays['ratings'])
+
+
+def build_user_index(engine, chunk_size=RATINGS_CHUNK_SIZE):
+    # 기본 키 (userId, movieId) 순서로 읽으므로 정렬 없이 사용자별 구간이 이어짐
+    users, movies, values = [], [], []
+    for chunk in pd.read_sql(_ratings_by_user, engine, chunksize=chunk_size):
+        users.append(chunk['userId'].to_numpy(dtype=np.int64))
+        movies.append(chunk['movieId'].to_numpy(dtype=np.int32))
+        values.append(chunk['rating'].to_numpy(dtype=np.float32))
+    users = np.concatenate(users) if users else np.empty(0, dtype=np.int64)
+    user_ids, counts = np.unique(users, return_counts=True)
+    indptr = np.concatenate([[0], np.cumsum(counts)])
+    return UserIndex(user_ids, indptr,
+                     np.concatenate(movies) if movies else np.empty(0, dtype=np.int32),
+                     np.concatenate(values) if values else np.empty(0, dtype=np.float32))
+
+
+def load_or_build_user_index(db_path=DB_PATH):
+    # data.db보다 새로운 인덱스 파일이 있으면 불러오고, 아니면 새로 만들어 저장
+    path = user_index_path_for(db_path)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(db_path):
+        return UserIndex.load(path)
+    index = build_user_index(get_engine(db_path))
+    index.save(path)
+    return index
+
+
+def recommend_users(index, scorer, user_index, user_ids, k=DEFAULT_K, genres=None):
+    # 여러 사용자의 평점 이력을 가중치 있는 선택 영화로 삼아 한 번에 추천 (이미 본 영화 제외)
+    seeds = [user_index.seeds(user_id) for user_id in user_ids]
+    return recommend_batch(index, [movie_ids for movie_ids, _ in seeds], k, [genres] * len(seeds),
+                           scorer=scorer, weight_sets=[weights for _, weights in seeds])
+
+
+# 작업 프로세스마다 한 번만 불러 두는 모델 (initializer에서 설정)
+_worker_state = None
+
+
+def _init_worker(db_path, engine):
+    global _worker_state
+    from core import RecommenderCore  # core가 이 모듈을 불러오므로 여기서 늦게 불러옴
+    core = RecommenderCore(db_path)
+    _worker_state = (core.feature_index, core.scorer(engine), load_or_build_user_index(db_path))
+
+
+def _recommend_chunk(user_ids, k):
+    index, scorer, user_index = _worker_state
+    rows = []
+    for user_id, results in zip(user_ids, recommend_users(index, scorer, user_index, user_ids, k)):
+        rows += [(int(user_id), rank + 1, movie_id, score) for rank, (movie_id, score) in enumerate(results)]
+    return rows
+
+
+def build_user_recommendations(db_path=DB_PATH, engine='item_cf', k=DEFAULT_K, workers=None,
+                               batch_size=USER_BATCH_SIZE):
+    # 모든 사용자 추천을 여러 프로세스로 나눠 계산하고 engine별로 테이블 내용을 한 번에 교체
+    from core import RecommenderCore  # core가 이 모듈을 불러오므로 여기서 늦게 불러옴
+    core = RecommenderCore(db_path)
+    core.scorer(engine)  # 작업 프로세스가 디스크에서 바로 읽도록 산출물을 미리 만들어 둠
+    user_ids = load_or_build_user_index(db_path).user_ids
+    chunks = [user_ids[start:start + batch_size] for start in range(0, len(user_ids), batch_size)]
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(db_path, engine)) as pool:
+        for chunk_rows in pool.map(_recommend_chunk, chunks, [k] * len(chunks)):
+            rows += chunk_rows
+
+    # 추천 결과만 쓰는 것이므로 쓰기 전에 최신이던 산출물은 쓴 뒤에도 최신으로 유지
+    fresh = [path for path in _artifact_paths(db_path)
+             if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(db_path)]
+    db_engine = get_engine(db_path)
+    user_recommendations.create(db_engine, checkfirst=True)
+    with db_engine.begin() as conn:
+        conn.execute(user_recommendations.delete().where(user_recommendations.c.engine == engine))
+        conn.execute(text('INSERT INTO user_recommendations (engine, "userId", rank, "movieId", score) '
+                          'VALUES (:engine, :userId, :rank, :movieId, :score)'),
+                     [{'engine': engine, 'userId': u, 'rank': r, 'movieId': m, 'score': s} for u, r, m, s in rows])
+    for path in fresh:
+        os.utime(path)
+    return len(user_ids), len(rows)
+
+
+def _artifact_paths(db_path):
+    return [index_path_for(db_path), neighbors_path_for(db_path), os.path.join(model_dir_for(db_path), 'meta.json'),
+            user_index_path_for(db_path), embedding_path_for(db_path)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='모든 사용자의 맞춤 추천을 미리 계산해 data.db에 저장합니다.')
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--engine', default='item_cf', choices=['content', 'item_cf', 'als', 'embedding'])
+    parser.add_argument('--k', type=int, default=DEFAULT_K)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    n_users, n_rows = build_user_recommendations(args.db, args.engine, args.k, args.workers)
+    print(f"사용자 {n_users}명, 추천 {n_rows}건 저장 완료: {time.perf_counter() - started:.1f}초")